@@ -1,8 +1,8 @@
 from __future__ import annotations
-from typing import List
+from typing import Any, Dict, List, Tuple
 
-from src.messages import Message
-from src.store import ArtifactStore
+from src.messages import Message, Task
+from src.store import ArtifactStore, ns_key
 
 # forward reference to avoid circular import at runtime typing
 from typing import TYPE_CHECKING
@@ -20,6 +20,48 @@ class BaseAgent:
 
     name: str = "base_agent"
 
+    # Routing declarations read by MessageBus.register():
+    # - subscribes: message types delivered to this agent
+    # - handles: Task names routed to this agent (Tasks are never broadcast)
+    subscribes: Tuple[str, ...] = ()
+    handles: Tuple[str, ...] = ()
+
+    # Artifact cache (src/cache.py): bump `version` whenever the agent's output changes
+    # for the same inputs; agents with side effects set `cacheable = False`.
+    version: str = "1"
+    cacheable: bool = True
+
+    # Checkpoints (src/checkpoint.py): attributes holding state carried between messages.
+    # - checkpoint_fields: saved whole on every checkpoint (small state: counters, ids)
+    # - checkpoint_tables: dict/set attributes growing with the run, saved key by key;
+    #   mutated in place (a value changed in place needs its key set again), never reassigned
+    checkpoint_fields: Tuple[str, ...] = ()
+    checkpoint_tables: Tuple[str, ...] = ()
+
     def handle(self, msg: Message, store: ArtifactStore, bus: "MessageBus") -> List[Message]:
         # Default behavior: do nothing.
         return []
+
+    async def handle_async(self, msg: Message, store: ArtifactStore, bus: "MessageBus") -> List[Message]:
+        """
+        Entry point used by AsyncMessageBus.
+        Agents that wait on slow backends override this and `await` there;
+        everything else runs its synchronous handle().
+        """
+        return self.handle(msg, store, bus)
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """State to save in a checkpoint (picklable); restored by restore_state()."""
+        return {f: getattr(self, f) for f in self.checkpoint_fields}
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        for f, value in state.items():
+            setattr(self, f, value)
+
+    def cache_salt(self, task: Task) -> str:
+        """Everything besides input artifacts that determines this agent's output for a Task."""
+        return f"{self.name}@{self.version}:{task.name}"
+
+    def key(self, task: Task, name: str) -> str:
+        """Artifact key for `name` in the product namespace the task belongs to."""
+        return ns_key(task.payload.get("product_id", ""), name)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+from typing import List
+
+from src.agents.base import BaseAgent
+from src.compare import top_k_competitors
+from src.messages import Message, Task, NeedArtifact
+from src.store import split_key
+
+class CompetitorAgent(BaseAgent):
+    """
+    Catalog-wide competitor ranking (one RankCompetitors Task per catalog run):
+    - requires every product's `product_model`, produces every product's `competitors`
+    - `competitors`: the `top_k` payload count of most comparable catalog products,
+      each with its id, similarity scores, price delta and product model
+    """
+    name = "competitor_agent"
+    handles = ("RankCompetitors",)
+
+    def __init__(self, engine: str = "auto") -> None:
+        self.engine = engine
+
+    def cache_salt(self, task: Task) -> str:
+        return f"{super().cache_salt(task)}:top{task.payload.get('top_k', 0)}"
+
+    def handle(self, msg: Message, store, bus) -> List[Message]:
+        if msg.type != "Task":
+            return []
+
+        task = msg  # type: ignore
+        if not isinstance(task, Task) or task.name != "RankCompetitors":
+            return []
+
+        for model_key in task.requires:
+            if not store.has(model_key):
+                return [NeedArtifact(task.name, model_key, task)]
+
+        models = [store.require(k).value for k in task.requires]
+        product_ids = [split_key(k)[0] for k in task.requires]
+        ranked = top_k_competitors(models, int(task.payload.get("top_k", 0)), self.engine)
+
+        for out_key, competitors in zip(task.produces, ranked):
+            value = [
+                {
+                    "product_id": product_ids[c.index],
+                    "similarity": c.similarity,
+                    "shared_ingredients": c.shared_ingredients,
+                    "shared_benefits": c.shared_benefits,
+                    "price_delta": c.price_delta,
+                    "product": models[c.index],
+                }
+                for c in competitors
+            ]
+            bus.put_artifact(out_key, value, produced_by=self.name)
+        return []
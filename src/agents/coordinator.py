@@ -1,86 +1,90 @@
 from __future__ import annotations
-from typing import Dict, List, Set
+from typing import Dict, List, Tuple
 
 from src.agents.base import BaseAgent
 from src.messages import Message, NeedArtifact, ArtifactCreated, Task
 
+# Task identity: (name, requires, produces); tuples since messages are immutable
+TaskId = Tuple[str, Tuple[str, ...], Tuple[str, ...]]
+
+
 class TaskCoordinatorAgent(BaseAgent):
     """
     Dynamic coordination mechanism:
     - Collects blocked tasks when agents emit NeedArtifact
-    - Requeues them when the missing artifact is later created
-
-    Fixes:
-    1) Dedup is done per (task_id, missing_key) not per task_id alone
-       so tasks can re-block on different missing artifacts.
-    2) (Optional) Only requeue tasks when all required artifacts exist.
-       This reduces useless retries, but still remains agentic.
+    - Requeues them when the missing artifacts are later created
+
+    Readiness tracking:
+    1) When a task blocks, its missing inputs are counted once and the task is
+       listed under each of them (artifact key -> waiting task ids).
+    2) Each ArtifactCreated decrements the count of the tasks waiting on that key;
+       a task is requeued exactly once, when its count reaches zero.
+    3) A released task's bookkeeping is dropped, so memory is bounded by the
+       number of currently blocked tasks, not by the length of the run.
     """
     name = "task_coordinator_agent"
+    subscribes = ("NeedArtifact", "ArtifactCreated")
+    checkpoint_fields = ("stats",)
+    checkpoint_tables = ("blocked", "remaining", "waiting")
 
     def __init__(self) -> None:
-        # missing_key -> list of blocked tasks waiting on that artifact
-        self.waiting: Dict[str, List[Task]] = {}
+        self.blocked: Dict[TaskId, Task] = {}          # blocked task id -> Task
+        self.remaining: Dict[TaskId, int] = {}         # blocked task id -> inputs still missing
+        self.waiting: Dict[str, List[TaskId]] = {}     # missing artifact key -> blocked task ids
 
-        # Dedup per (task_id + missing_key) to avoid duplicates,
-        # BUT still allow the same task to wait on a different key later.
-        self.seen_pairs: Set[str] = set()
+        # blocked: NeedArtifact messages received; requeued: Tasks sent back for retry
+        self.stats: Dict[str, int] = {"blocked": 0, "requeued": 0}
 
-    def _task_id(self, task: Task) -> str:
+    @staticmethod
+    def _task_id(task: Task) -> TaskId:
         # Deterministic ID for task "identity"
-        return f"{task.name}|{'-'.join(task.requires)}|{'-'.join(task.produces)}"
+        return (task.name, task.requires, task.produces)
 
     def handle(self, msg: Message, store, bus) -> List[Message]:
-        # 1) When an agent says "I need X", store the blocked task under that key
+        # 1) When an agent says "I need X", park the task until all its inputs exist
         if msg.type == "NeedArtifact":
             need = msg  # type: ignore
             if not isinstance(need, NeedArtifact):
                 return []
 
+            self.stats["blocked"] += 1
             t = need.blocked_task
             tid = self._task_id(t)
-
-            # ✅ Fix Issue 1: dedup per (task + missing_key)
-            pair_key = f"{tid}||{need.missing_key}"
-            if pair_key in self.seen_pairs:
-                return []
-
-            self.seen_pairs.add(pair_key)
-            self.waiting.setdefault(need.missing_key, []).append(t)
+            if tid in self.blocked:
+                return []  # already waiting (on this key or another one)
+
+            missing = [req for req in t.requires if not store.has(req)]
+            if not missing:
+                # Created between the NeedArtifact and now -> retry right away
+                self.stats["requeued"] += 1
+                return [t]
+
+            self.blocked[tid] = t
+            self.remaining[tid] = len(missing)
+            for req in missing:
+                self.waiting.setdefault(req, []).append(tid)
             return []
 
-        # 2) When an artifact is created, requeue tasks waiting on it
+        # 2) When an artifact is created, requeue the tasks it was the last missing input of
         if msg.type == "ArtifactCreated":
             created = msg  # type: ignore
             if not isinstance(created, ArtifactCreated):
                 return []
 
-            missing_key = created.key
-            if missing_key not in self.waiting:
+            tids = self.waiting.pop(created.key, None)
+            if tids is None:
                 return []
 
-            blocked_tasks = self.waiting.pop(missing_key)
-
-            # ✅ Fix Issue 2 (efficiency): only requeue tasks that are now fully ready
-            # Tasks that still miss other requires will be kept waiting under their next missing key
-            ready: List[Task] = []
-            for t in blocked_tasks:
-                # If ALL requires exist -> ready to retry
-                if all(store.has(req) for req in t.requires):
-                    ready.append(t)
-                else:
-                    # Still missing something else -> re-register under the next missing key
-                    # This keeps retries minimal and intelligent.
-                    for req in t.requires:
-                        if not store.has(req):
-                            # Create a new "NeedArtifact" internally by just placing it back into waiting list
-                            tid = self._task_id(t)
-                            pair_key = f"{tid}||{req}"
-                            if pair_key not in self.seen_pairs:
-                                self.seen_pairs.add(pair_key)
-                                self.waiting.setdefault(req, []).append(t)
-                            break
+            ready: List[Message] = []
+            for tid in tids:
+                left = self.remaining[tid] - 1
+                if left:
+                    self.remaining[tid] = left
+                    continue
+                del self.remaining[tid]
+                ready.append(self.blocked.pop(tid))
 
+            self.stats["requeued"] += len(ready)
             return ready
 
         return []
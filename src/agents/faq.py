@@ -1,11 +1,36 @@
 from __future__ import annotations
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
 from src.agents.base import BaseAgent
+from src.classify import CLASSIFIER
 from src.messages import Message, Task, NeedArtifact
 
+# Default FAQ: 5 questions across categories, as (category, index in the category)
+SELECTED_QUESTIONS: Tuple[Tuple[str, int], ...] = (
+    ("Informational", 0),
+    ("Usage", 0),
+    ("Usage", 1),
+    ("Safety", 0),
+    ("Purchase", 0),
+)
+
 class FAQAgent(BaseAgent):
     name = "faq_agent"
+    handles = ("ComposeFAQ",)
+
+    def __init__(self, questions: str = "selected") -> None:
+        """
+        questions:
+        - selected: the SELECTED_QUESTIONS subset (default)
+        - all: every question in the bank, in category order
+        """
+        if questions not in ("selected", "all"):
+            raise ValueError(f"Unknown FAQ question set: {questions}")
+        self.questions = questions
+        self.classifier = CLASSIFIER
+
+    def cache_salt(self, task: Task) -> str:
+        return f"{super().cache_salt(task)}:{self.questions}"
 
     def handle(self, msg: Message, store, bus) -> List[Message]:
         if msg.type != "Task":
@@ -16,42 +41,31 @@ class FAQAgent(BaseAgent):
             return []
 
         # Autonomy: require both artifacts
-        if not store.has("product_model"):
-            return [NeedArtifact(task.name, "product_model", task)]
-        if not store.has("question_bank"):
-            return [NeedArtifact(task.name, "question_bank", task)]
-
-        p = store.require("product_model").value
-        qb = store.require("question_bank").value
-
-        # Pick 5 questions across categories (deterministic selection)
-        chosen = [
-            ("Informational", qb["categories"]["Informational"][0]),
-            ("Usage", qb["categories"]["Usage"][0]),
-            ("Usage", qb["categories"]["Usage"][1]),
-            ("Safety", qb["categories"]["Safety"][0]),
-            ("Purchase", qb["categories"]["Purchase"][0]),
-        ]
-
-        # Build answers strictly from dataset fields only
-        def answer(category: str, q: str) -> str:
-            if "price" in q.lower():
-                return f"The price is ₹{p['price_inr']}."
-            if "side effect" in q.lower() or "tingling" in q.lower():
-                return f"Possible side effect: {p['side_effects']}."
-            if "when" in q.lower() or "apply" in q.lower() or "drops" in q.lower():
-                return p["how_to_use"]
-            if "skin" in q.lower():
-                return f"Suitable for: {', '.join(p['skin_type'])} skin types."
-            # fallback informational
-            return f"{p['product_name']} is a Vitamin C serum ({p['concentration']}) with key ingredients {', '.join(p['key_ingredients'])}."
+        model_key = self.key(task, "product_model")
+        bank_key = self.key(task, "question_bank")
+        if not store.has(model_key):
+            return [NeedArtifact(task.name, model_key, task)]
+        if not store.has(bank_key):
+            return [NeedArtifact(task.name, bank_key, task)]
+
+        p = store.require(model_key).value
+        qb = store.require(bank_key).value
+
+        categories = qb["categories"]
+        if self.questions == "all":
+            chosen = [(cat, q) for cat, qs in categories.items() for q in qs]
+        else:
+            chosen = [(cat, categories[cat][i]) for cat, i in SELECTED_QUESTIONS]
+
+        # Build answers strictly from dataset fields only, one classifier pass over the questions
+        rules = self.classifier.classify_all([q for _, q in chosen])
 
         qas: List[Dict[str, str]] = []
-        for cat, q in chosen:
+        for (cat, q), rule in zip(chosen, rules):
             qas.append({
                 "category": cat,
                 "question": q,
-                "answer": answer(cat, q),
+                "answer": rule.builder(p),
             })
 
         faq_content = {
@@ -59,5 +73,5 @@ class FAQAgent(BaseAgent):
             "qas": qas,
         }
 
-        bus.put_artifact("faq_content", faq_content, produced_by=self.name)
+        bus.put_artifact(self.key(task, "faq_content"), faq_content, produced_by=self.name)
         return []
@@ -1,12 +1,51 @@
 from __future__ import annotations
-from typing import List
+from typing import List, Optional
 
 from src.agents.base import BaseAgent
 from src.messages import Message, Task, NeedArtifact
-from src.templates import TemplateEngine, faq_page_template, product_page_template, comparison_page_template
+from src.templates import TEMPLATES
+
+# Fictional Product B (structured, explicitly fictional); one shared, never mutated
+# dict for every product's `product_b_model` and comparison page.
+PRODUCT_B = {
+    "product_name": "RadiantDrop Vitamin C Serum (Fictional)",
+    "concentration": "5% Vitamin C",
+    "skin_type": ["Combination"],
+    "key_ingredients": ["Vitamin C"],
+    "benefits": ["Brightening"],
+    "how_to_use": "Apply a small amount in the morning.",
+    "side_effects": "May cause mild irritation in sensitive skin.",
+    "price_inr": 799,
+    "fictional": True,
+}
 
 class PagesAgent(BaseAgent):
     name = "pages_agent"
+    handles = ("RenderFAQPage", "RenderProductPage", "BuildComparison")
+
+    # task name -> template it renders (also part of the cache key)
+    TASK_TEMPLATES = {
+        "RenderFAQPage": "FAQPage",
+        "RenderProductPage": "ProductPage",
+        "BuildComparison": "ComparisonPage",
+    }
+
+    def __init__(self) -> None:
+        self.templates = TEMPLATES
+
+    def template_name(self, task: Task) -> Optional[str]:
+        # BuildComparison against catalog competitors (see PlannerAgent) instead of Product B
+        if task.name == "BuildComparison" and self.key(task, "competitors") in task.requires:
+            return "CompetitorComparisonPage"
+        return self.TASK_TEMPLATES.get(task.name)
+
+    def cache_salt(self, task: Task) -> str:
+        salt = super().cache_salt(task)
+        template_name = self.template_name(task)
+        if template_name is None:
+            return salt
+        template = self.templates.get(template_name)
+        return f"{salt}:{template.name}@{template.version}"
 
     def handle(self, msg: Message, store, bus) -> List[Message]:
         if msg.type != "Task":
@@ -16,61 +55,61 @@ class PagesAgent(BaseAgent):
         if not isinstance(task, Task):
             return []
 
-        engine = TemplateEngine()
+        model_key = self.key(task, "product_model")
 
         # Render FAQ Page
         if task.name == "RenderFAQPage":
-            if not store.has("product_model"):
-                return [NeedArtifact(task.name, "product_model", task)]
-            if not store.has("faq_content"):
-                return [NeedArtifact(task.name, "faq_content", task)]
+            faq_key = self.key(task, "faq_content")
+            if not store.has(model_key):
+                return [NeedArtifact(task.name, model_key, task)]
+            if not store.has(faq_key):
+                return [NeedArtifact(task.name, faq_key, task)]
 
             ctx = {
-                "product_model": store.require("product_model").value,
-                "faq_content": store.require("faq_content").value,
+                "product_model": store.require(model_key).value,
+                "faq_content": store.require(faq_key).value,
             }
-            page = engine.render(faq_page_template(), ctx)
-            bus.put_artifact("faq_page_json", page, produced_by=self.name)
+            page = self.templates.get("FAQPage").render(ctx)
+            bus.put_artifact(self.key(task, "faq_page_json"), page, produced_by=self.name)
             return []
 
         # Render Product Page
         if task.name == "RenderProductPage":
-            if not store.has("product_model"):
-                return [NeedArtifact(task.name, "product_model", task)]
+            if not store.has(model_key):
+                return [NeedArtifact(task.name, model_key, task)]
 
-            ctx = {"product_model": store.require("product_model").value}
-            page = engine.render(product_page_template(), ctx)
-            bus.put_artifact("product_page_json", page, produced_by=self.name)
+            ctx = {"product_model": store.require(model_key).value}
+            page = self.templates.get("ProductPage").render(ctx)
+            bus.put_artifact(self.key(task, "product_page_json"), page, produced_by=self.name)
             return []
 
-        # Build Comparison (create Product B + render comparison page)
+        # Build Comparison (catalog competitors, or create Product B + render comparison page)
         if task.name == "BuildComparison":
-            if not store.has("product_model"):
-                return [NeedArtifact(task.name, "product_model", task)]
-
-            a = store.require("product_model").value
-
-            # Fictional Product B (structured, explicitly fictional)
-            product_b = {
-                "product_name": "RadiantDrop Vitamin C Serum (Fictional)",
-                "concentration": "5% Vitamin C",
-                "skin_type": ["Combination"],
-                "key_ingredients": ["Vitamin C"],
-                "benefits": ["Brightening"],
-                "how_to_use": "Apply a small amount in the morning.",
-                "side_effects": "May cause mild irritation in sensitive skin.",
-                "price_inr": 799,
-                "fictional": True,
-            }
+            if not store.has(model_key):
+                return [NeedArtifact(task.name, model_key, task)]
+
+            a = store.require(model_key).value
+
+            competitors_key = self.key(task, "competitors")
+            if competitors_key in task.requires:
+                if not store.has(competitors_key):
+                    return [NeedArtifact(task.name, competitors_key, task)]
+                ctx = {
+                    "product_model": a,
+                    "competitors": store.require(competitors_key).value,
+                }
+                page = self.templates.get("CompetitorComparisonPage").render(ctx)
+                bus.put_artifact(self.key(task, "comparison_page_json"), page, produced_by=self.name)
+                return []
 
-            bus.put_artifact("product_b_model", product_b, produced_by=self.name)
+            bus.put_artifact(self.key(task, "product_b_model"), PRODUCT_B, produced_by=self.name)
 
             ctx = {
                 "product_model": a,
-                "product_b_model": product_b,
+                "product_b_model": PRODUCT_B,
             }
-            page = engine.render(comparison_page_template(), ctx)
-            bus.put_artifact("comparison_page_json", page, produced_by=self.name)
+            page = self.templates.get("ComparisonPage").render(ctx)
+            bus.put_artifact(self.key(task, "comparison_page_json"), page, produced_by=self.name)
             return []
 
         return []
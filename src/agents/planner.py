@@ -1,61 +1,248 @@
 from __future__ import annotations
-from typing import List
+import random
+from typing import Dict, List, Optional, Sequence, Tuple
 
 from src.agents.base import BaseAgent
-from src.messages import Message, Start, Task
+from src.graph import dependency_order, tasks_for
+from src.messages import ArtifactCreated, Message, Plan, Start, Task
+from src.store import ns_key
+
+# Task blueprint: (name, requires, produces), with artifact names un-namespaced.
+TASK_SPECS: List[Tuple[str, List[str], List[str]]] = [
+    ("ParseProduct", ["raw_product_input"], ["product_model"]),
+    ("GenerateQuestions", ["product_model"], ["question_bank"]),
+    ("ComposeFAQ", ["product_model", "question_bank"], ["faq_content"]),
+    ("RenderFAQPage", ["product_model", "faq_content"], ["faq_page_json"]),
+    ("RenderProductPage", ["product_model"], ["product_page_json"]),
+    ("BuildComparison", ["product_model"], ["product_b_model", "comparison_page_json"]),
+    ("WriteOutputs", ["faq_page_json", "product_page_json", "comparison_page_json"], ["written_files"]),
+]
+
+# Catalog runs with competitors: BuildComparison compares against the products
+# RankCompetitors picked instead of a fictional Product B.
+COMPETITOR_COMPARISON_SPEC: Tuple[str, List[str], List[str]] = (
+    "BuildComparison", ["product_model", "competitors"], ["comparison_page_json"],
+)
+
+# Artifacts a demand-driven plan can target (see PlannerAgent `targets`).
+TARGETS = sorted({name for _, _, produces in TASK_SPECS + [COMPETITOR_COMPARISON_SPEC] for name in produces})
+
 
 class PlannerAgent(BaseAgent):
+    """
+    Turns a goal into runtime Tasks.
+
+    Goals:
+    - build_pages: one product, flat artifact keys (raw_product_input, product_model, ...)
+    - build_catalog: one Task set per product id listed in the `catalog_index` artifact,
+      with every artifact key namespaced by product id ("<product_id>/product_model")
+
+    competitors: build_catalog compares each product with its top-k most comparable
+    catalog products (one catalog-wide RankCompetitors Task); 0 keeps the fictional Product B.
+
+    targets: artifact names to build (default: everything). Only the Tasks they need,
+    found by walking requires -> produces backwards, are emitted. Targeted pages are
+    still written: WriteOutputs then requires just those pages.
+
+    Modes:
+    - retry: Tasks are published individually; agents block on missing inputs
+      and TaskCoordinatorAgent requeues them
+    - dag: the Task set is published as one Plan for DagSchedulerAgent
+
+    max_in_flight: bound on planned Tasks published and not finished (0: the whole
+    fan-out at once), also capped by the room left in a bounded bus queue. A larger
+    fan-out is held back in dependency order (so the Tasks out can always finish)
+    and released as earlier Tasks finish: the planner then also reacts to
+    ArtifactCreated, and a Task is finished once all its outputs were created.
+    Held-back Tasks are reported to bus hooks (MessageBus.hold), e.g. for eviction.
+    """
     name = "planner_agent"
+    subscribes = ("Start",)
+    checkpoint_fields = ("_limit", "_head", "_tail", "_next_id")
+    checkpoint_tables = ("backlog", "outputs", "left")
+
+    def __init__(
+        self,
+        mode: str = "retry",
+        competitors: int = 0,
+        targets: Optional[Sequence[str]] = None,
+        max_in_flight: int = 0,
+    ) -> None:
+        if mode not in ("retry", "dag"):
+            raise ValueError(f"Unknown planner mode: {mode}")
+        if competitors < 0:
+            raise ValueError(f"Invalid competitor count: {competitors}")
+        unknown = [t for t in targets or () if t not in TARGETS]
+        if unknown:
+            raise ValueError(f"Unknown target artifacts: {unknown}")
+        if max_in_flight < 0:
+            raise ValueError(f"Invalid max_in_flight: {max_in_flight}")
+        self.mode = mode
+        self.competitors = competitors
+        self.targets = tuple(targets or ())
+        if self.targets:
+            # Fail here, not at the first tasks_for(): e.g. no Product B with competitors
+            produced = {name for _, _, produces in self.product_specs("p" if competitors else "") for name in produces}
+            unplannable = [t for t in self.targets if t not in produced]
+            if unplannable:
+                raise ValueError(
+                    f"Target artifacts {unplannable} are not produced with competitors={competitors}"
+                    + (" (written_files needs a targeted page)" if "written_files" in unplannable else "")
+                )
+        self.max_in_flight = max_in_flight
+        if max_in_flight:
+            self.subscribes = ("Start", "ArtifactCreated")
+
+        # Held-back fan-out: position -> Task, released from _head up to _tail
+        self.backlog: Dict[int, Task] = {}
+        self._head = 0
+        self._tail = 0
+        # Released, unfinished Tasks: output key -> task id, task id -> outputs not created yet
+        self.outputs: Dict[str, int] = {}
+        self.left: Dict[int, int] = {}
+        self._next_id = 0
+        self._limit = 0
 
     def handle(self, msg: Message, store, bus) -> List[Message]:
-        # Planner reacts only to Start
+        if msg.type == "ArtifactCreated":
+            if not self.left:
+                return []
+            created = msg  # type: ignore
+            if not isinstance(created, ArtifactCreated):
+                return []
+            return self._on_created(created.key, bus)
+
         if msg.type != "Start":
             return []
 
         start = msg  # type: ignore
-        if not isinstance(start, Start) or start.goal != "build_pages":
+        if not isinstance(start, Start):
             return []
 
         # IMPORTANT:
         # Planner creates tasks dynamically at runtime.
-        tasks: List[Message] = [
-            Task(
-                name="ParseProduct",
-                requires=["raw_product_input"],
-                produces=["product_model"],
-            ),
-            Task(
-                name="GenerateQuestions",
-                requires=["product_model"],
-                produces=["question_bank"],
-            ),
-            Task(
-                name="ComposeFAQ",
-                requires=["product_model", "question_bank"],
-                produces=["faq_content"],
-            ),
-            Task(
-                name="RenderFAQPage",
-                requires=["product_model", "faq_content"],
-                produces=["faq_page_json"],
-            ),
-            Task(
-                name="RenderProductPage",
-                requires=["product_model"],
-                produces=["product_page_json"],
-            ),
-            Task(
-                name="BuildComparison",
-                requires=["product_model"],
-                produces=["product_b_model", "comparison_page_json"],
-            ),
-            Task(
-                name="WriteOutputs",
-                requires=["faq_page_json", "product_page_json", "comparison_page_json"],
-                produces=["written_files"],
-            ),
-        ]
-        import random
+        tasks: List[Message] = []
+        if start.goal == "build_pages":
+            tasks.extend(self.product_tasks(""))
+        elif start.goal == "build_catalog":
+            if not store.has("catalog_index"):
+                return []
+            product_ids = store.require("catalog_index").value
+            for product_id in product_ids:
+                tasks.extend(self.product_tasks(product_id))
+            if self.competitors and any(t.name == "BuildComparison" for t in tasks):
+                tasks.append(self.ranking_task(product_ids))
+        else:
+            return []
+
+        # Order stays randomized in both modes: the DAG scheduler's saved-dispatch
+        # count is measured against the order the retry path would have seen.
         random.shuffle(tasks)
 
+        # Backpressure: a fan-out larger than the bound is released as Tasks finish.
+        # One slot of a bounded queue stays free for Tasks other agents publish.
+        limit = self.max_in_flight
+        room = bus.room()
+        if limit and room is not None:
+            limit = min(limit, max(1, room - 1))
+        if limit and len(tasks) > limit:
+            held = dependency_order(tasks)  # type: ignore
+            for task in held:
+                self.backlog[self._tail] = task
+                self._tail += 1
+            self._limit = limit
+            bus.hold(held)
+            return self._release(bus)
+
+        if self.mode == "dag":
+            return [Plan(tasks)]  # type: ignore
         return tasks
+
+    def _on_created(self, key: str, bus) -> List[Message]:
+        tid = self.outputs.pop(key, None)
+        if tid is None:
+            return []
+        left = self.left[tid] - 1
+        if left:
+            self.left[tid] = left
+            return []
+        del self.left[tid]
+        return self._release(bus)
+
+    def _release(self, bus) -> List[Message]:
+        """Next held-back Tasks, as many as the bound and the queue's room allow."""
+        n = min(self._limit - len(self.left), self._tail - self._head)
+        room = bus.room()
+        if room is not None:
+            # retry: one slot per Task; dag: one slot for the Plan, Tasks follow as it runs
+            n = min(n, room) if self.mode == "retry" else (n if room else 0)
+        tasks: List[Task] = []
+        for _ in range(max(0, n)):
+            task = self.backlog.pop(self._head)
+            self._head += 1
+            if task.produces:
+                tid = self._next_id
+                self._next_id += 1
+                for key in task.produces:
+                    self.outputs[key] = tid
+                self.left[tid] = len(task.produces)
+            tasks.append(task)
+        if not tasks:
+            return []
+        if self.mode == "dag":
+            return [Plan(tasks)]  # type: ignore
+        return tasks  # type: ignore
+
+    def product_specs(self, product_id: str) -> List[Tuple[str, List[str], List[str]]]:
+        """Task blueprint of one product: catalog competitors swapped in, narrowed to `targets`."""
+        specs = TASK_SPECS
+        if self.competitors and product_id:
+            specs = [COMPETITOR_COMPARISON_SPEC if spec[0] == "BuildComparison" else spec for spec in TASK_SPECS]
+        if self.targets:
+            specs = self.demand_specs(specs)
+        return specs
+
+    def product_tasks(self, product_id: str) -> List[Task]:
+        payload = {"product_id": product_id} if product_id else {}
+        specs = self.product_specs(product_id)
+        tasks = [
+            Task(
+                name=name,
+                requires=tuple(ns_key(product_id, k) for k in requires),
+                produces=tuple(ns_key(product_id, k) for k in produces),
+                payload=payload,
+            )
+            for name, requires, produces in specs
+        ]
+        if not self.targets:
+            return tasks
+        targets = set(self.targets)
+        if any(name == "WriteOutputs" for name, _, _ in specs):
+            targets.add("written_files")
+        return tasks_for(tasks, [ns_key(product_id, k) for k in sorted(targets)])
+
+    def demand_specs(self, specs: List[Tuple[str, List[str], List[str]]]) -> List[Tuple[str, List[str], List[str]]]:
+        """Narrows WriteOutputs to the targeted pages; drops it when no page is targeted."""
+        out = []
+        for name, requires, produces in specs:
+            if name == "WriteOutputs":
+                requires = [page for page in requires if page in self.targets]
+                if not requires:
+                    continue
+            out.append((name, requires, produces))
+        return out
+
+    def task_names(self) -> List[str]:
+        """Names of every Task this planner can emit (for a catalog when `competitors`)."""
+        names = [t.name for t in self.product_tasks("p" if self.competitors else "")]
+        if self.competitors and "BuildComparison" in names:
+            names.append("RankCompetitors")
+        return names
+
+    def ranking_task(self, product_ids: List[str]) -> Task:
+        return Task(
+            name="RankCompetitors",
+            requires=tuple(ns_key(pid, "product_model") for pid in product_ids),
+            produces=tuple(ns_key(pid, "competitors") for pid in product_ids),
+            payload={"top_k": self.competitors},
+        )
@@ -6,6 +6,7 @@ from src.messages import Message, Task, NeedArtifact
 
 class QuestionAgent(BaseAgent):
     name = "question_agent"
+    handles = ("GenerateQuestions",)
 
     def handle(self, msg: Message, store, bus) -> List[Message]:
         if msg.type != "Task":
@@ -15,10 +16,11 @@ class QuestionAgent(BaseAgent):
         if not isinstance(task, Task) or task.name != "GenerateQuestions":
             return []
 
-        if not store.has("product_model"):
-            return [NeedArtifact(task.name, "product_model", task)]
+        model_key = self.key(task, "product_model")
+        if not store.has(model_key):
+            return [NeedArtifact(task.name, model_key, task)]
 
-        p = store.require("product_model").value
+        p = store.require(model_key).value
 
         categories: Dict[str, List[str]] = {
             "Informational": [
@@ -60,5 +62,5 @@ class QuestionAgent(BaseAgent):
             "categories": categories,
         }
 
-        bus.put_artifact("question_bank", question_bank, produced_by=self.name)
+        bus.put_artifact(self.key(task, "question_bank"), question_bank, produced_by=self.name)
         return []
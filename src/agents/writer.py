@@ -1,46 +1,286 @@
 from __future__ import annotations
-import json
-import os
-from typing import List
+import asyncio
+from concurrent.futures import Future, wait
+from typing import Dict, List, Optional, Tuple
 
 from src.agents.base import BaseAgent
-from src.messages import Message, Task, NeedArtifact
+from src.messages import ArtifactCreated, Message, Task, NeedArtifact
+from src.serialize import Serializer
+from src.shared import expand_ref
+from src.sinks import FileSink, IOPool, NdjsonSink
+from src.store import ns_key, split_key
+
+# page artifact -> output file name
+PAGE_FILES = [
+    ("faq_page_json", "faq.json"),
+    ("product_page_json", "product_page.json"),
+    ("comparison_page_json", "comparison_page.json"),
+]
+PAGE_NAMES = dict(PAGE_FILES)
+
+# Background I/O: the writer's own Task, requeued until every product handed to the
+# I/O pool is on disk and its `written_files` is published.
+FLUSH_TASK = "FlushOutputs"
 
 class WriterAgent(BaseAgent):
+    """
+    Writes rendered pages.
+
+    Outputs (either or both):
+    - page files: out/<file>.json, or out/<product_id>/<file>.json in catalog mode,
+      written atomically (temp file + fsync + rename) in batches
+    - NDJSON: one line per page {"product_id", "page", "data"} appended to a single file
+
+    Page files are encoded by a Serializer: `json_mode` "pretty" (2-space indent, default)
+    or "compact"; NDJSON lines are always compact.
+
+    Modes:
+    - default: pages are written when WriteOutputs runs (every page it requires exists:
+      all three, or the pages a demand-driven plan targets)
+    - streaming: also reacts to ArtifactCreated and writes each page as soon as it
+      exists; WriteOutputs then writes whatever is left, flushes and publishes
+
+    I/O (`io_workers`):
+    - 0: files are written and flushed inline, on the bus thread (default)
+    - N: pages are encoded on the bus thread, then written by an IOPool of N threads in
+      batches (the pages buffered when WriteOutputs runs, or `batch_size` of them), each
+      fsynced and renamed like a FileSink flush; NDJSON lines go on one extra thread, in
+      order; at most `batch_size` jobs queued;
+      WriteOutputs returns at once and a FlushOutputs Task, requeued while writes are
+      pending, publishes each product's `written_files` once its writes are done.
+      FlushOutputs only waits on the pool when the bus queue is otherwise empty.
+      On the AsyncMessageBus (handle_async) the writer awaits the pool instead of
+      blocking the event loop.
+
+    Checkpoints flush both sinks (and wait for the pool) first; a resumed writer
+    (`resume=True`) reopens the NDJSON file and cuts it back to its size at the checkpoint.
+
+    `written_files` is published only after the product's pages are flushed.
+    Single product runs end with Done (after that); catalog runs end when the queue drains.
+    """
     name = "writer_agent"
+    handles = ("WriteOutputs", FLUSH_TASK)
+    cacheable = False  # writes files
+    checkpoint_tables = ("_written",)
+
+    def __init__(
+        self,
+        out_dir: str = "out",
+        streaming: bool = False,
+        ndjson: Optional[str] = None,
+        page_files: bool = True,
+        batch_size: int = 64,
+        fsync: bool = True,
+        json_mode: str = "pretty",
+        resume: bool = False,
+        io_workers: int = 0,
+    ) -> None:
+        self.out_dir = out_dir
+        self.streaming = streaming
+        if streaming:
+            self.subscribes = ("ArtifactCreated",)
+
+        self.files = FileSink(batch_size, fsync) if page_files else None
+        self.ndjson = NdjsonSink(ndjson, batch_size, fsync, append=resume) if ndjson else None
+        # Pages share product data through Refs, expanded while encoding
+        self.serializer = Serializer(json_mode, default=expand_ref)
+        self.line_serializer = Serializer("compact", default=expand_ref)
+
+        # product_id -> page artifact name -> written path ("" when no page files)
+        self._written: Dict[str, Dict[str, str]] = {}
+
+        self.pool = IOPool(io_workers, batch_size, fsync) if io_workers else None
+        self.stats = self.pool.stats if self.pool is not None else None
+        self._jobs: Dict[str, List[Future]] = {}    # product_id -> pool writes of its pages
+        self._lines: Dict[str, List[bytes]] = {}    # product_id -> NDJSON lines not yet queued
+        self._pages: List[Tuple[str, str, bytes]] = []  # (product_id, path, data) not yet queued
+        # WriteOutputs handed to the pool: (task, written_files value, pending writes)
+        self._inflight: List[Tuple[Task, Dict[str, object], List[Future]]] = []
+        self._flush_queued = False
 
     def handle(self, msg: Message, store, bus) -> List[Message]:
+        if msg.type == "ArtifactCreated":
+            created = msg  # type: ignore
+            if self.streaming and isinstance(created, ArtifactCreated):
+                self._on_created(created.key, store)
+            return []
+
         if msg.type != "Task":
             return []
 
         task = msg  # type: ignore
-        if not isinstance(task, Task) or task.name != "WriteOutputs":
+        if not isinstance(task, Task):
+            return []
+        if task.name == FLUSH_TASK:
+            return self._flush_outputs(bus)
+        if task.name != "WriteOutputs":
             return []
 
-        required = ["faq_page_json", "product_page_json", "comparison_page_json"]
-        for k in required:
+        # The pages the Task requires: all three, or the planner's targets
+        pages = [(page, self.key(task, page)) for page, _ in PAGE_FILES if self.key(task, page) in task.requires]
+        for _, k in pages:
             if not store.has(k):
                 return [NeedArtifact(task.name, k, task)]
 
+        product_id = task.payload.get("product_id", "")
+        written = self._written.setdefault(product_id, {})
+        for page, k in pages:
+            if page not in written:
+                self._write_page(product_id, page, store.require(k).value)
+        self._written.pop(product_id, None)
 
-        faq = store.require("faq_page_json").value
-        prod = store.require("product_page_json").value
-        comp = store.require("comparison_page_json").value
+        result: Dict[str, object] = {"files": [written[page] for page, _ in pages if written[page]]}
+        if self.ndjson is not None:
+            result["records"] = len(pages)
 
-        os.makedirs("out", exist_ok=True)
+        if self.pool is not None:
+            self._queue_pages()
+            jobs = self._jobs.pop(product_id, [])
+            lines = self._lines.pop(product_id, None)
+            if lines:
+                jobs.append(self.pool.call(self._append_lines, lines))
+            self._inflight.append((task, result, jobs))
+            if self._flush_queued:
+                return []
+            self._flush_queued = True
+            return [Task(name=FLUSH_TASK)]
 
-        paths = [
-            ("out/faq.json", faq),
-            ("out/product_page.json", prod),
-            ("out/comparison_page.json", comp),
-        ]
+        self.flush()
+        self._publish(task, result, bus)
+        return []
 
-        written = []
-        for path, payload in paths:
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(payload, f, indent=2, ensure_ascii=False)
-            written.append(path)
+    async def handle_async(self, msg: Message, store, bus) -> List[Message]:
+        if self.pool is not None:
+            if msg.type == "Task" and msg.name == FLUSH_TASK:  # type: ignore
+                await self._await_oldest(bus)
+            else:
+                await self.pool.wait_room(2)  # a page batch and NDJSON lines
+        return self.handle(msg, store, bus)
 
-        bus.put_artifact("written_files", {"files": written}, produced_by=self.name)
-        bus.done("All required JSON pages written to /out")
+    async def _await_oldest(self, bus) -> None:
+        """The wait _flush_outputs would block on, awaited."""
+        inflight = self._inflight
+        if inflight and not bus.queue and not any(all(f.done() for f in jobs) for _, _, jobs in inflight):
+            await asyncio.wait([asyncio.wrap_future(f) for f in inflight[0][2]])
+
+    def _queue_pages(self) -> None:
+        """Hands the buffered page files to the pool as one batch."""
+        if not self._pages:
+            return
+        future = self.pool.write_files([(path, data) for _, path, data in self._pages])  # type: ignore
+        for product_id in {product_id for product_id, _, _ in self._pages}:
+            self._jobs.setdefault(product_id, []).append(future)
+        self._pages = []
+
+    def _publish(self, task: Task, result: Dict[str, object], bus) -> None:
+        bus.put_artifact(self.key(task, "written_files"), result, produced_by=self.name)
+        if not task.payload.get("product_id"):
+            bus.done(f"All required JSON pages written to /{self.out_dir}")
+
+    def _flush_outputs(self, bus) -> List[Message]:
+        """Publishes `written_files` of the products whose pool writes are done."""
+        inflight = self._inflight
+        if inflight and not bus.queue and not any(all(f.done() for f in jobs) for _, _, jobs in inflight):
+            # Nothing else to dispatch: wait for the oldest product instead of spinning
+            wait(inflight[0][2])
+
+        still: List[Tuple[Task, Dict[str, object], List[Future]]] = []
+        for task, result, jobs in inflight:
+            if all(f.done() for f in jobs):
+                for f in jobs:
+                    f.result()  # surface write errors
+                self._publish(task, result, bus)
+            else:
+                still.append((task, result, jobs))
+        self._inflight = still
+
+        if still:
+            return [Task(name=FLUSH_TASK)]
+        self._flush_queued = False
         return []
+
+    def _append_lines(self, lines: List[bytes]) -> None:
+        # Runs on the pool's ordered thread: the NDJSON sink is only touched there
+        for line in lines:
+            self.ndjson.write(line)  # type: ignore
+        self.ndjson.flush()  # type: ignore
+
+    def _on_created(self, key: str, store) -> None:
+        product_id, page = split_key(key)
+        if page not in PAGE_NAMES or page in self._written.get(product_id, ()):
+            return
+        if self._finished(product_id, store):
+            return
+        art = store.get(key)
+        if art is not None:
+            self._write_page(product_id, page, art.value)
+
+    def _finished(self, product_id: str, store) -> bool:
+        """
+        WriteOutputs already ran for the product: a page's ArtifactCreated can still be
+        queued behind it, and writing the page again would duplicate its NDJSON record.
+        """
+        if store.has(ns_key(product_id, "written_files")):
+            return True
+        return any(t.payload.get("product_id", "") == product_id for t, _, _ in self._inflight)
+
+    def _write_page(self, product_id: str, page: str, payload) -> None:
+        path = ""
+        if self.files is not None:
+            out_dir = f"{self.out_dir}/{product_id}" if product_id else self.out_dir
+            path = f"{out_dir}/{PAGE_NAMES[page]}"
+            data = self.serializer.dumps(payload)
+            if self.pool is not None:
+                self._pages.append((product_id, path, data))
+                if len(self._pages) >= self.files.batch_size:
+                    self._queue_pages()
+            else:
+                self.files.write(path, data)
+
+        if self.ndjson is not None:
+            record = {"product_id": product_id or None, "page": page[: -len("_json")], "data": payload}
+            line = self.line_serializer.dumps(record) + b"\n"
+            if self.pool is not None:
+                self._lines.setdefault(product_id, []).append(line)
+            else:
+                self.ndjson.write(line)
+
+        self._written.setdefault(product_id, {})[page] = path
+
+    def checkpoint_state(self) -> Dict[str, object]:
+        # Pages recorded as written must be on disk before the checkpoint says so
+        self.flush()
+        return {
+            "ndjson_size": self.ndjson.size() if self.ndjson is not None else None,
+            # done writes whose written_files the queued FlushOutputs hasn't published yet
+            "unpublished": [(task, result) for task, result, _ in self._inflight],
+            "flush_queued": self._flush_queued,
+        }
+
+    def restore_state(self, state: Dict[str, object]) -> None:
+        if self.ndjson is not None and state["ndjson_size"] is not None:
+            self.ndjson.truncate(state["ndjson_size"])  # type: ignore
+        self._inflight = [(task, result, []) for task, result in state.get("unpublished", [])]  # type: ignore
+        self._flush_queued = bool(state.get("flush_queued", False))
+
+    def flush(self) -> None:
+        if self.pool is not None:
+            # Queue pages written in streaming mode but not yet handed over, then wait
+            self._queue_pages()
+            for product_id, lines in self._lines.items():
+                self._jobs.setdefault(product_id, []).append(self.pool.call(self._append_lines, lines))
+            self._lines.clear()
+            self.pool.drain()
+        if self.files is not None:
+            self.files.flush()
+        if self.ndjson is not None:
+            self.ndjson.flush()
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.flush()
+            self.pool.close()
+        if self.files is not None:
+            self.files.close()
+        if self.ndjson is not None:
+            self.ndjson.close()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+import asyncio
+import time
+from typing import Optional, Set
+
+from src.bus import MessageBus
+from src.messages import Message
+from src.queues import PriorityQueue
+from src.store import ArtifactStore
+
+
+class AsyncMessageBus(MessageBus):
+    """
+    asyncio variant of the MessageBus.
+
+    - Task messages are dispatched as concurrent asyncio tasks, at most
+      `concurrency` in flight. Agents overlap their waits by overriding
+      BaseAgent.handle_async and awaiting their backend there.
+    - Control messages (Start, ArtifactCreated, NeedArtifact, Done) are
+      dispatched inline, in queue order, so coordination stays deterministic.
+    - Ordering between Tasks is not guaranteed; agents already block on
+      missing artifacts and the coordinator requeues them.
+    """
+
+    def __init__(self, store: ArtifactStore, concurrency: int = 8, queue: Optional[PriorityQueue] = None) -> None:
+        super().__init__(store, queue)
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        self.concurrency = concurrency
+
+    async def _dispatch(self, msg: Message) -> None:
+        counts = self.dispatch_counts
+        hooks = self.hooks
+        for agent in self.targets(msg):
+            counts[agent.name] = counts.get(agent.name, 0) + 1
+            if hooks:
+                for h in hooks:
+                    h.before_dispatch(self, msg, agent)
+                started = time.perf_counter()
+                new_msgs = await agent.handle_async(msg, self.store, self)
+                elapsed = time.perf_counter() - started
+                for h in hooks:
+                    h.after_dispatch(self, msg, agent, new_msgs or [], elapsed)
+            else:
+                new_msgs = await agent.handle_async(msg, self.store, self)
+            if new_msgs:
+                self.publish_many(new_msgs)
+
+    async def run_async(self, max_steps: int = 10_000) -> None:
+        """
+        Runs until:
+        - Done is triggered OR queue drains and no Task is in flight.
+        Tasks already in flight when Done arrives are allowed to finish.
+        """
+        in_flight: Set[asyncio.Task] = set()
+        steps = 0
+        try:
+            while (self.queue or in_flight) and not self._done:
+                # Start everything that is allowed to start
+                while self.queue and not self._done:
+                    if self.queue[0].type == "Task" and len(in_flight) >= self.concurrency:
+                        break
+
+                    steps += 1
+                    if steps > max_steps:
+                        raise RuntimeError("Max steps exceeded. Possible infinite loop.")
+
+                    msg = self.queue.popleft()
+                    if msg.type == "Task":
+                        in_flight.add(asyncio.ensure_future(self._dispatch(msg)))
+                    else:
+                        await self._dispatch(msg)
+
+                if in_flight and not self._done:
+                    finished, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                    for t in finished:
+                        t.result()  # surface agent exceptions
+
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        finally:
+            self.steps += steps
+            for h in self.hooks:
+                h.on_run_end(self)
+
+    def run(self, max_steps: int = 10_000) -> None:
+        asyncio.run(self.run_async(max_steps))
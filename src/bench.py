@@ -0,0 +1,221 @@
+from __future__ import annotations
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from src.catalog import CatalogEntry
+from src.logic import ALLOWED_FIELDS, assert_only_allowed_fields
+from src.messages import Start
+from src.metrics import MetricsCollector
+from src.pipeline import STEPS_PER_PRODUCT, build_agents, build_bus, build_store, close_agents, seed_catalog, wire
+
+# -----------------------------
+# Pipeline benchmark:
+# - synthetic catalogs restricted to ALLOWED_FIELDS
+# - end-to-end bus runs at several catalog sizes
+# - JSON results that can be compared between commits
+# -----------------------------
+
+DEFAULT_SIZES = [1, 10, 100, 1000]
+
+_ACTIVES = ["Vitamin C", "Niacinamide", "Retinol", "Salicylic Acid", "Peptides"]
+_INGREDIENTS = _ACTIVES + ["Hyaluronic Acid", "Ceramides", "Squalane", "Glycerin", "Aloe Vera", "Green Tea"]
+_BENEFITS = ["Brightening", "Fades dark spots", "Hydration", "Smoother texture", "Reduces redness", "Firming"]
+_SKIN_TYPES = ["Oily", "Dry", "Combination", "Normal", "Sensitive"]
+
+
+def synthetic_product(i: int, rng: random.Random) -> Dict[str, Any]:
+    active = rng.choice(_ACTIVES)
+    product = {
+        "product_name": f"Synthetic {active} Serum {i}",
+        "concentration": f"{rng.choice([1, 2, 5, 10, 15, 20])}% {active}",
+        "skin_type": rng.sample(_SKIN_TYPES, rng.randint(1, 3)),
+        "key_ingredients": [active] + rng.sample([x for x in _INGREDIENTS if x != active], rng.randint(1, 3)),
+        "benefits": rng.sample(_BENEFITS, rng.randint(1, 3)),
+        "how_to_use": f"Apply {rng.randint(2, 4)} drops {rng.choice(['in the morning', 'at night'])}",
+        "side_effects": rng.choice(["Mild tingling for sensitive skin", "May cause dryness", "None known"]),
+        "price_inr": rng.randint(199, 2499),
+    }
+    assert_only_allowed_fields(product)
+    assert set(product) == ALLOWED_FIELDS
+    return product
+
+
+def synthetic_catalog(n: int, seed: int = 0) -> List[CatalogEntry]:
+    rng = random.Random(seed)
+    return [(f"bench{i:06d}", synthetic_product(i, rng)) for i in range(n)]
+
+
+def run_case(products: List[CatalogEntry], options: Dict[str, Any], seed: int = 0) -> Dict[str, Any]:
+    """
+    One end-to-end catalog run in a temp output directory.
+    `seed` also seeds the planner's Task shuffle (module `random`), so message and
+    NeedArtifact counts are the same on every run of the same code.
+    """
+    random.seed(seed)
+    metrics = MetricsCollector()
+    with tempfile.TemporaryDirectory(prefix="bench-out-") as out_dir:
+        store = build_store(options.get("store", "memory"), options.get("hot_size", 10_000))
+        bus = build_bus(
+            store, options.get("concurrency", 0), options.get("queue", "fifo"),
+            page_order=options.get("page_order", ()),
+        )
+        seed_catalog(store, products, source="bench")
+        agents = build_agents(
+            out_dir,
+            options.get("scheduler", "retry"),
+            writer_options={
+                "fsync": options.get("fsync", False),
+                "json_mode": options.get("json", "pretty"),
+                "io_workers": options.get("io_workers", 0),
+            },
+        )
+        wire(bus, agents)
+        bus.add_hook(metrics)
+
+        started = time.perf_counter()
+        bus.publish(Start(goal="build_catalog"))
+        bus.run(max_steps=STEPS_PER_PRODUCT * max(1, len(products)))
+        close_agents(bus)
+        wall = time.perf_counter() - started
+        store.close()
+
+    agent_stats = bus.agent_stats()
+    coordinator = agent_stats.get("task_coordinator_agent", {})
+    return {
+        "wall_seconds": wall,
+        "products_per_second": len(products) / wall if wall else 0.0,
+        "messages": bus.published,
+        "dispatches": sum(bus.dispatch_counts.values()),
+        "need_artifact": coordinator.get("blocked", 0),
+        "requeued": coordinator.get("requeued", 0),
+        "queue_depth_max": metrics.queue_depth_max,
+        "first_page_seconds": metrics.page_latency()["first_seconds"],
+        "last_page_seconds": metrics.page_latency()["last_seconds"],
+        "stages": {k: round(v, 6) for k, v in sorted(metrics.stage_seconds.items())},
+    }
+
+
+def peak_memory(products: List[CatalogEntry], options: Dict[str, Any], seed: int = 0) -> int:
+    """Peak traced Python allocation (bytes) of a separate run; tracing slows the run, so it isn't timed."""
+    tracemalloc.start()
+    try:
+        run_case(products, options, seed)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(sizes: List[int], options: Dict[str, Any], memory: bool = True, seed: int = 0) -> Dict[str, Any]:
+    results = []
+    for n in sizes:
+        products = synthetic_catalog(n, seed)
+        result: Dict[str, Any] = {"size": n}
+        result.update(run_case(products, options, seed))
+        if memory:
+            result["peak_bytes"] = peak_memory(products, options, seed)
+        results.append(result)
+        print(f"size={n:>7}  wall={result['wall_seconds']:.3f}s  "
+              f"msgs={result['messages']}  need_artifact={result['need_artifact']}", file=sys.stderr)
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": seed,
+            "options": options,
+        },
+        "results": results,
+    }
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], threshold: float = 0.10) -> List[str]:
+    """
+    Regressions of `new` against `old`, per catalog size present in both:
+    wall time or peak memory grown by more than `threshold`, or more messages.
+    """
+    regressions: List[str] = []
+    old_by_size = {r["size"]: r for r in old["results"]}
+    for r in new["results"]:
+        base = old_by_size.get(r["size"])
+        if base is None:
+            continue
+        for metric in ("wall_seconds", "peak_bytes"):
+            if metric in r and base.get(metric):
+                ratio = r[metric] / base[metric]
+                if ratio > 1 + threshold:
+                    regressions.append(f"size={r['size']}: {metric} {base[metric]:.4g} -> {r[metric]:.4g} (x{ratio:.2f})")
+        if r["messages"] > base["messages"] * (1 + threshold):
+            regressions.append(f"size={r['size']}: messages {base['messages']} -> {r['messages']}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark on synthetic catalogs")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated catalog sizes (default: 1,10,100,1000; up to 100000)")
+    parser.add_argument("--output", default="bench_results.json", help="results file (default: bench_results.json)")
+    parser.add_argument("--compare", metavar="OLD_JSON", help="flag regressions against an earlier results file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="regression threshold (default: 0.10)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced peak-memory pass")
+    parser.add_argument("--seed", type=int, default=0, help="seeds the synthetic catalog and the planner's Task order")
+    parser.add_argument("--scheduler", choices=["retry", "dag"], default="retry")
+    parser.add_argument("--store", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--hot-size", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=0)
+    parser.add_argument("--fsync", action="store_true", help="fsync output files (off by default: disk noise)")
+    parser.add_argument("--json", choices=["pretty", "compact"], default="pretty", help="page file encoding")
+    parser.add_argument("--io-workers", type=int, default=0, help="background page write threads (default: 0, inline)")
+    parser.add_argument("--queue", choices=["fifo", "priority", "critical-path"], default="fifo")
+    parser.add_argument("--page-order", default="", help="critical-path queue: e.g. product,faq,comparison")
+    args = parser.parse_args(argv)
+
+    options = {
+        "scheduler": args.scheduler,
+        "store": args.store,
+        "hot_size": args.hot_size,
+        "concurrency": args.concurrency,
+        "fsync": args.fsync,
+        "json": args.json,
+        "io_workers": args.io_workers,
+        "queue": args.queue,
+        "page_order": [p.strip() for p in args.page_order.split(",") if p.strip()],
+    }
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    report = run_benchmark(sizes, options, memory=not args.no_memory, seed=args.seed)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            old = json.load(f)
+        regressions = compare(old, report, args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            return 1
+        print("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
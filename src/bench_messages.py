@@ -0,0 +1,185 @@
+from __future__ import annotations
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from src import messages
+from src.agents.base import BaseAgent
+from src.agents.planner import TASK_SPECS
+from src.bus import MessageBus
+from src.store import ArtifactStore, ns_key
+
+# -----------------------------
+# Message microbenchmark:
+# - construct: build the Tasks and ArtifactCreated messages of N products
+# - dispatch: the same messages pushed through a MessageBus to a no-op agent
+# - memory: traced bytes held by those messages (keys and payloads are shared inputs)
+# Compared against the previous dataclass definitions (copied below).
+# -----------------------------
+
+
+@dataclass(frozen=True)
+class LegacyMessage:
+    type: str
+
+
+@dataclass(frozen=True)
+class LegacyTask(LegacyMessage):
+    name: str
+    requires: List[str] = field(default_factory=list)
+    produces: List[str] = field(default_factory=list)
+    payload: Dict[str, Any] = field(default_factory=dict)
+
+    def __init__(
+        self,
+        name: str,
+        requires: Optional[List[str]] = None,
+        produces: Optional[List[str]] = None,
+        payload: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        object.__setattr__(self, "type", "Task")
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "requires", requires or [])
+        object.__setattr__(self, "produces", produces or [])
+        object.__setattr__(self, "payload", payload or {})
+
+
+@dataclass(frozen=True)
+class LegacyArtifactCreated(LegacyMessage):
+    key: str
+
+    def __init__(self, key: str) -> None:
+        object.__setattr__(self, "type", "ArtifactCreated")
+        object.__setattr__(self, "key", key)
+
+
+class NoopAgent(BaseAgent):
+    """Handles every benchmark message and emits nothing."""
+    name = "noop_agent"
+    subscribes = ("ArtifactCreated",)
+    handles = tuple(name for name, _, _ in TASK_SPECS)
+
+    def handle(self, msg, store, bus) -> List[Any]:
+        return []
+
+
+def message_specs(n_products: int) -> List[Any]:
+    """Per-Task constructor arguments for N products, computed once so that only message cost is timed."""
+    specs: List[Any] = []
+    for i in range(n_products):
+        pid = f"p{i:06d}"
+        payload = {"product_id": pid}
+        for name, requires, produces in TASK_SPECS:
+            specs.append((
+                name,
+                [ns_key(pid, k) for k in requires],
+                [ns_key(pid, k) for k in produces],
+                payload,
+            ))
+    return specs
+
+
+def build_messages(task_cls: Callable, created_cls: Callable, specs: List[Any]) -> List[Any]:
+    """Each Task followed by one ArtifactCreated per produced key."""
+    out: List[Any] = []
+    for name, requires, produces, payload in specs:
+        out.append(task_cls(name=name, requires=requires, produces=produces, payload=payload))
+        for k in produces:
+            out.append(created_cls(k))
+    return out
+
+
+def _best_of(repeat: int, fn: Callable[[], float]) -> float:
+    # Like timeit: the cyclic GC is paused while timing, otherwise collections
+    # triggered by hundreds of thousands of live objects dominate both variants.
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            best = min(best, fn())
+        finally:
+            gc.enable()
+    return best
+
+
+def time_construct(task_cls: Callable, created_cls: Callable, specs: List[Any], repeat: int) -> float:
+    def once() -> float:
+        started = time.perf_counter()
+        build_messages(task_cls, created_cls, specs)
+        return time.perf_counter() - started
+    return _best_of(repeat, once)
+
+
+def time_dispatch(task_cls: Callable, created_cls: Callable, specs: List[Any], repeat: int) -> float:
+    def once() -> float:
+        bus = MessageBus(ArtifactStore())
+        bus.register(NoopAgent())
+        started = time.perf_counter()
+        msgs = build_messages(task_cls, created_cls, specs)
+        bus.publish_many(msgs)
+        bus.run(max_steps=len(msgs) + 1)
+        return time.perf_counter() - started
+    return _best_of(repeat, once)
+
+
+def traced_bytes(task_cls: Callable, created_cls: Callable, specs: List[Any]) -> int:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        msgs = build_messages(task_cls, created_cls, specs)
+        held = tracemalloc.get_traced_memory()[0] - before
+        del msgs
+        return held
+    finally:
+        tracemalloc.stop()
+
+
+def run(n_products: int, repeat: int = 5) -> Dict[str, Any]:
+    variants = {
+        "legacy": (LegacyTask, LegacyArtifactCreated),
+        "current": (messages.Task, messages.ArtifactCreated),
+    }
+    specs = message_specs(n_products)
+    n_messages = len(build_messages(messages.Task, messages.ArtifactCreated, specs))
+    results: Dict[str, Any] = {"products": n_products, "messages": n_messages}
+    for label, (task_cls, created_cls) in variants.items():
+        results[label] = {
+            "construct_seconds": time_construct(task_cls, created_cls, specs, repeat),
+            "dispatch_seconds": time_dispatch(task_cls, created_cls, specs, repeat),
+            "bytes": traced_bytes(task_cls, created_cls, specs),
+        }
+    for metric in ("construct_seconds", "dispatch_seconds", "bytes"):
+        results[f"{metric}_ratio"] = results["current"][metric] / results["legacy"][metric]
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Message construct/dispatch microbenchmark")
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5, help="best of N timings (default: 5)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.products, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    print(f"{results['messages']} messages ({results['products']} products)")
+    for label in ("legacy", "current"):
+        r = results[label]
+        print(f"{label:>8}: construct {r['construct_seconds']:.3f}s  "
+              f"construct+dispatch {r['dispatch_seconds']:.3f}s  {r['bytes'] / 1e6:.1f} MB")
+    print(f"   ratio: construct x{results['construct_seconds_ratio']:.2f}  "
+          f"construct+dispatch x{results['dispatch_seconds_ratio']:.2f}  memory x{results['bytes_ratio']:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,58 @@
 from __future__ import annotations
+import time
 from collections import deque
-from typing import Deque, Dict, List, Type
+from typing import Any, Deque, Dict, List, Optional, Tuple, Type, Union
 
-from src.messages import Message, ArtifactCreated, Done
+from src.messages import Message, ArtifactCreated, Done, Task
+from src.queues import PriorityQueue
 from src.store import Artifact, ArtifactStore
 
+# forward reference to avoid circular import at runtime typing
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from src.checkpoint import Checkpoint
+
+_NO_AGENTS: List["BaseAgent"] = []
+
+
+class BusHook:
+    """
+    Instrumentation surface of the MessageBus. Every method is a no-op;
+    subclasses override what they need. Registered with MessageBus.add_hook().
+    """
+
+    def before_dispatch(self, bus: "MessageBus", msg: Message, agent: "BaseAgent") -> None:
+        pass
+
+    def after_dispatch(
+        self, bus: "MessageBus", msg: Message, agent: "BaseAgent", result: List[Message], seconds: float
+    ) -> None:
+        pass
+
+    def on_publish(self, bus: "MessageBus", msg: Message) -> None:
+        pass
+
+    def on_hold(self, bus: "MessageBus", tasks: List[Task]) -> None:
+        """Tasks planned but held back until the queue drains; each is published later."""
+        pass
+
+    def on_put_artifact(self, bus: "MessageBus", key: str) -> None:
+        pass
+
+    def on_run_end(self, bus: "MessageBus") -> None:
+        pass
+
+    # Checkpoints (src/checkpoint.py): dict/set attributes saved key by key; mutated in
+    # place (a value changed in place needs its key set again), never reassigned.
+    checkpoint_tables: Tuple[str, ...] = ()
+
+    def checkpoint_state(self) -> Optional[Dict[str, Any]]:
+        """State to save in a checkpoint (None: nothing to save); restored by restore_state()."""
+        return None
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        pass
+
 
 class MessageBus:
     """
@@ -14,22 +62,97 @@ class MessageBus:
     - Agents are independent. They never call each other.
     - Orchestrator only routes messages and holds shared store.
     - Flow is dynamic: tasks/messages determine what happens next.
+
+    Routing:
+    - Non-Task messages go to the agents subscribed to their type.
+    - Tasks go through a task name -> agents index (agents declare `handles`),
+      plus any agent that subscribed to every "Task".
+
+    Queue: a FIFO deque by default, or a PriorityQueue (src/queues.py) that runs
+    coordination messages and near-finished Tasks first and, when bounded, makes
+    publish() raise QueueFull instead of growing.
     """
 
-    def __init__(self, store: ArtifactStore) -> None:
+    def __init__(self, store: ArtifactStore, queue: Optional[PriorityQueue] = None) -> None:
         self.store = store
-        self.queue: Deque[Message] = deque()
+        self.queue: Union[Deque[Message], PriorityQueue] = queue if queue is not None else deque()
         self.subscribers: Dict[str, List["BaseAgent"]] = {}
+        self.routes: Dict[str, List["BaseAgent"]] = {}
+        # task name -> routed + broadcast agents (rebuilt lazily after (un)subscribing)
+        self._task_targets: Dict[str, List["BaseAgent"]] = {}
+
+        # agent name -> number of handle() calls
+        self.dispatch_counts: Dict[str, int] = {}
+        self.agents: List["BaseAgent"] = []
+
+        # Instrumentation; with no hooks registered each hook point costs one truthiness check.
+        self.hooks: List[BusHook] = []
 
         # Stop conditions:
         self._done = False
         self._done_reason = ""
 
+        # Run stats (updated by publish() and at the end of run()):
+        self.steps = 0
+        self.published = 0
+
+        # Periodic checkpoints (src/checkpoint.py), taken between messages; sequential bus only.
+        self.checkpoint: Optional["Checkpoint"] = None
+
     def subscribe(self, message_type: str, agent: "BaseAgent") -> None:
         self.subscribers.setdefault(message_type, []).append(agent)
+        self._task_targets.clear()
+
+    def route(self, task_name: str, agent: "BaseAgent") -> None:
+        self.routes.setdefault(task_name, []).append(agent)
+        self._task_targets.clear()
+
+    def register(self, agent: "BaseAgent") -> None:
+        """Subscribes/routes an agent according to its `subscribes` and `handles` declarations."""
+        self.agents.append(agent)
+        for message_type in agent.subscribes:
+            self.subscribe(message_type, agent)
+        for task_name in agent.handles:
+            self.route(task_name, agent)
+
+    def add_hook(self, hook: BusHook) -> None:
+        self.hooks.append(hook)
+
+    def agent_stats(self) -> Dict[str, Dict[str, int]]:
+        """`stats` counters of registered agents that keep them."""
+        return {a.name: dict(a.stats) for a in self.agents if getattr(a, "stats", None) is not None}
+
+    def targets(self, msg: Message) -> List["BaseAgent"]:
+        """Agents a message is dispatched to."""
+        if msg.type != "Task":
+            return self.subscribers.get(msg.type, _NO_AGENTS)
+
+        name = msg.name  # type: ignore
+        targets = self._task_targets.get(name)
+        if targets is None:
+            targets = self.routes.get(name, []) + self.subscribers.get("Task", [])
+            self._task_targets[name] = targets
+        return targets
+
+    def room(self) -> Optional[int]:
+        """Free slots in a bounded queue, for publishers to check before fanning out (None: unbounded)."""
+        if isinstance(self.queue, PriorityQueue):
+            return self.queue.room()
+        return None
 
     def publish(self, msg: Message) -> None:
         self.queue.append(msg)
+        if self.checkpoint is not None:
+            self.checkpoint.published(msg, self.published)
+        self.published += 1
+        if self.hooks:
+            for h in self.hooks:
+                h.on_publish(self, msg)
+
+    def hold(self, tasks: List[Task]) -> None:
+        """Reports Tasks a publisher planned but holds back for backpressure (see PlannerAgent)."""
+        for h in self.hooks:
+            h.on_hold(self, tasks)
 
     def publish_many(self, msgs: List[Message]) -> None:
         for m in msgs:
@@ -40,6 +163,9 @@ class MessageBus:
         Store an artifact AND emit an ArtifactCreated event.
         """
         self.store.put(Artifact(key=key, value=value, meta={"produced_by": produced_by}))
+        if self.hooks:
+            for h in self.hooks:
+                h.on_put_artifact(self, key)
         self.publish(ArtifactCreated(key))
 
     def done(self, reason: str) -> None:
@@ -47,25 +173,56 @@ class MessageBus:
         self._done_reason = reason
         self.publish(Done(reason))
 
+    def _dispatch_hooked(self, msg: Message) -> None:
+        counts = self.dispatch_counts
+        hooks = self.hooks
+        for agent in self.targets(msg):
+            counts[agent.name] = counts.get(agent.name, 0) + 1
+            for h in hooks:
+                h.before_dispatch(self, msg, agent)
+            started = time.perf_counter()
+            new_msgs = agent.handle(msg, self.store, self)
+            elapsed = time.perf_counter() - started
+            for h in hooks:
+                h.after_dispatch(self, msg, agent, new_msgs or [], elapsed)
+            if new_msgs:
+                self.publish_many(new_msgs)
+
     def run(self, max_steps: int = 10_000) -> None:
         """
         Runs until:
         - Done is triggered OR queue drains.
         """
         steps = 0
-        while self.queue and not self._done:
-            steps += 1
-            if steps > max_steps:
-                raise RuntimeError("Max steps exceeded. Possible infinite loop.")
-
-            msg = self.queue.popleft()
-
-            # Dispatch to subscribed agents
-            agents = self.subscribers.get(msg.type, [])
-            for agent in agents:
-                new_msgs = agent.handle(msg, self.store, self)
-                if new_msgs:
-                    self.publish_many(new_msgs)
+        counts = self.dispatch_counts
+        checkpoint = self.checkpoint
+        try:
+            while self.queue and not self._done:
+                steps += 1
+                if steps > max_steps:
+                    raise RuntimeError("Max steps exceeded. Possible infinite loop.")
+                if checkpoint is not None and steps % checkpoint.every == 0:
+                    checkpoint.save(self, self.steps + steps - 1)
+
+                msg = self.queue.popleft()
+                if checkpoint is not None:
+                    checkpoint.popped(msg)
+                if self.hooks:
+                    self._dispatch_hooked(msg)
+                    continue
+
+                # Dispatch to routed/subscribed agents
+                for agent in self.targets(msg):
+                    counts[agent.name] = counts.get(agent.name, 0) + 1
+                    new_msgs = agent.handle(msg, self.store, self)
+                    if new_msgs:
+                        self.publish_many(new_msgs)
+            if checkpoint is not None:
+                checkpoint.save(self, self.steps + steps)
+        finally:
+            self.steps += steps
+            for h in self.hooks:
+                h.on_run_end(self)
 
         # If done not set, we still stop when queue drains.
         # That’s okay, but in our main we'll ensure required outputs exist.
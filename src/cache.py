@@ -0,0 +1,142 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from src.agents.base import BaseAgent
+from src.messages import Message, Task
+from src.shared import expand_ref
+from src.store import ArtifactStore
+
+
+def canonical_json(value: Any) -> bytes:
+    """Stable encoding used for hashing: sorted keys, no whitespace, Refs expanded."""
+    return json.dumps(
+        value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=expand_ref,
+    ).encode("utf-8")
+
+
+class ArtifactCache:
+    """
+    On-disk, content-addressed cache of Task outputs.
+
+    An entry's key is a hash of:
+    - the agent's cache salt (agent name/version, task name, template name/version)
+    - the content of every artifact the Task requires, in `requires` order
+
+    Entries are written atomically (temp file + rename), so several processes
+    can share one cache directory.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def digest(self, salt: str, inputs: List[Any]) -> str:
+        h = hashlib.sha256(salt.encode("utf-8"))
+        for value in inputs:
+            h.update(b"\0")
+            h.update(canonical_json(value))
+        return h.hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.json")
+
+    def get(self, digest: str) -> Optional[List[Any]]:
+        try:
+            with open(self._path(digest), "r", encoding="utf-8") as f:
+                return json.load(f)["outputs"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put(self, digest: str, outputs: List[Any]) -> None:
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"outputs": outputs}, f, ensure_ascii=False, default=expand_ref)
+        os.replace(tmp, path)
+
+
+class CachedAgent(BaseAgent):
+    """
+    Wraps a worker agent with the artifact cache.
+
+    For each routed Task whose inputs all exist:
+    - hit: the cached outputs are emitted as artifacts, the agent is skipped
+    - miss: the agent runs; if it produced every declared output, they are cached
+
+    On the AsyncMessageBus, cache files are read and written on worker threads
+    (asyncio.to_thread), so concurrent Tasks overlap their cache I/O.
+    """
+
+    def __init__(self, agent: BaseAgent, cache: ArtifactCache) -> None:
+        self.agent = agent
+        self.cache = cache
+        self.name = agent.name
+        self.subscribes = agent.subscribes
+        self.handles = agent.handles
+        self.checkpoint_tables = tuple(f"agent.{t}" for t in agent.checkpoint_tables)
+        self.stats: Dict[str, int] = {"cache_hits": 0, "cache_misses": 0}
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        return {"stats": self.stats, "agent": self.agent.checkpoint_state()}
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        self.stats = state["stats"]
+        self.agent.restore_state(state["agent"])
+
+    def _digest(self, msg: Message, store: ArtifactStore) -> Optional[str]:
+        """Cache key of a Task, or None when the message can't be cached."""
+        if msg.type != "Task" or not isinstance(msg, Task) or not msg.produces:
+            return None
+        task = msg
+        if not all(store.has(r) for r in task.requires):
+            return None  # the agent will block with NeedArtifact
+
+        inputs = [store.require(r).value for r in task.requires]
+        return self.cache.digest(self.agent.cache_salt(task), inputs)
+
+    def _emit(self, task: Task, outputs: List[Any], bus) -> None:
+        self.stats["cache_hits"] += 1
+        for key, value in zip(task.produces, outputs):
+            bus.put_artifact(key, value, produced_by=self.name)
+
+    def _outputs(self, task: Task, store: ArtifactStore) -> Optional[List[Any]]:
+        """Outputs to cache after a miss (None: the agent didn't produce all of them)."""
+        self.stats["cache_misses"] += 1
+        if all(store.has(k) for k in task.produces):
+            return [store.require(k).value for k in task.produces]
+        return None
+
+    def handle(self, msg: Message, store, bus) -> List[Message]:
+        digest = self._digest(msg, store)
+        cached = self.cache.get(digest) if digest is not None else None
+        if cached is not None:
+            self._emit(msg, cached, bus)  # type: ignore
+            return []
+
+        out = self.agent.handle(msg, store, bus)
+        if digest is not None:
+            outputs = self._outputs(msg, store)  # type: ignore
+            if outputs is not None:
+                self.cache.put(digest, outputs)
+        return out
+
+    async def handle_async(self, msg: Message, store, bus) -> List[Message]:
+        # Store reads and artifact puts stay on the event loop; only cache file I/O is offloaded
+        digest = self._digest(msg, store)
+        cached = await asyncio.to_thread(self.cache.get, digest) if digest is not None else None
+        if cached is not None:
+            self._emit(msg, cached, bus)  # type: ignore
+            return []
+
+        out = await self.agent.handle_async(msg, store, bus)
+        if digest is not None:
+            outputs = self._outputs(msg, store)  # type: ignore
+            if outputs is not None:
+                await asyncio.to_thread(self.cache.put, digest, outputs)
+        return out
@@ -0,0 +1,179 @@
+from __future__ import annotations
+import csv
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from src.logic import ALLOWED_FIELDS, normalize_product
+from src.store import NAMESPACE_SEP
+
+# A catalog entry: (product_id, raw product dict restricted to ALLOWED_FIELDS)
+CatalogEntry = Tuple[str, Dict[str, Any]]
+
+
+def valid_product_id(product_id: str) -> bool:
+    """
+    Product ids namespace artifact keys and name the product's output directory:
+    non-empty, no namespace or path separator, not "." or "..", so pages can't be
+    written outside the output directory.
+    """
+    if product_id in ("", ".", ".."):
+        return False
+    return not any(sep and sep in product_id for sep in (NAMESPACE_SEP, os.sep, os.altsep, "\0"))
+
+
+def load_catalog(path: str) -> List[CatalogEntry]:
+    """
+    Reads a JSONL product file: one product object per line.
+
+    - `product_id` is optional and is split off the product facts
+      (it namespaces artifacts, it is not a product field).
+    - Lines without an id get their 1-based line number as id.
+    - Blank lines are skipped.
+    """
+    products: List[CatalogEntry] = []
+    seen = set()
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+
+            raw = json.loads(line)
+            if not isinstance(raw, dict):
+                raise ValueError(f"{path}:{line_no}: expected a JSON object per line")
+
+            product_id = str(raw.pop("product_id", line_no))
+            if not valid_product_id(product_id):
+                raise ValueError(f"{path}:{line_no}: invalid product_id {product_id!r}")
+            if product_id in seen:
+                raise ValueError(f"{path}:{line_no}: duplicate product_id {product_id!r}")
+
+            seen.add(product_id)
+            products.append((product_id, raw))
+
+    return products
+
+
+# -----------------------------
+# Streaming ingestion:
+# rows are read lazily (JSONL or CSV), validated and normalized in batches,
+# and bad rows are collected as RowErrors instead of failing the whole catalog.
+# -----------------------------
+
+# CSV cells of list fields hold their items separated by this character.
+CSV_LIST_SEP = ";"
+LIST_FIELDS = ("skin_type", "key_ingredients", "benefits")
+
+
+@dataclass(frozen=True)
+class RowError:
+    line: int                  # 1-based line (JSONL) or record number (CSV, header excluded)
+    product_id: Optional[str]
+    error: str
+
+
+def _iter_jsonl(f) -> Iterator[Tuple[int, Any]]:
+    for line_no, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as e:
+            yield line_no, e
+
+
+def _iter_csv(f) -> Iterator[Tuple[int, Any]]:
+    for row_no, row in enumerate(csv.DictReader(f), start=1):
+        raw: Dict[str, Any] = {k: v for k, v in row.items() if k is not None and v not in (None, "")}
+        for field in LIST_FIELDS:
+            if field in raw:
+                raw[field] = [item.strip() for item in raw[field].split(CSV_LIST_SEP) if item.strip()]
+        yield row_no, raw
+
+
+def validate_row(raw: Any, product_id: str) -> Dict[str, Any]:
+    """The normalized product for one raw row; raises ValueError on anything ParserAgent would reject."""
+    if not isinstance(raw, dict):
+        raise ValueError("expected a JSON object")
+    if not valid_product_id(product_id):
+        raise ValueError(f"invalid product_id {product_id!r}")
+    extra = set(raw) - ALLOWED_FIELDS
+    if extra:
+        raise ValueError(f"Found disallowed fields: {sorted(extra)}")
+    missing = ALLOWED_FIELDS - set(raw)
+    if missing:
+        raise ValueError(f"Missing fields: {sorted(missing)}")
+    for field in LIST_FIELDS:
+        if not isinstance(raw[field], list) or not all(isinstance(v, str) for v in raw[field]):
+            raise ValueError(f"{field} must be a list of strings")
+    try:
+        return normalize_product(raw)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"invalid value: {e}") from None
+
+
+class CatalogStream:
+    """
+    Lazily reads a JSONL or CSV (by `.csv` extension) product file in batches.
+
+    - batches(): yields lists of up to `batch_size` valid CatalogEntries, normalized;
+      at most one batch of rows is held in memory
+    - errors: RowErrors of every rejected row so far (bad JSON, fields, values,
+      duplicate ids); ids follow load_catalog (optional `product_id`, else the line number)
+    - rows: rows read so far (valid + rejected)
+    """
+
+    def __init__(self, path: str, batch_size: int = 256) -> None:
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch size: {batch_size}")
+        self.path = path
+        self.batch_size = batch_size
+        self.errors: List[RowError] = []
+        self.rows = 0
+        self._seen: Set[str] = set()
+
+    def _rows(self) -> Iterator[Tuple[int, Any]]:
+        with open(self.path, "r", encoding="utf-8", newline="") as f:
+            if self.path.lower().endswith(".csv"):
+                yield from _iter_csv(f)
+            else:
+                yield from _iter_jsonl(f)
+
+    def _validate(self, batch: List[Tuple[int, Any]]) -> List[CatalogEntry]:
+        entries: List[CatalogEntry] = []
+        for line_no, raw in batch:
+            if isinstance(raw, Exception):
+                self.errors.append(RowError(line_no, None, f"invalid JSON: {raw}"))
+                continue
+
+            product_id = str(raw.pop("product_id", line_no)) if isinstance(raw, dict) else None
+            try:
+                product = validate_row(raw, product_id or "")
+                if product_id in self._seen:
+                    raise ValueError(f"duplicate product_id {product_id!r}")
+            except (KeyError, ValueError) as e:
+                self.errors.append(RowError(line_no, product_id, str(e)))
+                continue
+
+            self._seen.add(product_id)
+            entries.append((product_id, product))
+        return entries
+
+    def batches(self) -> Iterator[List[CatalogEntry]]:
+        batch: List[Tuple[int, Any]] = []
+        for row in self._rows():
+            self.rows += 1
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                entries = self._validate(batch)
+                batch = []
+                if entries:
+                    yield entries
+        if batch:
+            entries = self._validate(batch)
+            if entries:
+                yield entries
@@ -0,0 +1,327 @@
+from __future__ import annotations
+import os
+import pickle
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from src.messages import Message
+from src.store import Artifact
+
+# forward reference to avoid circular import at runtime typing
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from src.bus import MessageBus
+
+_PICKLE = pickle.HIGHEST_PROTOCOL
+
+
+class TrackedDict(dict):
+    """
+    dict recording the keys set or deleted since take_changes(), for checkpoint deltas.
+    A value changed in place is saved only if its key was touched since the last
+    checkpoint (set, setdefault, ...), e.g. `d.setdefault(k, []).append(x)`.
+    """
+
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self.changed: Set[Any] = set(self)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self.changed.add(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key: Any) -> None:
+        self.changed.add(key)
+        dict.__delitem__(self, key)
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        if key in self:
+            self.changed.add(key)
+        return dict.pop(self, key, *default)
+
+    def popitem(self) -> Tuple[Any, Any]:
+        key, value = dict.popitem(self)
+        self.changed.add(key)
+        return key, value
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        self.changed.add(key)
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        other = dict(*args, **kwargs)
+        self.changed.update(other)
+        dict.update(self, other)
+
+    def clear(self) -> None:
+        self.changed.update(self)
+        dict.clear(self)
+
+    def take_changes(self) -> Set[Any]:
+        changed, self.changed = self.changed, set()
+        return changed
+
+
+class TrackedSet(set):
+    """set recording the members added or removed since take_changes(), for checkpoint deltas."""
+
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self.changed: Set[Any] = set(self)
+
+    def add(self, item: Any) -> None:
+        self.changed.add(item)
+        set.add(self, item)
+
+    def discard(self, item: Any) -> None:
+        if item in self:
+            self.changed.add(item)
+        set.discard(self, item)
+
+    def remove(self, item: Any) -> None:
+        self.changed.add(item)
+        set.remove(self, item)
+
+    def pop(self) -> Any:
+        item = set.pop(self)
+        self.changed.add(item)
+        return item
+
+    def update(self, *others: Any) -> None:
+        for other in others:
+            for item in other:
+                self.add(item)
+
+    def clear(self) -> None:
+        self.changed.update(self)
+        set.clear(self)
+
+    def take_changes(self) -> Set[Any]:
+        changed, self.changed = self.changed, set()
+        return changed
+
+
+Table = Union[TrackedDict, TrackedSet]
+
+
+def _table_owners(bus: "MessageBus") -> Iterator[Tuple[str, Any]]:
+    """(owner name, object) for every agent and hook: agents by name, hooks by class name."""
+    for a in bus.agents:
+        yield f"agent/{a.name}", a
+    for h in bus.hooks:
+        yield f"hook/{type(h).__name__}", h
+
+
+class Checkpoint:
+    """
+    Periodic checkpoints of a sequential MessageBus run in one SQLite file.
+
+    Saved every `every` bus steps, between two messages (a consistent point). Each save
+    writes what changed since the previous one, so its cost follows the work done in
+    between, not the size of the run:
+    - artifacts: the keys put or deleted (ArtifactStore.take_changes)
+    - queue: a journal keyed by publish sequence (`bus.published`): messages published
+      since the last save are inserted, messages dispatched since then deleted
+    - tables: dict/set attributes of agents and hooks named in `checkpoint_tables`
+      (dotted paths reach into wrapped agents), one row per key set or deleted
+    - agent state (BaseAgent.checkpoint_state, matched by agent name), hook state
+      (BusHook.checkpoint_state, matched by class name) and bus counters, which are small
+    - config: the run options, written once, to rebuild the same agents on resume
+
+    Each save is one SQLite transaction: a crash leaves the previous checkpoint intact.
+    `history` lists (rows, bytes) written by each save.
+    """
+
+    def __init__(self, path: str, every: int = 1000, fresh: bool = False) -> None:
+        if every < 1:
+            raise ValueError(f"Invalid checkpoint interval: {every}")
+        self.path = path
+        self.every = every
+        self.saves = 0
+        self.history: List[Tuple[int, int]] = []
+
+        # Queue journal: seqs of the queued messages by message identity (a message can be
+        # queued more than once), messages published since the last save, seqs to delete
+        self._queued: Dict[int, List[int]] = {}
+        self._added: Dict[int, Message] = {}
+        self._removed: List[Tuple[int]] = []
+        self._tables: Dict[Tuple[str, str], Table] = {}
+
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        if fresh:
+            # A new run must not inherit artifacts from an older checkpoint at the same path
+            for stale in (path, f"{path}-wal", f"{path}-shm"):
+                if os.path.exists(stale):
+                    os.remove(stale)
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS artifacts (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS queue (seq INTEGER PRIMARY KEY, value BLOB NOT NULL)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS tables "
+            "(owner TEXT, name TEXT, key TEXT, value BLOB NOT NULL, PRIMARY KEY (owner, name, key))"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS state (name TEXT PRIMARY KEY, value BLOB NOT NULL)")
+
+    def _put_state(self, name: str, value: Any) -> int:
+        blob = pickle.dumps(value, protocol=_PICKLE)
+        self._db.execute("INSERT OR REPLACE INTO state (name, value) VALUES (?, ?)", (name, blob))
+        return len(blob)
+
+    def _get_state(self, name: str) -> Any:
+        row = self._db.execute("SELECT value FROM state WHERE name = ?", (name,)).fetchone()
+        return pickle.loads(row[0]) if row is not None else None
+
+    def write_config(self, config: Dict[str, Any]) -> None:
+        self._put_state("config", config)
+
+    def config(self) -> Dict[str, Any]:
+        config = self._get_state("config")
+        if config is None:
+            raise ValueError(f"{self.path} holds no checkpoint")
+        return config
+
+    def attach(self, bus: "MessageBus") -> None:
+        """
+        Starts tracking a bus: store changes, the queue journal (MessageBus.publish/run
+        report to published()/popped()) and the `checkpoint_tables` of agents and hooks,
+        replaced by tracked copies. Before restore() on resume.
+        """
+        bus.store.track_changes()
+        for owner_name, owner in _table_owners(bus):
+            for path in owner.checkpoint_tables:
+                *parents, attr = path.split(".")
+                obj = owner
+                for p in parents:
+                    obj = getattr(obj, p)
+                value = getattr(obj, attr)
+                table = TrackedSet(value) if isinstance(value, (set, frozenset)) else TrackedDict(value)
+                setattr(obj, attr, table)
+                self._tables[(owner_name, path)] = table
+        bus.checkpoint = self
+
+    def published(self, msg: Message, seq: int) -> None:
+        self._queued.setdefault(id(msg), []).append(seq)
+        self._added[seq] = msg
+
+    def popped(self, msg: Message) -> None:
+        # The queued copies of one message are interchangeable: drop the oldest
+        key = id(msg)
+        seqs = self._queued[key]
+        seq = seqs.pop(0)
+        if not seqs:
+            del self._queued[key]
+        if self._added.pop(seq, None) is None:
+            self._removed.append((seq,))
+
+    def save(self, bus: "MessageBus", steps: int) -> None:
+        store = bus.store
+        size = 0
+        upserts = []
+        deletes = []
+        for key in store.take_changes():
+            art = store.get(key)
+            if art is None:
+                deletes.append((key,))
+            else:
+                blob = pickle.dumps(art, protocol=_PICKLE)
+                size += len(blob)
+                upserts.append((key, blob))
+
+        queued = []
+        for seq, msg in self._added.items():
+            blob = pickle.dumps(msg, protocol=_PICKLE)
+            size += len(blob)
+            queued.append((seq, blob))
+        dequeued, self._added, self._removed = self._removed, {}, []
+
+        rows = []
+        dropped = []
+        for (owner, name), table in self._tables.items():
+            for key in table.take_changes():
+                if key in table:
+                    value = table[key] if isinstance(table, dict) else None
+                    blob = pickle.dumps((key, value), protocol=_PICKLE)
+                    size += len(blob)
+                    rows.append((owner, name, repr(key), blob))
+                else:
+                    dropped.append((owner, name, repr(key)))
+
+        agents = {a.name: a.checkpoint_state() for a in bus.agents}
+        hooks = {}
+        for h in bus.hooks:
+            state = h.checkpoint_state()
+            if state is not None:
+                hooks[type(h).__name__] = state
+        self._db.execute("BEGIN")
+        try:
+            self._db.executemany("DELETE FROM artifacts WHERE key = ?", deletes)
+            self._db.executemany("INSERT OR REPLACE INTO artifacts (key, value) VALUES (?, ?)", upserts)
+            self._db.executemany("DELETE FROM queue WHERE seq = ?", dequeued)
+            self._db.executemany("INSERT INTO queue (seq, value) VALUES (?, ?)", queued)
+            self._db.executemany("DELETE FROM tables WHERE owner = ? AND name = ? AND key = ?", dropped)
+            self._db.executemany("INSERT OR REPLACE INTO tables (owner, name, key, value) VALUES (?, ?, ?, ?)", rows)
+            size += self._put_state("agents", agents)
+            size += self._put_state("hooks", hooks)
+            size += self._put_state("bus", {
+                "steps": steps,
+                "published": bus.published,
+                "dispatch_counts": bus.dispatch_counts,
+                "done": bus._done,
+                "done_reason": bus._done_reason,
+            })
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self.saves += 1
+        self.history.append((
+            len(deletes) + len(upserts) + len(dequeued) + len(queued) + len(dropped) + len(rows) + 3, size,
+        ))
+
+    def restore(self, bus: "MessageBus") -> None:
+        """Loads the last checkpoint into a freshly built, attached bus (same agents, empty store and queue)."""
+        store = bus.store
+        for key, value in self._db.execute("SELECT key, value FROM artifacts"):
+            art: Artifact = pickle.loads(value)
+            store.load(art)  # already in the checkpoint: not a change
+
+        for seq, value in self._db.execute("SELECT seq, value FROM queue ORDER BY seq"):
+            msg = pickle.loads(value)
+            bus.queue.append(msg)
+            self._queued.setdefault(id(msg), []).append(seq)
+
+        # Loaded without recording changes: the rows are in the checkpoint already
+        for owner, name, value in self._db.execute("SELECT owner, name, value FROM tables"):
+            table = self._tables.get((owner, name))
+            if table is None:
+                continue
+            key, item = pickle.loads(value)
+            if isinstance(table, dict):
+                dict.__setitem__(table, key, item)
+            else:
+                set.add(table, key)
+
+        agents = self._get_state("agents") or {}
+        for a in bus.agents:
+            state: Optional[Dict[str, Any]] = agents.get(a.name)
+            if state is not None:
+                a.restore_state(state)
+
+        hooks = self._get_state("hooks") or {}
+        for h in bus.hooks:
+            state = hooks.get(type(h).__name__)
+            if state is not None:
+                h.restore_state(state)
+
+        counters = self._get_state("bus") or {}
+        bus.steps = counters.get("steps", 0)
+        bus.published = counters.get("published", 0)
+        bus.dispatch_counts = counters.get("dispatch_counts", {})
+        bus._done = counters.get("done", False)
+        bus._done_reason = counters.get("done_reason", "")
+
+    def close(self) -> None:
+        self._db.close()
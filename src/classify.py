@@ -0,0 +1,89 @@
+from __future__ import annotations
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# -----------------------------
+# FAQ answer rules:
+# each rule answers from dataset fields only and fires on any of its keywords
+# (lowercase substrings of the question). Rules are listed by priority: when a
+# question matches several, the first listed wins; no match -> the fallback rule.
+# -----------------------------
+
+@dataclass(frozen=True)
+class AnswerRule:
+    name: str
+    keywords: Tuple[str, ...]
+    builder: Callable[[Dict[str, Any]], str]
+
+
+def _informational(p: Dict[str, Any]) -> str:
+    return (
+        f"{p['product_name']} is a Vitamin C serum ({p['concentration']}) "
+        f"with key ingredients {', '.join(p['key_ingredients'])}."
+    )
+
+
+ANSWER_RULES: Tuple[AnswerRule, ...] = (
+    AnswerRule("price", ("price",), lambda p: f"The price is ₹{p['price_inr']}."),
+    AnswerRule("side_effects", ("side effect", "tingling"), lambda p: f"Possible side effect: {p['side_effects']}."),
+    AnswerRule("usage", ("when", "apply", "drops"), lambda p: p["how_to_use"]),
+    AnswerRule("skin_type", ("skin",), lambda p: f"Suitable for: {', '.join(p['skin_type'])} skin types."),
+)
+
+FALLBACK_RULE = AnswerRule("informational", (), _informational)
+
+
+class QuestionClassifier:
+    """
+    Every rule keyword compiled once into a single regex alternation.
+
+    - classify(q): the AnswerRule for one question
+    - classify_all(qs): rules for a whole question bank, found by one scan over
+      the lowercased, newline-joined bank (keywords never contain a newline)
+
+    Matches are found with a zero-width lookahead at every position, so a
+    lower-priority keyword earlier in the question cannot hide a later,
+    higher-priority one.
+    """
+
+    def __init__(self, rules: Sequence[AnswerRule] = ANSWER_RULES, fallback: AnswerRule = FALLBACK_RULE) -> None:
+        self.rules = tuple(rules)
+        self.fallback = fallback
+        # keyword -> priority of the first rule listing it
+        self._priority: Dict[str, int] = {}
+        for i, rule in enumerate(self.rules):
+            for kw in rule.keywords:
+                self._priority.setdefault(kw.lower(), i)
+        alternation = "|".join(re.escape(kw) for kw in sorted(self._priority, key=len, reverse=True))
+        self._pattern: Optional[re.Pattern[str]] = (
+            re.compile(f"(?=({alternation}))") if alternation else None
+        )
+
+    def classify(self, question: str) -> AnswerRule:
+        return self.classify_all([question])[0]
+
+    def classify_all(self, questions: Sequence[str]) -> List[AnswerRule]:
+        n = len(questions)
+        best = [len(self.rules)] * n
+        if self._pattern is not None and n:
+            # lowercased per question: lower() may change a string's length
+            lowered = [q.lower() for q in questions]
+            text = "\n".join(lowered)
+            # start offset of each question in `text`
+            starts: List[int] = []
+            offset = 0
+            for q in lowered:
+                starts.append(offset)
+                offset += len(q) + 1
+            priority = self._priority
+            for m in self._pattern.finditer(text):
+                i = bisect_right(starts, m.start()) - 1
+                rank = priority[m.group(1)]
+                if rank < best[i]:
+                    best[i] = rank
+        return [self.rules[r] if r < len(self.rules) else self.fallback for r in best]
+
+
+CLASSIFIER = QuestionClassifier()
@@ -0,0 +1,188 @@
+from __future__ import annotations
+import heapq
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+try:  # optional, vectorized engine
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None  # type: ignore
+
+# -----------------------------
+# Catalog-wide comparison:
+# ingredients and benefits are encoded over a shared vocabulary, then every
+# product is scored against every other one at once.
+# - similarity = Jaccard(ingredients) + Jaccard(benefits), in [0, 2]
+# - competitors are ranked by similarity (desc), |price delta| (asc), catalog order
+# Both engines compute the same floats, so the ranking doesn't change with
+# whether numpy is installed.
+# -----------------------------
+
+ENGINES = ("auto", "numpy", "bitset")
+
+# Rows scored per numpy block: bounds the N-wide temporaries to BLOCK_ROWS x N.
+BLOCK_ROWS = 256
+
+# Largest catalog the pure-Python bitset engine scores (about 20 s at this size; the
+# cost grows with N^2). Larger catalogs need numpy.
+BITSET_MAX_PRODUCTS = 5000
+
+
+@dataclass(frozen=True)
+class Competitor:
+    index: int                 # position of the competitor in the compared sequence
+    similarity: float
+    shared_ingredients: int
+    shared_benefits: int
+    price_delta: int           # competitor price - product price
+
+
+class Vocabulary:
+    """Term -> bit position, assigned in first-seen order."""
+
+    def __init__(self) -> None:
+        self.index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def encode(self, terms: Sequence[str]) -> int:
+        mask = 0
+        for term in terms:
+            bit = self.index.setdefault(term, len(self.index))
+            mask |= 1 << bit
+        return mask
+
+
+def _jaccard(shared: int, a: int, b: int) -> float:
+    union = a + b - shared
+    return shared / union if union else 0.0
+
+
+class ComparisonMatrix:
+    """
+    Products encoded once for N x N comparison.
+
+    - engine: "numpy" (blocked boolean matrix products), "bitset" (int masks + popcount,
+      pure Python, O(N^2) loop: at most BITSET_MAX_PRODUCTS products) or "auto" (numpy
+      when installed, else bitset)
+    - top_k(k): the k most comparable competitors of every product, never itself
+
+    Raises ValueError when the bitset engine would have to score a larger catalog
+    (numpy not installed, or requested explicitly), instead of running for hours.
+    """
+
+    def __init__(self, products: Sequence[Dict[str, Any]], engine: str = "auto") -> None:
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown comparison engine: {engine}")
+        if engine == "numpy" and np is None:
+            raise ValueError("Comparison engine 'numpy' requested but numpy is not installed")
+        if engine == "auto":
+            engine = "numpy" if np is not None else "bitset"
+        if engine == "bitset" and len(products) > BITSET_MAX_PRODUCTS:
+            raise ValueError(
+                f"Comparing {len(products)} products needs numpy (pip install numpy): the pure-Python "
+                f"bitset engine is limited to {BITSET_MAX_PRODUCTS} products"
+            )
+        self.engine = engine
+
+        self.ingredients = Vocabulary()
+        self.benefits = Vocabulary()
+        self.ingredient_masks = [self.ingredients.encode(p["key_ingredients"]) for p in products]
+        self.benefit_masks = [self.benefits.encode(p["benefits"]) for p in products]
+        self.ingredient_counts = [m.bit_count() for m in self.ingredient_masks]
+        self.benefit_counts = [m.bit_count() for m in self.benefit_masks]
+        self.prices = [int(p["price_inr"]) for p in products]
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def top_k(self, k: int) -> List[List[Competitor]]:
+        if k <= 0 or len(self) < 2:
+            return [[] for _ in range(len(self))]
+        if self.engine == "numpy":
+            return self._top_k_numpy(k)
+        return self._top_k_bitset(k)
+
+    def _top_k_bitset(self, k: int) -> List[List[Competitor]]:
+        ing, ben = self.ingredient_masks, self.benefit_masks
+        ing_n, ben_n = self.ingredient_counts, self.benefit_counts
+        prices = self.prices
+        n = len(prices)
+
+        out: List[List[Competitor]] = []
+        for i in range(n):
+            ranked: List[Tuple[float, int, int, int, int]] = []
+            for j in range(n):
+                if j == i:
+                    continue
+                si = (ing[i] & ing[j]).bit_count()
+                sb = (ben[i] & ben[j]).bit_count()
+                sim = _jaccard(si, ing_n[i], ing_n[j]) + _jaccard(sb, ben_n[i], ben_n[j])
+                ranked.append((-sim, abs(prices[j] - prices[i]), j, si, sb))
+            out.append([
+                Competitor(j, -neg_sim, si, sb, prices[j] - prices[i])
+                for neg_sim, _, j, si, sb in heapq.nsmallest(k, ranked)
+            ])
+        return out
+
+    def _top_k_numpy(self, k: int) -> List[List[Competitor]]:
+        n = len(self)
+        ing = self._matrix(self.ingredient_masks, len(self.ingredients))
+        ben = self._matrix(self.benefit_masks, len(self.benefits))
+        ing_n = np.asarray(self.ingredient_counts, dtype=np.float64)
+        ben_n = np.asarray(self.benefit_counts, dtype=np.float64)
+        prices = np.asarray(self.prices, dtype=np.int64)
+        k = min(k, n - 1)
+
+        out: List[List[Competitor]] = []
+        for start in range(0, n, BLOCK_ROWS):
+            stop = min(start + BLOCK_ROWS, n)
+            rows = np.arange(start, stop)
+
+            # shared term counts for the block against the whole catalog (exact in float32)
+            si = (ing[start:stop] @ ing.T).astype(np.float64)
+            sb = (ben[start:stop] @ ben.T).astype(np.float64)
+            sim = self._jaccard(si, ing_n[start:stop], ing_n) + self._jaccard(sb, ben_n[start:stop], ben_n)
+            sim[rows - start, rows] = -np.inf
+            delta = prices[None, :] - prices[start:stop, None]
+            # tie-break within equal similarity: |price delta|, then catalog order
+            tie = np.abs(delta) * n + np.arange(n)[None, :]
+
+            # Everything above the k-th best similarity is in; the rest of the k
+            # are the best tie-breaks among products exactly at it.
+            kth = -np.partition(-sim, k - 1, axis=1)[:, k - 1]
+            above = sim > kth[:, None]
+            pick_key = np.where(above, -1, np.where(sim == kth[:, None], tie, np.iinfo(np.int64).max))
+            picked = np.argpartition(pick_key, k - 1, axis=1)[:, :k]
+
+            ranked = np.take_along_axis(picked, np.lexsort((
+                np.take_along_axis(tie, picked, axis=1),
+                -np.take_along_axis(sim, picked, axis=1),
+            )), axis=1)
+            for r in range(stop - start):
+                out.append([
+                    Competitor(int(j), float(sim[r, j]), int(si[r, j]), int(sb[r, j]), int(delta[r, j]))
+                    for j in ranked[r]
+                ])
+        return out
+
+    @staticmethod
+    def _matrix(masks: List[int], width: int):
+        m = np.zeros((len(masks), max(1, width)), dtype=np.float32)
+        for i, mask in enumerate(masks):
+            while mask:
+                low = mask & -mask
+                m[i, low.bit_length() - 1] = 1.0
+                mask ^= low
+        return m
+
+    @staticmethod
+    def _jaccard(shared, a, b):
+        union = a[:, None] + b[None, :] - shared
+        return np.divide(shared, union, out=np.zeros_like(shared), where=union > 0)
+
+
+def top_k_competitors(products: Sequence[Dict[str, Any]], k: int, engine: str = "auto") -> List[List[Competitor]]:
+    """The k most comparable other products for each product (see ComparisonMatrix)."""
+    return ComparisonMatrix(products, engine).top_k(k)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Set
+
+from src.agents.coordinator import TaskId
+from src.bus import BusHook, MessageBus
+from src.messages import Message, Task
+from src.store import split_key
+
+# Artifacts no Task consumes that the pipeline reads after the run (collect_written, main).
+FINAL_ARTIFACTS = ("written_files",)
+
+
+class ArtifactEvictor(BusHook):
+    """
+    Reference-counted eviction of intermediate artifacts.
+
+    - every planned Task (published on its own or inside a Plan, or held back by the
+      planner's backpressure) adds one reference to each key it `requires`; a requeued
+      or released Task is counted once
+    - a Task has run when its handle() didn't answer NeedArtifact: its references are
+      dropped and a key is deleted from the store when its last consumer has run
+    - outputs no planned Task consumes are deleted as soon as they are produced
+    - pinned artifacts are never deleted: `pins` lists artifact names ("product_model",
+      matching every product namespace) or full keys ("p1/product_model")
+
+    Seeded artifacts without consumers (e.g. `catalog_index`) are left alone.
+    """
+    checkpoint_tables = ("refs", "planned")
+
+    def __init__(self, pins: Iterable[str] = FINAL_ARTIFACTS) -> None:
+        self.pins = frozenset(pins)
+        self.refs: Dict[str, int] = {}       # artifact key -> consumers that haven't run
+        self.planned: Set[TaskId] = set()    # planned Tasks that haven't run
+        self.stats: Dict[str, int] = {"planned": 0, "evicted": 0, "peak_artifacts": 0}
+
+    def pinned(self, key: str) -> bool:
+        return key in self.pins or split_key(key)[1] in self.pins
+
+    def _plan(self, task: Task) -> None:
+        tid = (task.name, task.requires, task.produces)
+        if tid in self.planned:
+            return
+        self.planned.add(tid)
+        self.stats["planned"] += 1
+        refs = self.refs
+        for key in task.requires:
+            refs[key] = refs.get(key, 0) + 1
+
+    def _evict(self, bus: MessageBus, key: str) -> None:
+        if not self.pinned(key) and bus.store.has(key):
+            bus.store.delete(key)
+            self.stats["evicted"] += 1
+
+    # -- hook points --
+
+    def on_publish(self, bus: MessageBus, msg: Message) -> None:
+        if msg.type == "Task":
+            self._plan(msg)  # type: ignore
+        elif msg.type == "Plan":
+            for t in msg.tasks:  # type: ignore
+                self._plan(t)
+
+    def on_hold(self, bus: MessageBus, tasks: List[Task]) -> None:
+        for t in tasks:
+            self._plan(t)
+
+    def on_put_artifact(self, bus: MessageBus, key: str) -> None:
+        resident = len(bus.store.backend)
+        if resident > self.stats["peak_artifacts"]:
+            self.stats["peak_artifacts"] = resident
+
+    def after_dispatch(self, bus: MessageBus, msg: Message, agent, result: List[Message], seconds: float) -> None:
+        if msg.type != "Task" or any(m.type == "NeedArtifact" for m in result):
+            return
+        task: Task = msg  # type: ignore
+        tid = (task.name, task.requires, task.produces)
+        if tid not in self.planned:
+            return
+        self.planned.discard(tid)
+
+        refs = self.refs
+        for key in task.requires:
+            left = refs.get(key, 0) - 1
+            if left > 0:
+                refs[key] = left
+                continue
+            refs.pop(key, None)
+            self._evict(bus, key)
+        for key in task.produces:
+            if key not in refs:
+                self._evict(bus, key)
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        return {"stats": self.stats}
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        self.stats = state["stats"]
@@ -0,0 +1,213 @@
+from __future__ import annotations
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Set
+
+from src.messages import Task
+
+# Dependency-graph helpers over Task.requires / Task.produces.
+
+
+def producers_of(tasks: List[Task]) -> Dict[str, int]:
+    """artifact key -> index of the task producing it. Two producers for one key is an error."""
+    producers: Dict[str, int] = {}
+    for i, t in enumerate(tasks):
+        for key in t.produces:
+            if key in producers:
+                other = tasks[producers[key]].name
+                raise ValueError(f"Artifact '{key}' is produced by both '{other}' and '{t.name}'")
+            producers[key] = i
+    return producers
+
+
+def validate_plan(tasks: List[Task], available: Callable[[str], bool]) -> Dict[str, int]:
+    """
+    Checks a Task set before anything runs:
+    - every required artifact is either `available` already or produced by a task in the set
+    - the requires -> produces graph has no cycle
+
+    Returns the producer index (see producers_of).
+    """
+    producers = producers_of(tasks)
+
+    indegree = [0] * len(tasks)
+    dependents: Dict[int, List[int]] = {}
+    for i, t in enumerate(tasks):
+        for req in t.requires:
+            p = producers.get(req)
+            if p is None:
+                if not available(req):
+                    raise ValueError(f"Task '{t.name}' requires '{req}' but no task produces it")
+                continue
+            indegree[i] += 1
+            dependents.setdefault(p, []).append(i)
+
+    # Kahn's algorithm: anything never reaching indegree 0 sits on a cycle
+    ready = deque(i for i, d in enumerate(indegree) if d == 0)
+    visited = 0
+    while ready:
+        i = ready.popleft()
+        visited += 1
+        for j in dependents.get(i, ()):
+            indegree[j] -= 1
+            if indegree[j] == 0:
+                ready.append(j)
+
+    if visited != len(tasks):
+        cyclic = sorted({tasks[i].name for i, d in enumerate(indegree) if d > 0})
+        raise ValueError(f"Dependency cycle between tasks: {cyclic}")
+
+    return producers
+
+
+def retry_path_blocks(tasks: List[Task], available: Set[str]) -> int:
+    """
+    Simulates the NeedArtifact/requeue path (TaskCoordinatorAgent) for Tasks published in
+    this order and returns how many times a Task is dispatched before its inputs exist.
+    Each of those costs one wasted Task dispatch plus one NeedArtifact dispatch.
+    """
+    have = set(available)
+    queue = deque(tasks)
+    waiting: Dict[str, List[Task]] = {}
+    blocks = 0
+
+    def first_missing(t: Task):
+        return next((r for r in t.requires if r not in have), None)
+
+    while queue:
+        t = queue.popleft()
+        missing = first_missing(t)
+        if missing is not None:
+            blocks += 1
+            waiting.setdefault(missing, []).append(t)
+            continue
+
+        for key in t.produces:
+            have.add(key)
+            for w in waiting.pop(key, []):
+                nxt = first_missing(w)
+                if nxt is None:
+                    queue.append(w)
+                else:
+                    waiting.setdefault(nxt, []).append(w)
+
+    return blocks
+
+
+
+def dependents_of(tasks: List[Task]) -> Dict[int, List[int]]:
+    """task index -> indexes of the tasks requiring one of its outputs."""
+    producers = producers_of(tasks)
+    dependents: Dict[int, List[int]] = {}
+    for i, t in enumerate(tasks):
+        for req in t.requires:
+            p = producers.get(req)
+            if p is not None:
+                dependents.setdefault(p, []).append(i)
+    return dependents
+
+
+def remaining_path_lengths(tasks: List[Task]) -> List[int]:
+    """
+    Critical-path lengths: for each task, the number of tasks on the longest
+    requires -> produces chain from it to the end of the plan (itself included).
+    The plan must be acyclic (see validate_plan).
+    """
+    dependents = dependents_of(tasks)
+    indegree = [0] * len(tasks)
+    for deps in dependents.values():
+        for j in deps:
+            indegree[j] += 1
+
+    # Topological order, then lengths from the sinks back
+    order: List[int] = []
+    ready = deque(i for i, d in enumerate(indegree) if d == 0)
+    while ready:
+        i = ready.popleft()
+        order.append(i)
+        for j in dependents.get(i, ()):
+            indegree[j] -= 1
+            if indegree[j] == 0:
+                ready.append(j)
+
+    lengths = [1] * len(tasks)
+    for i in reversed(order):
+        for j in dependents.get(i, ()):
+            lengths[i] = max(lengths[i], 1 + lengths[j])
+    return lengths
+
+
+def dependency_order(tasks: List[Task]) -> List[Task]:
+    """
+    Tasks reordered so that each one follows the producers of its requires, placed
+    depth-first: a task's missing producers go right before it, otherwise plan order
+    is kept. Any prefix of the result can run to completion on its own.
+    """
+    producers = producers_of(tasks)
+    placed = [False] * len(tasks)
+    visiting = [False] * len(tasks)
+    order: List[Task] = []
+    for start in range(len(tasks)):
+        stack = [(start, False)]
+        while stack:
+            i, expanded = stack.pop()
+            if placed[i]:
+                continue
+            if expanded:
+                visiting[i] = False
+                placed[i] = True
+                order.append(tasks[i])
+                continue
+            if visiting[i]:
+                raise ValueError(f"Dependency cycle through task '{tasks[i].name}'")
+            visiting[i] = True
+            stack.append((i, True))
+            for req in reversed(tasks[i].requires):
+                p = producers.get(req)
+                if p is not None and not placed[p]:
+                    stack.append((p, False))
+    return order
+
+
+def downstream_outputs(tasks: List[Task]) -> List[Set[str]]:
+    """For each task, every artifact produced by it or by a task depending on it, transitively."""
+    dependents = dependents_of(tasks)
+    outputs: List[Set[str]] = []
+    for i in range(len(tasks)):
+        seen = {i}
+        stack = [i]
+        produced: Set[str] = set()
+        while stack:
+            j = stack.pop()
+            produced.update(tasks[j].produces)
+            for d in dependents.get(j, ()):
+                if d not in seen:
+                    seen.add(d)
+                    stack.append(d)
+        outputs.append(produced)
+    return outputs
+
+
+def tasks_for(tasks: List[Task], targets: Iterable[str]) -> List[Task]:
+    """
+    Minimal sub-plan producing `targets`: walks from each target to the task producing it,
+    then to the producers of that task's requires, and so on. Required keys without a
+    producer are external inputs (seeded artifacts). Plan order is kept.
+    """
+    producers = producers_of(tasks)
+    needed: Set[int] = set()
+    stack = []
+    for key in targets:
+        p = producers.get(key)
+        if p is None:
+            raise ValueError(f"No task produces target '{key}'")
+        stack.append(p)
+    while stack:
+        i = stack.pop()
+        if i in needed:
+            continue
+        needed.add(i)
+        for req in tasks[i].requires:
+            p = producers.get(req)
+            if p is not None and p not in needed:
+                stack.append(p)
+    return [t for i, t in enumerate(tasks) if i in needed]
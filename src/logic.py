@@ -17,6 +17,19 @@ def assert_only_allowed_fields(raw: Dict[str, Any]) -> None:
     if extra:
         raise ValueError(f"Found disallowed fields: {sorted(extra)}")
 
+def normalize_product(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Product model with consistent types (raises ValueError/KeyError/TypeError on bad input)."""
+    return {
+        "product_name": str(raw["product_name"]),
+        "concentration": str(raw["concentration"]),
+        "skin_type": list(raw["skin_type"]),
+        "key_ingredients": list(raw["key_ingredients"]),
+        "benefits": list(raw["benefits"]),
+        "how_to_use": str(raw["how_to_use"]),
+        "side_effects": str(raw["side_effects"]),
+        "price_inr": int(raw["price_inr"]),
+    }
+
 def format_price_inr(price: int) -> str:
     return f"₹{int(price)}"
 
@@ -1,68 +1,380 @@
 from __future__ import annotations
+import argparse
 import json
+from typing import Any, Dict, List, Optional
 
-from src.bus import MessageBus
+from src.catalog import CatalogStream, load_catalog
+from src.evict import FINAL_ARTIFACTS, ArtifactEvictor
+from src.metrics import PageLatency
 from src.data import PRODUCT_INPUT
 from src.messages import Start
+from src.bus import MessageBus
+from src.pipeline import (
+    PAGE_KINDS, add_metrics, build_agents, build_bus, close_agents, resume_catalog, run_catalog, run_catalog_stream, wire,
+)
+from src.sharded import run_sharded
 from src.store import Artifact, ArtifactStore
 
-from src.agents.planner import PlannerAgent
-from src.agents.parser import ParserAgent
-from src.agents.questions import QuestionAgent
-from src.agents.faq import FAQAgent
-from src.agents.pages import PagesAgent
-from src.agents.writer import WriterAgent
-from src.agents.coordinator import TaskCoordinatorAgent
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Agentic content generation pipeline")
+    parser.add_argument(
+        "--catalog",
+        help="JSONL product file; renders pages for every product in a single bus run",
+    )
+    parser.add_argument("--out", default="out", help="output directory (default: out)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="catalog mode: shard the catalog across N worker processes (default: 1, in-process)",
+    )
+    parser.add_argument(
+        "--stream-input",
+        action="store_true",
+        help="catalog mode: read the catalog (JSONL or .csv) lazily in batches, "
+             "collecting bad rows instead of failing",
+    )
+    parser.add_argument(
+        "--ingest-batch",
+        type=int,
+        default=256,
+        help="--stream-input: rows validated per batch (default: 256)",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=1024,
+        help="--stream-input: products pending in the store before reading pauses (default: 1024)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=0,
+        help="run on the asyncio bus with up to N Tasks in flight (default: 0, sequential bus); "
+        "only agents overriding handle_async overlap (cache I/O with --cache), the others run in turn",
+    )
+    parser.add_argument(
+        "--queue",
+        choices=["fifo", "priority", "critical-path"],
+        default="fifo",
+        help="bus queue: fifo (default), priority (coordination and near-finished Tasks first) "
+             "or critical-path (longest remaining Task chain first, pages in --page-order)",
+    )
+    parser.add_argument(
+        "--page-order",
+        default="",
+        metavar="PAGES",
+        help="critical-path queue: comma-separated pages to finish first for every product, "
+             "e.g. product,faq,comparison",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=0,
+        help="priority queue: bound on queued messages; the planner holds back Tasks that don't fit "
+        "and releases them as earlier ones finish (default: 0, unbounded)",
+    )
+    parser.add_argument(
+        "--scheduler",
+        choices=["retry", "dag"],
+        default="retry",
+        help="retry: NeedArtifact + coordinator requeue (default); dag: dependency-graph scheduler",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="DIR",
+        help="persistent artifact cache; Tasks with unchanged inputs reuse cached outputs",
+    )
+    parser.add_argument(
+        "--store",
+        choices=["memory", "sqlite"],
+        default="memory",
+        help="catalog mode: artifact store backend (sqlite keeps a bounded hot set in memory)",
+    )
+    parser.add_argument(
+        "--hot-size",
+        type=int,
+        default=10_000,
+        help="sqlite store: artifacts kept in memory (default: 10000)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="write each page as soon as its artifact is created",
+    )
+    parser.add_argument("--ndjson", metavar="PATH", help="also write every page as one line of an NDJSON file")
+    parser.add_argument(
+        "--no-page-files",
+        action="store_true",
+        help="skip per-page JSON files (use with --ndjson)",
+    )
+    parser.add_argument(
+        "--write-batch",
+        type=int,
+        default=64,
+        help="writes buffered per fsync/rename batch (default: 64)",
+    )
+    parser.add_argument(
+        "--io-workers",
+        type=int,
+        default=0,
+        help="write pages on N background threads while the bus keeps dispatching (default: 0, inline)",
+    )
+    parser.add_argument(
+        "--json",
+        choices=["pretty", "compact"],
+        default="pretty",
+        help="page file encoding: 2-space indented or compact (default: pretty)",
+    )
+    parser.add_argument(
+        "--faq-questions",
+        choices=["selected", "all"],
+        default="selected",
+        help="FAQ page: 5 selected questions (default) or every question in the bank",
+    )
+    parser.add_argument(
+        "--competitors",
+        type=int,
+        default=0,
+        metavar="K",
+        help="catalog mode: compare each product with its K most similar catalog products "
+             "(default: 0, a fictional competitor)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        metavar="PATH",
+        help="catalog mode: checkpoint store, queue and agent state to a SQLite file while running",
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=1000,
+        help="bus steps between checkpoints (default: 1000)",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="PATH",
+        help="continue the catalog run saved in a checkpoint file (its options are reused)",
+    )
+    parser.add_argument(
+        "--targets",
+        default="",
+        metavar="PAGES",
+        help="comma-separated page artifacts to rebuild, e.g. product_page_json; only the Tasks "
+             "they need are planned (default: every page)",
+    )
+    parser.add_argument(
+        "--evict",
+        action="store_true",
+        help="drop each intermediate artifact from the store once every Task requiring it has run",
+    )
+    parser.add_argument(
+        "--pin",
+        default="",
+        metavar="NAMES",
+        help="--evict: comma-separated artifact names or keys to keep, e.g. product_model,faq_content",
+    )
+    parser.add_argument(
+        "--footprint",
+        action="store_true",
+        help="print the memory held by the store per artifact type at the end of the run",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="export bus metrics at the end of the run (Prometheus text for .prom/.txt, JSON otherwise)",
+    )
+    args = parser.parse_args(argv)
+    if args.queue_size and args.queue == "fifo":
+        parser.error("--queue-size needs a priority or critical-path queue")
+    args.page_order = [p.strip() for p in args.page_order.split(",") if p.strip()]
+    if args.page_order and args.queue != "critical-path":
+        parser.error("--page-order needs --queue critical-path")
+    args.targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = [t for t in args.targets if t not in PAGE_KINDS.values()]
+    if unknown:
+        parser.error(f"--targets takes page artifacts ({', '.join(PAGE_KINDS.values())}), not {unknown}")
+    args.pin = [p.strip() for p in args.pin.split(",") if p.strip()]
+    if args.pin and not args.evict:
+        parser.error("--pin needs --evict")
+    if args.checkpoint and (not args.catalog or args.stream_input or args.workers > 1 or args.concurrency):
+        parser.error("--checkpoint needs --catalog on the sequential in-process bus")
+    if args.footprint and args.workers > 1:
+        parser.error("--footprint needs the in-process bus (no --workers)")
+    if args.stream_input and (args.workers > 1 or args.competitors):
+        parser.error("--stream-input supports neither --workers nor --competitors")
+    if args.competitors and args.workers > 1:
+        parser.error("--competitors ranks the whole catalog in one process (no --workers)")
+    return args
+
+
+def writer_options(args: argparse.Namespace) -> Dict[str, Any]:
+    return {
+        "streaming": args.stream,
+        "ndjson": args.ndjson,
+        "page_files": not args.no_page_files,
+        "batch_size": args.write_batch,
+        "json_mode": args.json,
+        "io_workers": args.io_workers,
+    }
+
+
+def print_page_latency(bus: MessageBus) -> None:
+    """Time to first / last page, when PageLatency (or a MetricsCollector) watched the run."""
+    for hook in bus.hooks:
+        if isinstance(hook, PageLatency) and hook.pages_created:
+            pages = hook.page_latency()
+            print(f"Pages: {pages['created']}, first after {pages['first_seconds']:.3f}s, "
+                  f"last after {pages['last_seconds']:.3f}s")
+
+
+def print_eviction(bus: MessageBus) -> None:
+    """Eviction counters, when an ArtifactEvictor watched the run."""
+    for hook in bus.hooks:
+        if isinstance(hook, ArtifactEvictor):
+            print("Eviction:", hook.stats)
 
 
-def main() -> None:
+def print_footprint(store: ArtifactStore) -> None:
+    """Per artifact type: count and bytes, shared data counted once (ArtifactStore.footprint)."""
+    report = store.footprint()
+    print(f"Footprint: {sum(r['bytes'] for r in report.values())} bytes")
+    spilled = sum(r["spilled"] for r in report.values())
+    if spilled:
+        print(f"Spilled to disk: {spilled} artifacts, {sum(r['spilled_bytes'] for r in report.values())} bytes")
+    for name, r in sorted(report.items(), key=lambda item: -item[1]["bytes"]):
+        line = f"  {name}: {r['artifacts']} artifacts, {r['bytes']} bytes"
+        if r["spilled"]:
+            line += f" (+{r['spilled']} spilled, {r['spilled_bytes']} bytes on disk)"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+
+    if args.resume:
+        bus = resume_catalog(args.resume, args.checkpoint_every)
+        written = bus.store.require("written_files").value
+        print("✅ Agentic catalog run resumed and complete.")
+        print(f"Products: {written['products']}, files written: {len(written['files'])}, "
+              f"NDJSON records: {written['records']}, messages: {bus.published}")
+        print("Dispatches:", bus.dispatch_counts)
+        print_eviction(bus)
+        print_page_latency(bus)
+        if args.footprint:
+            print_footprint(bus.store)
+        bus.store.close()
+        return
+
+    if args.catalog and args.stream_input:
+        # Streamed catalog mode: bounded memory, bad rows reported instead of raised
+        stream = CatalogStream(args.catalog, args.ingest_batch)
+        bus = run_catalog_stream(
+            stream, out_dir=args.out, max_in_flight=args.max_in_flight,
+            concurrency=args.concurrency, queue=args.queue, queue_size=args.queue_size, page_order=args.page_order,
+            scheduler=args.scheduler, cache_dir=args.cache,
+            store_backend=args.store, hot_size=args.hot_size, writer_options=writer_options(args),
+            metrics=args.metrics, faq_questions=args.faq_questions, evict=args.evict, pins=args.pin,
+            targets=args.targets,
+        )
+        written = bus.store.require("written_files").value
+        print("✅ Agentic streamed catalog run complete.")
+        print(f"Rows: {stream.rows}, products: {written['products']}, rejected: {len(stream.errors)}, "
+              f"files written: {len(written['files'])}, NDJSON records: {written['records']}, "
+              f"messages: {bus.published}")
+        for err in stream.errors[:10]:
+            print(f"  line {err.line} ({err.product_id}): {err.error}")
+        print("Store:", bus.store.stats())
+        print_eviction(bus)
+        print_page_latency(bus)
+        if args.footprint:
+            print_footprint(bus.store)
+        bus.store.close()
+        return
+
+    if args.catalog:
+        # Catalog mode: every product is seeded under its own namespace
+        products = load_catalog(args.catalog)
+        if args.workers > 1:
+            result = run_sharded(
+                products, args.workers, out_dir=args.out, source=args.catalog,
+                concurrency=args.concurrency, queue=args.queue, queue_size=args.queue_size, page_order=args.page_order,
+                scheduler=args.scheduler, cache_dir=args.cache,
+                store_backend=args.store, hot_size=args.hot_size, writer_options=writer_options(args),
+                metrics=args.metrics, faq_questions=args.faq_questions,
+                evict=args.evict, pins=args.pin, targets=args.targets,
+            )
+            print(f"✅ Agentic catalog run complete ({len(result['shards'])} shards on {args.workers} workers).")
+            print(f"Products: {result['products']}, files written: {len(result['files'])}, "
+                  f"NDJSON records: {result['records']}, "
+                  f"messages: {result['published']}, wall: {result['seconds']:.2f}s")
+            print("Dispatches:", result["dispatch_counts"])
+            if result["agent_stats"]:
+                print("Agent stats:", result["agent_stats"])
+            print("Store:", result["store_stats"])
+            return
+
+        bus = run_catalog(
+            products, out_dir=args.out, source=args.catalog,
+            concurrency=args.concurrency, queue=args.queue, queue_size=args.queue_size, page_order=args.page_order,
+            scheduler=args.scheduler, cache_dir=args.cache,
+            store_backend=args.store, hot_size=args.hot_size, writer_options=writer_options(args),
+            metrics=args.metrics, faq_questions=args.faq_questions, competitors=args.competitors,
+            checkpoint=args.checkpoint, checkpoint_every=args.checkpoint_every,
+            evict=args.evict, pins=args.pin, targets=args.targets,
+        )
+        written = bus.store.require("written_files").value
+        print("✅ Agentic catalog run complete.")
+        print(f"Products: {written['products']}, files written: {len(written['files'])}, "
+              f"NDJSON records: {written['records']}, messages: {bus.published}")
+        print("Dispatches:", bus.dispatch_counts)
+        if bus.agent_stats():
+            print("Agent stats:", bus.agent_stats())
+        print("Store:", bus.store.stats())
+        print_eviction(bus)
+        print_page_latency(bus)
+        if args.footprint:
+            print_footprint(bus.store)
+        bus.store.close()
+        return
+
     # 1) Create orchestrator-owned store and bus
     store = ArtifactStore()
-    bus = MessageBus(store)
+    bus = build_bus(store, args.concurrency, args.queue, args.queue_size, args.page_order)
 
     # 2) Seed the only input as an artifact (no hidden globals)
     store.put(Artifact(key="raw_product_input", value=PRODUCT_INPUT, meta={"source": "src/data.py"}))
 
     # 3) Create agents (independent) and subscribe them to message types
-    agents = [
-        PlannerAgent(),
-        ParserAgent(),
-        QuestionAgent(),
-        FAQAgent(),
-        PagesAgent(),
-        WriterAgent(),
-        TaskCoordinatorAgent(),
-    ]
-
-    # Subscriptions:
-    # - Planner reacts to Start
-    # - Worker agents react to Task
-    for a in agents:
-        if a.name == "planner_agent":
-            bus.subscribe("Start", a)
-        elif a.name == "task_coordinator_agent":
-            bus.subscribe("NeedArtifact", a)
-            bus.subscribe("ArtifactCreated", a)
-        else:
-            bus.subscribe("Task", a)
-
+    wire(bus, build_agents(
+        args.out, args.scheduler, args.cache, writer_options(args), args.faq_questions, targets=args.targets,
+        queue_size=args.queue_size,
+    ))
+    add_metrics(bus, args.metrics, args.queue)
+    if args.evict:
+        bus.add_hook(ArtifactEvictor(FINAL_ARTIFACTS + tuple(args.pin)))
 
     # 4) Publish Start event (we do NOT call agents directly)
     bus.publish(Start(goal="build_pages"))
 
     # 5) Run event loop
     bus.run()
+    close_agents(bus)
 
     # 6) Print proof of agentic execution
     print("✅ Agentic run complete.")
     if store.has("written_files"):
         print("Outputs:", store.require("written_files").value)
+        print_eviction(bus)
+        print_page_latency(bus)
+        if args.footprint:
+            print_footprint(store)
     else:
-        print("⚠️ No written_files artifact found. Store keys:", store.keys())
+        print("⚠️ No written_files artifact found. Store keys:", sorted(store.keys()))
 
     # Optional: print what artifacts exist (good debugging)
-    # print("Artifacts:", json.dumps(store.keys(), indent=2))
+    # print("Artifacts:", json.dumps(sorted(store.keys()), indent=2))
 
 
 if __name__ == "__main__":
@@ -1,34 +1,66 @@
 from __future__ import annotations
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Literal, Optional
+from dataclasses import FrozenInstanceError
+from typing import Any, Dict, Iterable, Literal, Optional, Tuple
 
 # -----------------------------
 # Core idea:
 # - Orchestrator routes "messages"
 # - Agents subscribe to message types
 # - Agents emit new messages (dynamic coordination)
+#
+# Messages are compact and immutable:
+# - __slots__, no per-instance __dict__
+# - `type` is a class attribute (one interned string per class, not per message)
+# - requires/produces/tasks are tuples
+# - fields are set through their slot descriptors, bypassing the frozen __setattr__
 # -----------------------------
 
-MessageType = Literal["Start", "Task", "ArtifactCreated", "NeedArtifact", "Done"]
+MessageType = Literal["Start", "Task", "Plan", "ArtifactCreated", "NeedArtifact", "Done"]
 
 
-@dataclass(frozen=True)
 class Message:
     """Base message type. Concrete messages below."""
+    __slots__ = ()
     type: MessageType
+    _fields: Tuple[str, ...] = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, f) for f in self._fields)
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._values() == other._values()  # type: ignore
+
+    def __hash__(self) -> int:
+        return hash((self.__class__, self._values()))
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{f}={getattr(self, f)!r}" for f in self._fields)
+        return f"{self.__class__.__name__}({fields})"
+
+    def __reduce__(self):
+        # Constructor arguments are the fields, in order
+        return (self.__class__, self._values())
 
 
-@dataclass(frozen=True)
 class Start(Message):
     """Kick-off message. PlannerAgent reacts to this and creates tasks dynamically."""
-    goal: str = "build_pages"
+    __slots__ = ("goal",)
+    type = "Start"
+    _fields = ("goal",)
+    goal: str
 
     def __init__(self, goal: str = "build_pages") -> None:
-        object.__setattr__(self, "type", "Start")
-        object.__setattr__(self, "goal", goal)
+        _set_start_goal(self, goal)
 
 
-@dataclass(frozen=True)
 class Task(Message):
     """
     A task message represents 'work to be done' at runtime.
@@ -38,58 +70,91 @@ class Task(Message):
     - PlannerAgent creates tasks dynamically and pushes them into the queue.
     - Worker agents pick tasks they know how to execute.
     """
+    __slots__ = ("name", "requires", "produces", "payload")
+    type = "Task"
+    _fields = ("name", "requires", "produces", "payload")
     name: str
-    requires: List[str] = field(default_factory=list)   # artifact keys required
-    produces: List[str] = field(default_factory=list)   # artifact keys produced
-    payload: Dict[str, Any] = field(default_factory=dict)
+    requires: Tuple[str, ...]   # artifact keys required
+    produces: Tuple[str, ...]   # artifact keys produced
+    payload: Dict[str, Any]
 
     def __init__(
         self,
         name: str,
-        requires: Optional[List[str]] = None,
-        produces: Optional[List[str]] = None,
+        requires: Optional[Iterable[str]] = None,
+        produces: Optional[Iterable[str]] = None,
         payload: Optional[Dict[str, Any]] = None,
     ) -> None:
-        object.__setattr__(self, "type", "Task")
-        object.__setattr__(self, "name", name)
-        object.__setattr__(self, "requires", requires or [])
-        object.__setattr__(self, "produces", produces or [])
-        object.__setattr__(self, "payload", payload or {})
+        _set_task_name(self, name)
+        _set_task_requires(self, tuple(requires) if requires else ())
+        _set_task_produces(self, tuple(produces) if produces else ())
+        _set_task_payload(self, payload if payload is not None else {})
+
+
+class Plan(Message):
+    """
+    A whole set of Tasks emitted at once (DAG scheduling mode).
+    The scheduler validates the dependency graph and releases each Task
+    exactly once, when all of its required artifacts exist.
+    """
+    __slots__ = ("tasks",)
+    type = "Plan"
+    _fields = ("tasks",)
+    tasks: Tuple[Task, ...]
+
+    def __init__(self, tasks: Optional[Iterable[Task]] = None) -> None:
+        _set_plan_tasks(self, tuple(tasks) if tasks else ())
 
 
-@dataclass(frozen=True)
 class ArtifactCreated(Message):
     """Emitted whenever an artifact is stored. Enables reactive agent behavior."""
+    __slots__ = ("key",)
+    type = "ArtifactCreated"
+    _fields = ("key",)
     key: str
 
     def __init__(self, key: str) -> None:
-        object.__setattr__(self, "type", "ArtifactCreated")
-        object.__setattr__(self, "key", key)
+        _set_created_key(self, key)
 
 
-@dataclass(frozen=True)
 class NeedArtifact(Message):
     """
     Emitted when an agent cannot proceed because a required artifact is missing.
     Includes the original Task so it can be retried later.
     """
+    __slots__ = ("task_name", "missing_key", "blocked_task")
+    type = "NeedArtifact"
+    _fields = ("task_name", "missing_key", "blocked_task")
     task_name: str
     missing_key: str
-    blocked_task: "Task"  # <-- add this
-
-    def __init__(self, task_name: str, missing_key: str, blocked_task: "Task") -> None:
-        object.__setattr__(self, "type", "NeedArtifact")
-        object.__setattr__(self, "task_name", task_name)
-        object.__setattr__(self, "missing_key", missing_key)
-        object.__setattr__(self, "blocked_task", blocked_task)
+    blocked_task: Task
 
+    def __init__(self, task_name: str, missing_key: str, blocked_task: Task) -> None:
+        _set_need_task_name(self, task_name)
+        _set_need_missing_key(self, missing_key)
+        _set_need_blocked_task(self, blocked_task)
 
 
-@dataclass(frozen=True)
 class Done(Message):
     """Completion signal."""
-    reason: str = "All required outputs produced"
+    __slots__ = ("reason",)
+    type = "Done"
+    _fields = ("reason",)
+    reason: str
 
     def __init__(self, reason: str = "All required outputs produced") -> None:
-        object.__setattr__(self, "type", "Done")
-        object.__setattr__(self, "reason", reason)
+        _set_done_reason(self, reason)
+
+
+# Slot setters (the frozen __setattr__ is only bypassed here, at construction)
+_set_start_goal = Start.__dict__["goal"].__set__
+_set_task_name = Task.__dict__["name"].__set__
+_set_task_requires = Task.__dict__["requires"].__set__
+_set_task_produces = Task.__dict__["produces"].__set__
+_set_task_payload = Task.__dict__["payload"].__set__
+_set_plan_tasks = Plan.__dict__["tasks"].__set__
+_set_created_key = ArtifactCreated.__dict__["key"].__set__
+_set_need_task_name = NeedArtifact.__dict__["task_name"].__set__
+_set_need_missing_key = NeedArtifact.__dict__["missing_key"].__set__
+_set_need_blocked_task = NeedArtifact.__dict__["blocked_task"].__set__
+_set_done_reason = Done.__dict__["reason"].__set__
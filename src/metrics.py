@@ -0,0 +1,218 @@
+from __future__ import annotations
+import json
+import os
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.agents.writer import PAGE_NAMES
+from src.bus import BusHook, MessageBus
+from src.messages import Message
+from src.store import split_key
+
+# Upper bounds (seconds) of the handle() latency histogram buckets; the last bucket is +Inf.
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0,
+)
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (Prometheus style: counts per upper bound, plus sum and count)."""
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "buckets": {str(b): c for b, c in zip(self.bounds + (float("inf"),), self.counts)},
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class PageLatency(BusHook):
+    """
+    Seconds from the first publish until the first and the last page artifact was
+    created, overall and per page. Registered on its own for `--queue critical-path`
+    runs, whose point is an early first page; MetricsCollector includes it.
+    """
+
+    def __init__(self) -> None:
+        self.started: Optional[float] = None           # perf_counter() at the first publish
+        self.pages_created = 0
+        self.page_first: Dict[str, float] = {}          # page artifact name -> seconds to the first one
+        self.page_last: Dict[str, float] = {}           # page artifact name -> seconds to the last one
+
+    def on_publish(self, bus: MessageBus, msg: Message) -> None:
+        if self.started is None:
+            self.started = time.perf_counter()
+
+    def on_put_artifact(self, bus: MessageBus, key: str) -> None:
+        page = split_key(key)[1]
+        if page in PAGE_NAMES:
+            seconds = time.perf_counter() - (self.started or 0.0)
+            self.pages_created += 1
+            self.page_first.setdefault(page, seconds)
+            self.page_last[page] = seconds
+
+    def page_latency(self) -> Dict[str, Any]:
+        """Time to first / last page (None before any page exists), overall and per page."""
+        return {
+            "created": self.pages_created,
+            "first_seconds": min(self.page_first.values(), default=None),
+            "last_seconds": max(self.page_last.values(), default=None),
+            "by_page": {
+                page: {"first_seconds": self.page_first[page], "last_seconds": self.page_last[page]}
+                for page in sorted(self.page_first)
+            },
+        }
+
+
+class MetricsCollector(PageLatency):
+    """
+    Default metrics hook:
+    - per-agent handle() latency histograms
+    - time spent per stage (Task name, or message type for control messages)
+    - message counts by type
+    - queue depth, sampled every `sample_every` publishes, and its maximum
+    - agent counters (e.g. TaskCoordinatorAgent blocked/requeued) at the end of the run
+    - page latency: seconds from the first publish until the first and the last page
+      artifact was created, overall and per page
+    - artifacts stored per type at the end of the run (ArtifactStore name index)
+
+    With `path` set, the collector exports at the end of bus.run():
+    Prometheus text for *.prom / *.txt, JSON otherwise (or as given by `fmt`).
+    """
+
+    def __init__(self, path: Optional[str] = None, fmt: Optional[str] = None, sample_every: int = 100) -> None:
+        super().__init__()
+        self.path = path
+        if fmt is None and path is not None:
+            fmt = "prometheus" if path.endswith((".prom", ".txt")) else "json"
+        if fmt not in (None, "json", "prometheus"):
+            raise ValueError(f"Unknown metrics format: {fmt}")
+        self.fmt = fmt
+        self.sample_every = max(1, sample_every)
+
+        self.latency: Dict[str, Histogram] = {}
+        self.stage_seconds: Dict[str, float] = {}
+        self.messages: Dict[str, int] = {}
+        self.artifacts_created = 0
+        self.queue_depth: List[Tuple[int, int]] = []  # (messages published so far, queue length)
+        self.queue_depth_max = 0
+        self.agents: Dict[str, Dict[str, int]] = {}
+        self.artifacts_stored: Dict[str, int] = {}    # artifact name -> products holding one
+
+    # -- hook points --
+
+    def after_dispatch(self, bus: MessageBus, msg: Message, agent, result: List[Message], seconds: float) -> None:
+        hist = self.latency.get(agent.name)
+        if hist is None:
+            hist = self.latency[agent.name] = Histogram()
+        hist.observe(seconds)
+
+        stage = msg.name if msg.type == "Task" else msg.type  # type: ignore
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+
+    def on_publish(self, bus: MessageBus, msg: Message) -> None:
+        super().on_publish(bus, msg)
+        self.messages[msg.type] = self.messages.get(msg.type, 0) + 1
+        depth = len(bus.queue)
+        if depth > self.queue_depth_max:
+            self.queue_depth_max = depth
+        if bus.published % self.sample_every == 0:
+            self.queue_depth.append((bus.published, depth))
+
+    def on_put_artifact(self, bus: MessageBus, key: str) -> None:
+        self.artifacts_created += 1
+        super().on_put_artifact(bus, key)
+
+    def on_run_end(self, bus: MessageBus) -> None:
+        self.agents = bus.agent_stats()
+        store = bus.store
+        self.artifacts_stored = {name: store.count(name) for name in sorted(store.artifact_names())}
+        if self.path:
+            self.export(self.path, self.fmt or "json")
+
+    # -- export --
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "handle_latency_seconds": {name: h.to_dict() for name, h in sorted(self.latency.items())},
+            "stage_seconds": dict(sorted(self.stage_seconds.items())),
+            "messages": dict(sorted(self.messages.items())),
+            "artifacts_created": self.artifacts_created,
+            "artifacts_stored": self.artifacts_stored,
+            "queue_depth": {"max": self.queue_depth_max, "samples": self.queue_depth},
+            "pages": self.page_latency(),
+            "agents": self.agents,
+        }
+
+    def to_prometheus(self) -> str:
+        lines: List[str] = [
+            "# HELP bus_handle_seconds Agent handle() latency.",
+            "# TYPE bus_handle_seconds histogram",
+        ]
+        for name, h in sorted(self.latency.items()):
+            cumulative = 0
+            for bound, c in zip(h.bounds + (float("inf"),), h.counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'bus_handle_seconds_bucket{{agent="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'bus_handle_seconds_sum{{agent="{name}"}} {h.sum}')
+            lines.append(f'bus_handle_seconds_count{{agent="{name}"}} {h.count}')
+
+        lines += ["# HELP bus_stage_seconds Time spent handling each stage.", "# TYPE bus_stage_seconds counter"]
+        for stage, seconds in sorted(self.stage_seconds.items()):
+            lines.append(f'bus_stage_seconds{{stage="{stage}"}} {seconds}')
+
+        lines += ["# HELP bus_messages_total Messages published by type.", "# TYPE bus_messages_total counter"]
+        for msg_type, n in sorted(self.messages.items()):
+            lines.append(f'bus_messages_total{{type="{msg_type}"}} {n}')
+
+        lines += [
+            "# HELP bus_artifacts_created_total Artifacts stored through the bus.",
+            "# TYPE bus_artifacts_created_total counter",
+            f"bus_artifacts_created_total {self.artifacts_created}",
+            "# HELP bus_artifacts_stored Artifacts in the store per type at the end of the run.",
+            "# TYPE bus_artifacts_stored gauge",
+        ]
+        for name, n in self.artifacts_stored.items():
+            lines.append(f'bus_artifacts_stored{{name="{name}"}} {n}')
+        lines += [
+            "# HELP bus_queue_depth_max Largest queue length seen.",
+            "# TYPE bus_queue_depth_max gauge",
+            f"bus_queue_depth_max {self.queue_depth_max}",
+            "# HELP bus_page_seconds Seconds from the first publish to the first/last page created.",
+            "# TYPE bus_page_seconds gauge",
+        ]
+        for page in sorted(self.page_first):
+            lines.append(f'bus_page_seconds{{page="{page}",edge="first"}} {self.page_first[page]}')
+            lines.append(f'bus_page_seconds{{page="{page}",edge="last"}} {self.page_last[page]}')
+        lines += [
+            "# HELP bus_agent_stat Agent counters at the end of the run.",
+            "# TYPE bus_agent_stat gauge",
+        ]
+        for agent, stats in sorted(self.agents.items()):
+            for stat, n in sorted(stats.items()):
+                lines.append(f'bus_agent_stat{{agent="{agent}",stat="{stat}"}} {n}')
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str, fmt: str = "json") -> None:
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            if fmt == "prometheus":
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), f, indent=2)
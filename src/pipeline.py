@@ -0,0 +1,388 @@
+from __future__ import annotations
+import importlib
+import os
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.agents.base import BaseAgent
+from src.async_bus import AsyncMessageBus
+from src.bus import MessageBus
+from src.cache import ArtifactCache, CachedAgent
+from src.checkpoint import Checkpoint
+from src.evict import FINAL_ARTIFACTS, ArtifactEvictor
+from src.catalog import CatalogEntry, CatalogStream
+from src.metrics import MetricsCollector, PageLatency
+from src.messages import Start
+from src.queues import PriorityQueue, critical_path_priorities, page_groups
+from src.store import Artifact, ArtifactStore, MemoryBackend, SqliteBackend, ns_key
+
+from src.agents.planner import PlannerAgent, TASK_SPECS
+from src.agents.writer import WriterAgent
+from src.agents.coordinator import TaskCoordinatorAgent
+from src.agents.scheduler import DagSchedulerAgent
+
+# Upper bound on bus steps per product in catalog runs (a single product needs < 50).
+STEPS_PER_PRODUCT = 100
+
+# Page short names (as in NDJSON records) -> page artifact names
+PAGE_KINDS = {"faq": "faq_page_json", "product": "product_page_json", "comparison": "comparison_page_json"}
+
+# Worker agents: (Task names handled, module, class). A worker is imported only when the
+# plan has one of its Tasks, so a demand-driven run skips e.g. numpy (competitors).
+WORKER_AGENTS: List[Tuple[Tuple[str, ...], str, str]] = [
+    (("ParseProduct",), "src.agents.parser", "ParserAgent"),
+    (("GenerateQuestions",), "src.agents.questions", "QuestionAgent"),
+    (("ComposeFAQ",), "src.agents.faq", "FAQAgent"),
+    (("RenderFAQPage", "RenderProductPage", "BuildComparison"), "src.agents.pages", "PagesAgent"),
+    (("RankCompetitors",), "src.agents.competitors", "CompetitorAgent"),
+]
+
+# Every per-product artifact name; streamed runs drop a product's artifacts once it is written.
+PRODUCT_ARTIFACTS = sorted({name for _, requires, produces in TASK_SPECS for name in requires + produces})
+
+
+def build_store(backend: str = "memory", hot_size: int = 10_000) -> ArtifactStore:
+    """
+    backend:
+    - memory: every artifact stays in memory
+    - sqlite: at most `hot_size` artifacts in memory, the rest spilled to a temp SQLite file
+    """
+    if backend == "sqlite":
+        return ArtifactStore(SqliteBackend(hot_size=hot_size))
+    if backend == "memory":
+        return ArtifactStore(MemoryBackend())
+    raise ValueError(f"Unknown store backend: {backend}")
+
+
+def build_queue(
+    queue: str = "fifo",
+    queue_size: int = 0,
+    page_order: Sequence[str] = (),
+    has: Optional[Callable[[str], bool]] = None,
+) -> Optional[PriorityQueue]:
+    """
+    queue:
+    - fifo: unbounded deque, messages run in publish order (default)
+    - priority: DEFAULT_PRIORITIES classes, bounded to `queue_size` messages when > 0;
+      Tasks of the products planned first, and Tasks whose inputs exist (`has`), first
+    - critical-path: as priority, plus classes from the product Task graph
+      (critical_path_priorities); with `page_order` (short names: product, faq,
+      comparison), Tasks leading to earlier pages first, for every product (page_groups)
+    """
+    if queue == "priority":
+        return PriorityQueue(maxsize=queue_size or None, has=has)
+    if queue == "critical-path":
+        unknown = [p for p in page_order if p not in PAGE_KINDS]
+        if unknown:
+            raise ValueError(f"Unknown pages in page order: {unknown}")
+        plan = PlannerAgent().product_tasks("")
+        groups = page_groups(plan, [PAGE_KINDS[p] for p in page_order]) if page_order else None
+        return PriorityQueue(critical_path_priorities(plan), maxsize=queue_size or None, has=has, groups=groups)
+    if queue == "fifo":
+        if queue_size:
+            raise ValueError("A queue size needs the priority queue")
+        return None
+    raise ValueError(f"Unknown queue: {queue}")
+
+
+def build_bus(
+    store: ArtifactStore,
+    concurrency: int = 0,
+    queue: str = "fifo",
+    queue_size: int = 0,
+    page_order: Sequence[str] = (),
+) -> MessageBus:
+    """Sequential MessageBus by default; AsyncMessageBus when a Task concurrency limit is given."""
+    q = build_queue(queue, queue_size, page_order, has=store.has)
+    if concurrency > 0:
+        return AsyncMessageBus(store, concurrency=concurrency, queue=q)
+    return MessageBus(store, q)
+
+
+def build_agents(
+    out_dir: str = "out",
+    scheduler: str = "retry",
+    cache_dir: Optional[str] = None,
+    writer_options: Optional[Dict[str, Any]] = None,
+    faq_questions: str = "selected",
+    competitors: int = 0,
+    targets: Optional[Sequence[str]] = None,
+    queue_size: int = 0,
+) -> List[BaseAgent]:
+    """
+    scheduler:
+    - retry: agents emit NeedArtifact, TaskCoordinatorAgent requeues blocked Tasks
+    - dag: DagSchedulerAgent releases each Task once its inputs exist
+
+    cache_dir: persistent artifact cache; cacheable workers skip Tasks whose inputs are unchanged.
+    writer_options: extra WriterAgent arguments (streaming, ndjson, page_files, batch_size, fsync, json_mode).
+    faq_questions: "selected" (5 questions) or "all" questions of the bank in each FAQ.
+    competitors: catalog runs compare each product with its top-k catalog competitors (0: fictional Product B).
+    targets: artifact names to build (default: all); only the Tasks they need are planned
+    and only the worker agents handling those Tasks are imported.
+    queue_size: bound of the bus queue (0: unbounded); the planner then releases a
+    larger fan-out as earlier Tasks finish instead of publishing it at once.
+    """
+    planner = PlannerAgent(mode=scheduler, competitors=competitors, targets=targets, max_in_flight=queue_size)
+    planned = set(planner.task_names())
+    worker_options = {"FAQAgent": {"questions": faq_questions}}
+
+    agents: List[BaseAgent] = [planner]
+    for handles, module, class_name in WORKER_AGENTS:
+        if planned.intersection(handles):
+            agent_class = getattr(importlib.import_module(module), class_name)
+            agents.append(agent_class(**worker_options.get(class_name, {})))
+    agents += [
+        WriterAgent(out_dir=out_dir, **(writer_options or {})),
+        DagSchedulerAgent() if scheduler == "dag" else TaskCoordinatorAgent(),
+    ]
+    if cache_dir:
+        cache = ArtifactCache(cache_dir)
+        agents = [CachedAgent(a, cache) if a.handles and a.cacheable else a for a in agents]
+    return agents
+
+
+def add_metrics(bus: MessageBus, metrics: Optional[str] = None, queue: str = "fifo") -> None:
+    """MetricsCollector exporting to `metrics`; without one, page latency alone for critical-path runs."""
+    if metrics:
+        bus.add_hook(MetricsCollector(metrics))
+    elif queue == "critical-path":
+        bus.add_hook(PageLatency())
+
+
+def close_agents(bus: MessageBus) -> None:
+    """Lets agents holding resources (e.g. the writer's sinks) flush and release them."""
+    for a in bus.agents:
+        close = getattr(a, "close", None)
+        if close is not None:
+            close()
+
+
+def wire(bus: MessageBus, agents: List[BaseAgent]) -> None:
+    # Subscriptions come from each agent's declarations:
+    # - Planner reacts to Start, the coordinator to NeedArtifact/ArtifactCreated
+    # - Worker agents receive only the Task names they handle
+    for a in agents:
+        bus.register(a)
+
+
+def seed_catalog(store: ArtifactStore, products: List[CatalogEntry], source: str) -> None:
+    """Seeds one namespaced raw input per product plus the `catalog_index` the Planner reads."""
+    for product_id, raw in products:
+        store.put(Artifact(key=ns_key(product_id, "raw_product_input"), value=raw, meta={"source": source}))
+    store.put(Artifact(key="catalog_index", value=[pid for pid, _ in products], meta={"source": source}))
+
+
+def collect_written(store: ArtifactStore, product_ids: List[str]) -> List[str]:
+    """Merges every per-product `written_files` artifact into one `written_files` artifact."""
+    files: List[str] = []
+    records = 0
+    missing: List[str] = []
+    for product_id in product_ids:
+        art = store.get(ns_key(product_id, "written_files"))
+        if art is None:
+            missing.append(product_id)
+        else:
+            files.extend(art.value["files"])
+            records += art.value.get("records", 0)
+
+    store.put(Artifact(
+        key="written_files",
+        value={"files": files, "records": records, "products": len(product_ids) - len(missing)},
+        meta={"produced_by": "pipeline"},
+    ))
+    return missing
+
+
+def run_catalog(
+    products: List[CatalogEntry],
+    out_dir: str = "out",
+    source: str = "catalog",
+    concurrency: int = 0,
+    scheduler: str = "retry",
+    cache_dir: Optional[str] = None,
+    store_backend: str = "memory",
+    hot_size: int = 10_000,
+    writer_options: Optional[Dict[str, Any]] = None,
+    metrics: Optional[str] = None,
+    faq_questions: str = "selected",
+    competitors: int = 0,
+    queue: str = "fifo",
+    queue_size: int = 0,
+    page_order: Sequence[str] = (),
+    checkpoint: Optional[str] = None,
+    checkpoint_every: int = 1000,
+    evict: bool = False,
+    pins: Sequence[str] = (),
+    targets: Optional[Sequence[str]] = None,
+) -> MessageBus:
+    """
+    Runs the whole agent pipeline over every product of a catalog in one MessageBus run.
+    Returns the bus; `bus.store` holds `written_files` listing every file written.
+    The caller owns the store and should close() it when done.
+
+    checkpoint: SQLite file checkpointed every `checkpoint_every` bus steps (sequential
+    bus only); a run that dies can be continued with resume_catalog().
+
+    evict: drop each intermediate artifact once every Task requiring it has run
+    (ArtifactEvictor); `pins` names artifacts to keep besides FINAL_ARTIFACTS.
+
+    targets: pages to rebuild (default: all); only the Tasks they need run (see build_agents).
+    """
+    config = {
+        "out_dir": out_dir, "concurrency": concurrency, "scheduler": scheduler, "cache_dir": cache_dir,
+        "store_backend": store_backend, "hot_size": hot_size, "writer_options": writer_options or {},
+        "metrics": metrics, "faq_questions": faq_questions, "competitors": competitors,
+        "queue": queue, "queue_size": queue_size, "page_order": list(page_order),
+        "evict": evict, "pins": list(pins), "targets": list(targets or ()),
+    }
+    bus = _catalog_bus(config)
+    ckpt = None
+    if checkpoint:
+        ckpt = _attach_checkpoint(bus, Checkpoint(checkpoint, checkpoint_every, fresh=True))
+        ckpt.write_config(config)
+    seed_catalog(bus.store, products, source)
+
+    bus.publish(Start(goal="build_catalog"))
+    return _finish_catalog(bus, [pid for pid, _ in products], ckpt)
+
+
+def resume_catalog(checkpoint: str, checkpoint_every: Optional[int] = None) -> MessageBus:
+    """
+    Continues a checkpointed run_catalog() from its last checkpoint: same options,
+    store, queue and agent state; Tasks finished before the checkpoint are not redone.
+    Keeps checkpointing to the same file.
+    """
+    if not os.path.exists(checkpoint):
+        raise FileNotFoundError(checkpoint)
+    ckpt = Checkpoint(checkpoint, checkpoint_every or 1000)
+    try:
+        config = ckpt.config()
+        # NDJSON output is cut back to the checkpoint, not truncated
+        bus = _catalog_bus(dict(config, writer_options=dict(config["writer_options"], resume=True)))
+        _attach_checkpoint(bus, ckpt).restore(bus)
+    except BaseException:
+        ckpt.close()
+        raise
+    product_ids = bus.store.require("catalog_index").value
+    return _finish_catalog(bus, product_ids, ckpt)
+
+
+def _catalog_bus(config: Dict[str, Any]) -> MessageBus:
+    store = build_store(config["store_backend"], config["hot_size"])
+    bus = build_bus(store, config["concurrency"], config["queue"], config["queue_size"], config["page_order"])
+    wire(bus, build_agents(
+        config["out_dir"], config["scheduler"], config["cache_dir"], config["writer_options"],
+        config["faq_questions"], config["competitors"], config.get("targets"), config["queue_size"],
+    ))
+    add_metrics(bus, config["metrics"], config["queue"])
+    if config.get("evict"):
+        bus.add_hook(ArtifactEvictor(FINAL_ARTIFACTS + tuple(config["pins"])))
+    return bus
+
+
+def _attach_checkpoint(bus: MessageBus, ckpt: Checkpoint) -> Checkpoint:
+    if isinstance(bus, AsyncMessageBus):
+        ckpt.close()
+        raise ValueError("Checkpoints need the sequential bus (no --concurrency)")
+    ckpt.attach(bus)
+    return ckpt
+
+
+def _finish_catalog(bus: MessageBus, product_ids: List[str], ckpt: Optional[Checkpoint]) -> MessageBus:
+    try:
+        bus.run(max_steps=STEPS_PER_PRODUCT * max(1, len(product_ids)))
+    finally:
+        if ckpt is not None:
+            bus.checkpoint = None
+            ckpt.close()
+    close_agents(bus)
+
+    missing = collect_written(bus.store, product_ids)
+    if missing:
+        raise RuntimeError(f"Catalog run finished without outputs for {len(missing)} products, e.g. {missing[:5]}")
+    return bus
+
+
+def run_catalog_stream(
+    stream: CatalogStream,
+    out_dir: str = "out",
+    max_in_flight: int = 1024,
+    concurrency: int = 0,
+    scheduler: str = "retry",
+    cache_dir: Optional[str] = None,
+    store_backend: str = "memory",
+    hot_size: int = 10_000,
+    writer_options: Optional[Dict[str, Any]] = None,
+    metrics: Optional[str] = None,
+    faq_questions: str = "selected",
+    queue: str = "fifo",
+    queue_size: int = 0,
+    page_order: Sequence[str] = (),
+    evict: bool = False,
+    pins: Sequence[str] = (),
+    targets: Optional[Sequence[str]] = None,
+) -> MessageBus:
+    """
+    Runs the pipeline over a lazily read catalog with bounded work in flight.
+
+    Batches are pulled from the stream until `max_in_flight` products are pending;
+    they are then seeded and the bus drains them, their artifacts are dropped from
+    the store and the next batches are read. Only the pending products (plus one batch) are ever in
+    memory. Rejected rows stay in `stream.errors`. With a bounded queue, the planner
+    releases the Tasks of the pending products as earlier ones finish. With `evict`,
+    artifacts are also dropped while the products are processed (see run_catalog).
+
+    Returns the bus; `bus.store` holds `written_files` for every product written.
+    The caller owns the store and should close() it when done.
+    """
+    if max_in_flight < 1:
+        raise ValueError(f"Invalid max_in_flight: {max_in_flight}")
+    store = build_store(store_backend, hot_size)
+    bus = build_bus(store, concurrency, queue, queue_size, page_order)
+    wire(bus, build_agents(
+        out_dir, scheduler, cache_dir, writer_options, faq_questions, targets=targets, queue_size=queue_size,
+    ))
+    add_metrics(bus, metrics, queue)
+    if evict:
+        bus.add_hook(ArtifactEvictor(FINAL_ARTIFACTS + tuple(pins)))
+
+    files: List[str] = []
+    records = 0
+    written = 0
+    pending: List[CatalogEntry] = []
+
+    def drain() -> None:
+        nonlocal records, written
+        seed_catalog(store, pending, stream.path)
+        bus.publish(Start(goal="build_catalog"))
+        bus.run(max_steps=STEPS_PER_PRODUCT * len(pending))
+        missing = collect_written(store, [pid for pid, _ in pending])
+        if missing:
+            raise RuntimeError(f"Catalog run finished without outputs for {len(missing)} products, e.g. {missing[:5]}")
+        wave = store.require("written_files").value
+        files.extend(wave["files"])
+        records += wave["records"]
+        written += wave["products"]
+        for product_id, _ in pending:
+            for name in PRODUCT_ARTIFACTS:
+                store.delete(ns_key(product_id, name))
+        pending.clear()
+
+    for batch in stream.batches():
+        while batch:
+            # Backpressure: stop reading until the pending products are done
+            if len(pending) >= max_in_flight:
+                drain()
+            take = max_in_flight - len(pending)
+            pending.extend(batch[:take])
+            batch = batch[take:]
+    if pending:
+        drain()
+    close_agents(bus)
+
+    store.put(Artifact(
+        key="written_files",
+        value={"files": files, "records": records, "products": written},
+        meta={"produced_by": "pipeline"},
+    ))
+    return bus
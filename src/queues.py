@@ -0,0 +1,259 @@
+from __future__ import annotations
+from bisect import insort
+from collections import deque
+from heapq import heappop, heappush
+from typing import Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from src.graph import downstream_outputs, remaining_path_lengths
+from src.messages import Message, Task
+
+# -----------------------------
+# Priority classes for the MessageBus queue (lower runs first).
+# Keys are message types or Task names; a Task without its own entry gets "Task".
+# - coordination first: Done, then wakeups/blocks, so blocked Tasks are
+#   requeued before new work is started
+# - Tasks after every coordination message, ordered by progress and readiness
+#   (see PriorityQueue), not by stage: a downstream Task queued before its inputs
+#   exist would only block
+# -----------------------------
+
+DEFAULT_PRIORITIES: Dict[str, int] = {
+    "Done": 0,
+    "ArtifactCreated": 1,
+    "NeedArtifact": 1,
+    "Start": 2,
+    "Plan": 2,
+    "Task": 3,
+}
+
+# Control message classes shared by every policy; Task classes start after them.
+CONTROL_PRIORITIES: Dict[str, int] = {
+    t: DEFAULT_PRIORITIES[t] for t in ("Done", "ArtifactCreated", "NeedArtifact", "Start", "Plan")
+}
+
+# Message types a bounded queue always admits: refusing them would stall the run,
+# and each one follows a message already taken off the queue.
+UNBOUNDED_TYPES = ("Done", "ArtifactCreated", "NeedArtifact")
+
+
+class QueueFull(RuntimeError):
+    """Raised by MessageBus.publish() when a bounded queue has no room for the message."""
+
+
+class PriorityQueue:
+    """
+    Bounded priority queue with the deque subset MessageBus uses
+    (append, popleft, [0], len, truthiness).
+
+    - control messages (every type but Task) run first, by class of their type
+      (`priorities`, lower first), FIFO within a class: one deque per class, O(1)
+    - Tasks run product by product, in the order each product (payload `product_id`)
+      first had a Task queued, so the products planned first finish first; with
+      `groups` (Task name -> group, lower first, unlisted names after every group),
+      group by group, and product by product within a group
+    - within a product: the first Task whose inputs all exist (`has`, artifact lookup),
+      in order of class of the Task name (`priorities`, "Task" when it has none), then
+      publish order; a Task that would block runs only when none of its product's can
+    - maxsize: messages of bounded types held at most (None: unbounded); messages of
+      `unbounded` types are always admitted and take no room, so a burst of them (e.g.
+      one ArtifactCreated per product from a catalog-wide Task) cannot starve the Tasks
+      they release
+
+    Appending a Task only files it under its product (O(1), so a large fan-out costs
+    about what a deque does); a product's Tasks are sorted when it comes up for dispatch,
+    and Tasks queued for it after that (requeued, released) are inserted in order.
+    Readiness is checked at dispatch, against the store as it is then: a Task queued
+    before its inputs existed runs as soon as they do, without a NeedArtifact round-trip.
+    """
+
+    def __init__(
+        self,
+        priorities: Optional[Mapping[str, int]] = None,
+        maxsize: Optional[int] = None,
+        unbounded: Iterable[str] = UNBOUNDED_TYPES,
+        has: Optional[Callable[[str], bool]] = None,
+        groups: Optional[Mapping[str, int]] = None,
+    ) -> None:
+        if maxsize is not None and maxsize < 1:
+            raise ValueError(f"Invalid queue maxsize: {maxsize}")
+        self.priorities: Dict[str, int] = dict(DEFAULT_PRIORITIES if priorities is None else priorities)
+        self.maxsize = maxsize
+        self.unbounded = frozenset(unbounded)
+        self.has = has
+        self.groups: Optional[Dict[str, int]] = dict(groups) if groups else None
+        self._last_group = max(groups.values()) + 1 if groups else 0
+
+        self._default = self.priorities.get("Task", max(self.priorities.values(), default=0))
+        self._control = sorted({self.priorities.get(t, self._default) for t in CONTROL_PRIORITIES})
+        self._buckets: Dict[int, Deque[Message]] = {level: deque() for level in self._control}
+
+        # Tasks are held per bucket: the product id, or (group, product id) with groups
+        self._ranks: Dict[str, int] = {}                 # product id -> rank (first queued first)
+        self._active: List[Tuple[int, int, Any]] = []    # heap of (group, rank, bucket) with queued Tasks
+        self._filed: Dict[Any, List[Task]] = {}          # bucket -> Tasks not sorted yet, in order
+        self._ranked: Dict[Any, List[Tuple[int, int, Task]]] = {}  # bucket -> sorted (class, seq, Task)
+        self._seq = 0
+        self._size = 0
+        self._controls = 0  # control messages held
+        self._held = 0      # messages of bounded types held
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def priority(self, msg: Message) -> int:
+        if msg.type == "Task":
+            return self.priorities.get(msg.name, self._default)  # type: ignore
+        return self.priorities.get(msg.type, self._default)
+
+    def room(self) -> Optional[int]:
+        """Free slots for bounded messages (None: unbounded)."""
+        if self.maxsize is None:
+            return None
+        return max(0, self.maxsize - self._held)
+
+    def full(self) -> bool:
+        return self.maxsize is not None and self._held >= self.maxsize
+
+    def admits(self, msg: Message) -> bool:
+        return not self.full() or msg.type in self.unbounded
+
+    def _entry(self, task: Task) -> Tuple[int, int, Task]:
+        """Sort entry of a Task of the product being dispatched; seq keeps publish order."""
+        seq = self._seq
+        self._seq = seq + 1
+        return (self.priorities.get(task.name, self._default), seq, task)
+
+    def append(self, msg: Message) -> None:
+        if msg.type not in self.unbounded:
+            maxsize = self.maxsize
+            if maxsize is not None and self._held >= maxsize:
+                raise QueueFull(f"Message queue full ({maxsize} messages); cannot publish {msg.type}")
+            self._held += 1
+        self._size += 1
+        if msg.type != "Task":
+            self._buckets[self.priority(msg)].append(msg)
+            self._controls += 1
+            return
+
+        product_id = msg.payload.get("product_id", "")  # type: ignore
+        if self.groups is None:
+            group, key = 0, product_id
+        else:
+            group = self.groups.get(msg.name, self._last_group)  # type: ignore
+            key = (group, product_id)
+        filed = self._filed.get(key)
+        if filed is not None:
+            filed.append(msg)  # type: ignore
+            return
+        ranked = self._ranked.get(key)
+        if ranked is not None:
+            insort(ranked, self._entry(msg))  # type: ignore
+            return
+        rank = self._ranks.get(product_id)
+        if rank is None:
+            rank = self._ranks[product_id] = len(self._ranks)
+        self._filed[key] = [msg]  # type: ignore
+        heappush(self._active, (group, rank, key))
+
+    def _first_control(self) -> Optional[Deque[Message]]:
+        if not self._controls:
+            return None
+        for level in self._control:
+            bucket = self._buckets[level]
+            if bucket:
+                return bucket
+        return None
+
+    def _head(self) -> Tuple[List[Tuple[int, int, Task]], int]:
+        """
+        Sorted Tasks of the first bucket (sorted on first use) and the index of the one
+        to dispatch: the first whose inputs all exist, else the first (it will block).
+        """
+        key = self._active[0][2]
+        ranked = self._ranked.get(key)
+        if ranked is None:
+            ranked = self._ranked[key] = sorted(self._entry(t) for t in self._filed.pop(key))
+        has = self.has
+        if has is not None and len(ranked) > 1:
+            for index, entry in enumerate(ranked):
+                if all(map(has, entry[2].requires)):
+                    return ranked, index
+        return ranked, 0
+
+    def popleft(self) -> Message:
+        bucket = self._first_control()
+        if bucket is not None:
+            self._controls -= 1
+            self._size -= 1
+            msg = bucket.popleft()
+            if msg.type not in self.unbounded:
+                self._held -= 1
+            return msg
+        if not self._active:
+            raise IndexError("pop from an empty queue")
+        ranked, index = self._head()
+        task = ranked.pop(index)[2]
+        if not ranked:
+            del self._ranked[heappop(self._active)[2]]
+        self._size -= 1
+        if task.type not in self.unbounded:
+            self._held -= 1
+        return task
+
+    def __getitem__(self, index: int) -> Message:
+        if index != 0:
+            raise IndexError("only the head of a PriorityQueue can be read")
+        bucket = self._first_control()
+        if bucket is not None:
+            return bucket[0]
+        if not self._active:
+            raise IndexError("empty queue")
+        ranked, index = self._head()
+        return ranked[index][2]
+
+    def __iter__(self):
+        """Messages in dispatch order, as far as known now (for inspection, not hot paths)."""
+        for level in self._control:
+            yield from self._buckets[level]
+        for _, _, key in sorted(self._active):
+            ranked = self._ranked.get(key)
+            if ranked is not None:
+                yield from (entry[2] for entry in ranked)
+            else:
+                yield from self._filed[key]
+
+    def sizes(self) -> List[int]:
+        """Control messages held per class, in class order, then queued Tasks."""
+        return [len(self._buckets[level]) for level in self._control] + [self._size - self._controls]
+
+
+def critical_path_priorities(tasks: List[Task]) -> Dict[str, int]:
+    """
+    Priority classes for the Task names of one product's plan: the longer a Task's
+    remaining critical path, the earlier it runs among its product's ready Tasks.
+    Control messages keep CONTROL_PRIORITIES.
+    """
+    lengths = remaining_path_lengths(tasks)
+    longest = max(lengths, default=0)
+    base = max(CONTROL_PRIORITIES.values()) + 1
+
+    priorities = dict(CONTROL_PRIORITIES)
+    for t, length in zip(tasks, lengths):
+        priorities[t.name] = base + (longest - length)
+    priorities["Task"] = base + longest + 1
+    return priorities
+
+
+def page_groups(tasks: List[Task], page_order: Sequence[str]) -> Dict[str, int]:
+    """
+    PriorityQueue groups for the Task names of one product's plan (un-namespaced keys):
+    each Task goes to the first page of `page_order` (artifact names) it leads to;
+    Tasks leading to none of them come after every group.
+    """
+    return {
+        t.name: next((g for g, page in enumerate(page_order) if page in produced), len(page_order))
+        for t, produced in zip(tasks, downstream_outputs(tasks))
+    }
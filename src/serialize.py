@@ -0,0 +1,72 @@
+from __future__ import annotations
+import json
+import re
+from typing import Any, Callable, Optional
+
+try:  # optional, faster encoder
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None  # type: ignore
+
+# -----------------------------
+# JSON output encoding:
+# - "pretty": 2-space indent (the historical page file format)
+# - "compact": no whitespace, roughly half the bytes
+# Both encoders produce the same bytes for a given mode, so outputs don't
+# change with whether orjson is installed.
+# -----------------------------
+
+MODES = ("pretty", "compact")
+ENCODERS = ("auto", "orjson", "json")
+
+# orjson spells exponent floats as 1e16 / 1e-5 where the stdlib writes 1e+16 / 1e-05.
+# Any digit-e-digit in orjson output (inside a string too) sends the value to the stdlib.
+_EXPONENT = re.compile(rb"[0-9][eE]-?[0-9]")
+
+
+class Serializer:
+    """
+    Encodes values to UTF-8 JSON bytes, ready for a single write.
+
+    - mode: "pretty" or "compact"
+    - encoder: "orjson", "json" (stdlib) or "auto" (orjson when installed)
+    - default: called for objects neither encoder knows, must return something encodable
+
+    The orjson path falls back to the stdlib for what it would spell differently
+    (exponent floats) or rejects (non-str keys, integers beyond 64 bits).
+    Non-finite floats are not valid JSON and are not supported.
+    """
+
+    def __init__(self, mode: str = "pretty", encoder: str = "auto", default: Optional[Callable[[Any], Any]] = None) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown JSON mode: {mode}")
+        if encoder not in ENCODERS:
+            raise ValueError(f"Unknown JSON encoder: {encoder}")
+        if encoder == "orjson" and orjson is None:
+            raise ValueError("JSON encoder 'orjson' requested but orjson is not installed")
+
+        if encoder == "auto":
+            encoder = "orjson" if orjson is not None else "json"
+        self.mode = mode
+        self.encoder = encoder
+        self.default = default
+
+        self._orjson_option = orjson.OPT_INDENT_2 if (orjson is not None and mode == "pretty") else 0
+        self._stdlib_kwargs = (
+            {"indent": 2, "ensure_ascii": False}
+            if mode == "pretty"
+            else {"ensure_ascii": False, "separators": (",", ":")}
+        )
+
+    def dumps(self, value: Any) -> bytes:
+        if self.encoder == "orjson":
+            try:
+                data = orjson.dumps(value, default=self.default, option=self._orjson_option)
+            except TypeError:  # orjson.JSONEncodeError
+                return self._stdlib(value)
+            if _EXPONENT.search(data) is None:
+                return data
+        return self._stdlib(value)
+
+    def _stdlib(self, value: Any) -> bytes:
+        return json.dumps(value, default=self.default, **self._stdlib_kwargs).encode("utf-8")
@@ -0,0 +1,112 @@
+from __future__ import annotations
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.catalog import CatalogEntry
+from src.pipeline import run_catalog
+
+# Shards per worker: smaller shards balance uneven products across the pool.
+SHARDS_PER_WORKER = 4
+
+
+def partition(products: List[CatalogEntry], shards: int) -> List[List[CatalogEntry]]:
+    """Splits a catalog into at most `shards` contiguous, non-empty, near-equal slices."""
+    shards = max(1, min(shards, len(products)))
+    size, extra = divmod(len(products), shards)
+    out: List[List[CatalogEntry]] = []
+    start = 0
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0)
+        out.append(products[start:end])
+        start = end
+    return out
+
+
+def shard_path(path: str, shard_id: int) -> str:
+    """Per-shard variant of an output path: pages.ndjson -> pages.0003.ndjson"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{shard_id:04d}{ext}"
+
+
+def _run_shard(job: Tuple[int, List[CatalogEntry], str, str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Worker entry point. Each worker builds its own ArtifactStore, MessageBus and agent set;
+    nothing but the shard's products, run options and its result crosses the process boundary.
+    """
+    shard_id, products, out_dir, source, options = job
+    # Single-file outputs get one file per shard
+    writer_options = options.get("writer_options") or {}
+    if writer_options.get("ndjson"):
+        options = dict(options, writer_options=dict(writer_options, ndjson=shard_path(writer_options["ndjson"], shard_id)))
+    if options.get("metrics"):
+        options = dict(options, metrics=shard_path(options["metrics"], shard_id))
+    started = time.perf_counter()
+    bus = run_catalog(products, out_dir=out_dir, source=f"{source}#shard{shard_id}", **options)
+    written = bus.store.require("written_files").value
+    store_stats = bus.store.stats()
+    bus.store.close()
+    return {
+        "shard": shard_id,
+        "files": written["files"],
+        "products": written["products"],
+        "records": written["records"],
+        "steps": bus.steps,
+        "published": bus.published,
+        "dispatch_counts": bus.dispatch_counts,
+        "agent_stats": bus.agent_stats(),
+        "store_stats": store_stats,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def run_sharded(
+    products: List[CatalogEntry],
+    workers: int,
+    out_dir: str = "out",
+    source: str = "catalog",
+    shards: Optional[int] = None,
+    **options: Any,
+) -> Dict[str, Any]:
+    """
+    Runs a catalog across a process pool and merges the shard results.
+    Extra keyword options are forwarded to run_catalog() in every worker. `competitors`
+    is refused: competitors are ranked over the whole catalog, which no shard holds.
+
+    Returns:
+    - files: every written file, in catalog order
+    - records / products / steps / published / dispatch_counts / agent_stats / store_stats: summed over shards
+    - shards: per-shard stats
+    - seconds: parent wall time
+    """
+    if options.get("competitors"):
+        # Each shard would rank competitors among its own slice, not the catalog
+        raise ValueError("Catalog competitors need a single in-process run, not shards")
+    started = time.perf_counter()
+    parts = partition(products, shards or workers * SHARDS_PER_WORKER)
+    jobs = [(i, part, out_dir, source, options) for i, part in enumerate(parts)]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_run_shard, jobs))
+
+    merged: Dict[str, Any] = {
+        "files": [], "records": 0, "products": 0, "steps": 0, "published": 0, "dispatch_counts": {}, "agent_stats": {},
+        "store_stats": {}, "shards": [],
+    }
+    for r in results:
+        merged["files"].extend(r.pop("files"))
+        for k in ("records", "products", "steps", "published"):
+            merged[k] += r[k]
+        for agent_name, n in r.pop("dispatch_counts").items():
+            merged["dispatch_counts"][agent_name] = merged["dispatch_counts"].get(agent_name, 0) + n
+        for agent_name, stats in r.pop("agent_stats").items():
+            totals = merged["agent_stats"].setdefault(agent_name, {})
+            for k, n in stats.items():
+                totals[k] = totals.get(k, 0) + n
+        for k, n in r.pop("store_stats").items():
+            merged["store_stats"][k] = merged["store_stats"].get(k, 0) + n
+        merged["shards"].append(r)
+
+    merged["seconds"] = time.perf_counter() - started
+    return merged
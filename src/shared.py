@@ -0,0 +1,46 @@
+from __future__ import annotations
+from typing import Any, Callable, Optional
+
+# -----------------------------
+# Structural sharing in rendered pages:
+# a page holds a Ref to the product data it is built from (the same objects
+# as the `product_model` artifact) instead of its own copy of a derived block.
+# The block is only built when the page is serialized (Serializer default hook),
+# so N pages of a product cost one product model plus a few small Refs.
+# Shared values are never mutated once stored.
+# -----------------------------
+
+
+class Ref:
+    """
+    Reference to shared, immutable data inside an artifact.
+    - value: the shared object (not copied)
+    - view: builds the serialized form from `value` (None: `value` itself)
+    """
+    __slots__ = ("value", "view")
+
+    def __init__(self, value: Any, view: Optional[Callable[[Any], Any]] = None) -> None:
+        self.value = value
+        self.view = view
+
+    def expand(self) -> Any:
+        return self.view(self.value) if self.view is not None else self.value
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not Ref:
+            return NotImplemented
+        return self.view is other.view and self.value == other.value  # type: ignore
+
+    def __repr__(self) -> str:
+        view = getattr(self.view, "__name__", None)
+        return f"Ref({view or 'value'})"
+
+    def __reduce__(self):
+        return (Ref, (self.value, self.view))
+
+
+def expand_ref(obj: Any) -> Any:
+    """`default` hook for json/orjson encoders: expands Refs, rejects everything else."""
+    if obj.__class__ is Ref:
+        return obj.expand()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,187 @@
+from __future__ import annotations
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+# Output sinks used by WriterAgent. Both buffer writes and make them durable in batches.
+# IOPool moves the disk work of either sink off the bus thread.
+
+
+class FileSink:
+    """
+    One file per page, written atomically.
+
+    - write() puts the bytes in `<path>.tmp` and keeps it open
+    - flush() fsyncs every pending temp file, then renames them into place,
+      so a reader sees either no file or the complete file
+    - flush() runs automatically once `batch_size` files are pending
+    """
+
+    def __init__(self, batch_size: int = 64, fsync: bool = True) -> None:
+        self.batch_size = max(1, batch_size)
+        self.fsync = fsync
+        self._pending: List[Tuple[object, str, str]] = []  # (open temp file, tmp path, final path)
+        self._dirs = set()
+
+    def write(self, path: str, data: bytes) -> None:
+        parent = os.path.dirname(path)
+        if parent and parent not in self._dirs:
+            os.makedirs(parent, exist_ok=True)
+            self._dirs.add(parent)
+
+        tmp = f"{path}.tmp"
+        f = open(tmp, "wb")
+        f.write(data)
+        self._pending.append((f, tmp, path))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        _commit(self._pending, self.fsync)
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+
+
+def _commit(pending: List[Tuple[object, str, str]], fsync: bool) -> None:
+    """Makes a batch of open temp files durable, then renames every one into place."""
+    for f, _, _ in pending:
+        f.flush()  # type: ignore
+        if fsync:
+            os.fsync(f.fileno())  # type: ignore
+        f.close()  # type: ignore
+    for _, tmp, path in pending:
+        os.replace(tmp, path)
+
+
+class NdjsonSink:
+    """
+    Appends one JSON line per page to a single file.
+
+    Lines are buffered in memory and appended (then fsynced) in batches of
+    whole lines, so a consumer tailing the file can start before the run ends;
+    it should ignore a last line that doesn't end with a newline yet.
+    """
+
+    def __init__(self, path: str, batch_size: int = 64, fsync: bool = True, append: bool = False) -> None:
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.fsync = fsync
+        self.records = 0
+        self._buffer: List[bytes] = []
+        self._file: Optional[object] = open(path, "ab" if append else "wb")
+
+    def size(self) -> int:
+        """Bytes appended so far (buffered lines excluded)."""
+        return self._file.tell()  # type: ignore
+
+    def truncate(self, size: int) -> None:
+        """Drops everything after `size` bytes, e.g. lines written after a checkpoint."""
+        self._buffer.clear()
+        self._file.truncate(size)  # type: ignore
+
+    def write(self, line: bytes) -> None:
+        self._buffer.append(line)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer or self._file is None:
+            return
+        self._file.write(b"".join(self._buffer))  # type: ignore
+        self._file.flush()  # type: ignore
+        if self.fsync:
+            os.fsync(self._file.fileno())  # type: ignore
+        self.records += len(self._buffer)
+        self._buffer.clear()
+
+    def close(self) -> None:
+        self.flush()
+        if self._file is not None:
+            self._file.close()  # type: ignore
+            self._file = None
+
+
+def write_batch(files: List[Tuple[str, bytes]], fsync: bool = True) -> None:
+    """A batch of page files, as FileSink.flush() writes them: temp files, fsynced, then renamed."""
+    pending: List[Tuple[object, str, str]] = []
+    for path, data in files:
+        tmp = f"{path}.tmp"
+        f = open(tmp, "wb")
+        f.write(data)
+        pending.append((f, tmp, path))
+    _commit(pending, fsync)
+
+
+class IOPool:
+    """
+    Bounded background I/O stage for WriterAgent.
+
+    - write_files(): a batch of atomic page file writes (write_batch) on one of `workers` threads
+    - call(): a job on a single extra thread, in submission order (NDJSON appends)
+    - at most `max_pending` jobs are queued; submitting more first waits for the oldest
+    - every job returns a Future; a failed job raises when its result is read
+
+    Directories are created on the submitting thread, so workers never race on them.
+    """
+
+    def __init__(self, workers: int, max_pending: int = 64, fsync: bool = True) -> None:
+        if workers < 1:
+            raise ValueError(f"Invalid I/O worker count: {workers}")
+        self.fsync = fsync
+        self.max_pending = max(1, max_pending)
+        self._files = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="writer-io")
+        self._lane = ThreadPoolExecutor(max_workers=1, thread_name_prefix="writer-lane")
+        self._pending: Deque[Future] = deque()
+        self._dirs: Set[str] = set()
+        # jobs: submitted; waits: submissions that had to wait for a queue slot
+        self.stats: Dict[str, int] = {"io_jobs": 0, "io_waits": 0}
+
+    def _submit(self, executor: ThreadPoolExecutor, fn: Callable[..., Any], *args: Any) -> Future:
+        pending = self._pending
+        while pending and pending[0].done():
+            pending.popleft().result()
+        if len(pending) >= self.max_pending:
+            self.stats["io_waits"] += 1
+            pending.popleft().result()
+        future = executor.submit(fn, *args)
+        pending.append(future)
+        self.stats["io_jobs"] += 1
+        return future
+
+    def write_files(self, files: List[Tuple[str, bytes]]) -> Future:
+        for path, _ in files:
+            parent = os.path.dirname(path)
+            if parent and parent not in self._dirs:
+                os.makedirs(parent, exist_ok=True)
+                self._dirs.add(parent)
+        return self._submit(self._files, write_batch, files, self.fsync)
+
+    def call(self, fn: Callable[..., Any], *args: Any) -> Future:
+        return self._submit(self._lane, fn, *args)
+
+    async def wait_room(self, jobs: int = 1) -> None:
+        """Awaits (instead of blocking on) the oldest jobs until `jobs` more can be submitted."""
+        pending = self._pending
+        while pending and len(pending) + jobs > self.max_pending:
+            await asyncio.wrap_future(pending[0])
+            while pending and pending[0].done():
+                pending.popleft().result()
+
+    def drain(self) -> None:
+        """Waits for every submitted job."""
+        while self._pending:
+            self._pending.popleft().result()
+
+    def close(self) -> None:
+        try:
+            self.drain()
+        finally:
+            self._files.shutdown()
+            self._lane.shutdown()
@@ -1,6 +1,52 @@
 from __future__ import annotations
+import os
+import pickle
+import sqlite3
+import sys
+import tempfile
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+# Separator between a product namespace and the artifact name (catalog mode).
+NAMESPACE_SEP = "/"
+
+
+def ns_key(product_id: str, name: str) -> str:
+    """
+    Artifact key for `name` inside a product namespace.
+    An empty product id keeps the flat keys used by single-product runs.
+    """
+    return f"{product_id}{NAMESPACE_SEP}{name}" if product_id else name
+
+
+def split_key(key: str) -> Tuple[str, str]:
+    """Inverse of ns_key: (product_id, name); product_id is "" for flat keys."""
+    product_id, _, name = key.rpartition(NAMESPACE_SEP)
+    return product_id, name
+
+
+def deep_size(value: Any, seen: Set[int]) -> int:
+    """
+    Bytes held by `value` and everything it references, skipping objects in `seen`
+    (ids, updated in place): an object shared by several values is counted once.
+    """
+    size = 0
+    stack: List[Any] = [value]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif hasattr(type(obj), "__slots__"):
+            stack.extend(getattr(obj, slot, None) for slot in type(obj).__slots__)
+    return size
 
 
 @dataclass(frozen=True)
@@ -14,20 +60,210 @@ class Artifact:
     meta: Dict[str, Any]
 
 
+class MemoryBackend:
+    """Default backend: every artifact stays in a dict for the whole run."""
+
+    def __init__(self) -> None:
+        self._artifacts: Dict[str, Artifact] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._artifacts
+
+    def __len__(self) -> int:
+        return len(self._artifacts)
+
+    def get(self, key: str) -> Optional[Artifact]:
+        return self._artifacts.get(key)
+
+    def put(self, artifact: Artifact) -> None:
+        self._artifacts[artifact.key] = artifact
+
+    def delete(self, key: str) -> None:
+        self._artifacts.pop(key, None)
+
+    def keys(self) -> Iterator[str]:
+        return iter(self._artifacts)
+
+    def resident(self) -> Iterator[Tuple[str, Artifact]]:
+        """(key, artifact) for every artifact held in memory."""
+        return iter(self._artifacts.items())
+
+    def spilled_sizes(self) -> Iterator[Tuple[str, int]]:
+        """(key, pickled bytes) for every artifact held on disk only."""
+        return iter(())
+
+    def stats(self) -> Dict[str, int]:
+        return {"resident": len(self._artifacts), "spilled": 0, "spilled_bytes": 0}
+
+    def close(self) -> None:
+        pass
+
+
+class SqliteBackend:
+    """
+    Bounded-memory backend for large catalogs.
+
+    - At most `hot_size` artifacts stay in memory (LRU).
+    - Artifacts leaving the hot set are pickled into a SQLite file
+      (only if changed since they were last loaded).
+    - get() loads spilled artifacts lazily and makes them hot again.
+
+    The SQLite file is scratch space for one run: without `path` a temp file
+    is used and removed on close().
+    """
+
+    def __init__(self, path: Optional[str] = None, hot_size: int = 10_000) -> None:
+        if hot_size < 1:
+            raise ValueError("hot_size must be >= 1")
+        self._owns_file = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix=".artifacts.sqlite")
+            os.close(fd)
+        self.path = path
+        self.hot_size = hot_size
+
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=OFF")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute("CREATE TABLE IF NOT EXISTS artifacts (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+
+        self._hot: "OrderedDict[str, Artifact]" = OrderedDict()
+        self._dirty: Set[str] = set()   # hot artifacts not yet written to SQLite
+        self._keys: Set[str] = set()    # every key, hot or spilled
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get(self, key: str) -> Optional[Artifact]:
+        art = self._hot.get(key)
+        if art is not None:
+            self._hot.move_to_end(key)
+            return art
+        if key not in self._keys:
+            return None
+
+        row = self._db.execute("SELECT value FROM artifacts WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        art = pickle.loads(row[0])
+        self._hot[key] = art
+        self._evict()
+        return art
+
+    def put(self, artifact: Artifact) -> None:
+        key = artifact.key
+        self._keys.add(key)
+        self._hot[key] = artifact
+        self._hot.move_to_end(key)
+        self._dirty.add(key)
+        self._evict()
+
+    def delete(self, key: str) -> None:
+        if key not in self._keys:
+            return
+        self._keys.discard(key)
+        self._dirty.discard(key)
+        self._hot.pop(key, None)
+        self._db.execute("DELETE FROM artifacts WHERE key = ?", (key,))
+
+    def keys(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def resident(self) -> Iterator[Tuple[str, Artifact]]:
+        """(key, artifact) for the hot artifacts, in LRU order; doesn't touch the LRU."""
+        return iter(self._hot.items())
+
+    def spilled_sizes(self) -> Iterator[Tuple[str, int]]:
+        """(key, pickled bytes) for the artifacts held in SQLite only; nothing is loaded."""
+        for key, size in self._db.execute("SELECT key, LENGTH(value) FROM artifacts"):
+            if key in self._keys and key not in self._hot:
+                yield key, size
+
+    def _evict(self) -> None:
+        if len(self._hot) <= self.hot_size:
+            return
+        rows = []
+        while len(self._hot) > self.hot_size:
+            key, art = self._hot.popitem(last=False)
+            if key in self._dirty:
+                self._dirty.discard(key)
+                rows.append((key, pickle.dumps(art, protocol=pickle.HIGHEST_PROTOCOL)))
+        if rows:
+            self._db.executemany("INSERT OR REPLACE INTO artifacts (key, value) VALUES (?, ?)", rows)
+
+    def stats(self) -> Dict[str, int]:
+        # A reloaded artifact keeps its row (it is only rewritten if it changes): count it as hot
+        count = size = 0
+        for _, length in self.spilled_sizes():
+            count += 1
+            size += length
+        return {"resident": len(self._hot), "spilled": count, "spilled_bytes": size}
+
+    def close(self) -> None:
+        self._db.close()
+        if self._owns_file and os.path.exists(self.path):
+            os.remove(self.path)
+
+
 class ArtifactStore:
     """
     Central store of artifacts.
     Owned by the orchestrator (bus), not by agents.
+
+    Storage is pluggable: MemoryBackend (default) or SqliteBackend for runs
+    that don't fit in memory.
+
+    Secondary indexes, kept in memory whatever the backend, answer namespace queries
+    without scanning keys or loading artifacts:
+    - namespace (product id, "" for flat keys) -> artifact names in it
+    - artifact name -> product ids holding it
+    Listing methods return iterators over live keys: consume them before the store changes.
     """
 
-    def __init__(self) -> None:
-        self._artifacts: Dict[str, Artifact] = {}
+    def __init__(self, backend: Optional[Any] = None) -> None:
+        self.backend = backend if backend is not None else MemoryBackend()
+        # Keys put or deleted since take_changes(); None until track_changes() (checkpoints)
+        self.changed: Optional[Set[str]] = None
+        self._by_namespace: Dict[str, Set[str]] = {}
+        self._by_name: Dict[str, Set[str]] = {}
+        for key in self.backend.keys():
+            self._index(key)
+
+    def _index(self, key: str) -> None:
+        product_id, name = split_key(key)
+        self._by_namespace.setdefault(product_id, set()).add(name)
+        self._by_name.setdefault(name, set()).add(product_id)
+
+    def _unindex(self, key: str) -> None:
+        product_id, name = split_key(key)
+        names = self._by_namespace.get(product_id)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self._by_namespace[product_id]
+        products = self._by_name.get(name)
+        if products is not None:
+            products.discard(product_id)
+            if not products:
+                del self._by_name[name]
+
+    def track_changes(self) -> None:
+        self.changed = set()
+
+    def take_changes(self) -> Set[str]:
+        """Keys put or deleted since the last call, resetting the set."""
+        changed = self.changed or set()
+        self.changed = set()
+        return changed
 
     def has(self, key: str) -> bool:
-        return key in self._artifacts
+        return key in self.backend
 
     def get(self, key: str) -> Optional[Artifact]:
-        return self._artifacts.get(key)
+        return self.backend.get(key)
 
     def require(self, key: str) -> Artifact:
         art = self.get(key)
@@ -36,8 +272,101 @@ class ArtifactStore:
         return art
 
     def put(self, artifact: Artifact) -> None:
-        self._artifacts[artifact.key] = artifact
+        self.backend.put(artifact)
+        self._index(artifact.key)
+        if self.changed is not None:
+            self.changed.add(artifact.key)
+
+    def load(self, artifact: Artifact) -> None:
+        """put() for an artifact restored from a checkpoint: indexed, not recorded as a change."""
+        self.backend.put(artifact)
+        self._index(artifact.key)
+
+    def delete(self, key: str) -> None:
+        if key in self.backend:
+            self.backend.delete(key)
+            self._unindex(key)
+        if self.changed is not None:
+            self.changed.add(key)
+
+    # -- index queries --
+
+    def namespaces(self) -> Iterator[str]:
+        """Product ids with at least one artifact ("" when flat keys exist)."""
+        return iter(self._by_namespace)
+
+    def names(self, product_id: str) -> Iterator[str]:
+        """Artifact names stored in a product namespace, e.g. every *_page_json of a product."""
+        return iter(self._by_namespace.get(product_id, ()))
+
+    def artifact_names(self) -> Iterator[str]:
+        """Artifact names (types) with at least one artifact stored."""
+        return iter(self._by_name)
+
+    def products(self, name: str) -> Iterator[str]:
+        """Product ids holding an artifact `name`."""
+        return iter(self._by_name.get(name, ()))
+
+    def count(self, name: str) -> int:
+        """Number of products holding an artifact `name` (O(1), for progress polling)."""
+        return len(self._by_name.get(name, ()))
+
+    def missing(self, name: str, product_ids: Optional[Iterable[str]] = None) -> Iterator[str]:
+        """Product ids (default: every product namespace in the store) without an artifact `name`."""
+        have = self._by_name.get(name, set())
+        if product_ids is None:
+            return (pid for pid in self._by_namespace if pid and pid not in have)
+        return (pid for pid in product_ids if pid not in have)
+
+    def iter_keys(self, prefix: str = "") -> Iterator[str]:
+        """
+        Keys starting with `prefix`, without copying the key set.
+        A namespace prefix ("<product_id>/") is answered from the namespace index.
+        """
+        if not prefix:
+            return self.backend.keys()
+        product_id, sep, rest = prefix.rpartition(NAMESPACE_SEP)
+        if sep and not rest and product_id in self._by_namespace:
+            return (ns_key(product_id, name) for name in self._by_namespace[product_id])
+        return (k for k in self.backend.keys() if k.startswith(prefix))
+
+    def stats(self) -> Dict[str, int]:
+        """Artifact counts: resident in memory vs spilled to disk."""
+        return self.backend.stats()
+
+    def footprint(self) -> Dict[str, Dict[str, int]]:
+        """
+        Per artifact type (un-namespaced name):
+        - artifacts, bytes: artifacts held in memory and the memory they hold; objects
+          shared between artifacts are counted once, for the first artifact (in backend
+          order) that holds them, so the total doesn't depend on the order but the split
+          between types does
+        - spilled, spilled_bytes: artifacts SqliteBackend holds on disk only, and their
+          pickled size; they aren't loaded (they hold no memory)
+        """
+        seen: Set[int] = set()
+        report: Dict[str, Dict[str, int]] = {}
+
+        def entry(key: str) -> Dict[str, int]:
+            return report.setdefault(
+                split_key(key)[1], {"artifacts": 0, "bytes": 0, "spilled": 0, "spilled_bytes": 0},
+            )
+
+        # Resident artifacts stay referenced by the backend for the whole walk, so the
+        # ids in `seen` can't be reused by other objects
+        for key, art in self.backend.resident():
+            counts = entry(key)
+            counts["artifacts"] += 1
+            counts["bytes"] += deep_size(art.value, seen)
+        for key, size in self.backend.spilled_sizes():
+            counts = entry(key)
+            counts["spilled"] += 1
+            counts["spilled_bytes"] += size
+        return report
+
+    def close(self) -> None:
+        self.backend.close()
 
-    def keys(self) -> Dict[str, bool]:
-        """Small helper for debugging."""
-        return {k: True for k in self._artifacts.keys()}
+    def keys(self) -> Iterator[str]:
+        """Every key, as an iterator over the backend's keys (no copy)."""
+        return self.backend.keys()
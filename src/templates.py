@@ -1,6 +1,6 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple
 
 from src.logic import (
     format_price_inr,
@@ -11,6 +11,7 @@ from src.logic import (
     safety_block,
     comparison_analysis,
 )
+from src.shared import Ref
 
 @dataclass(frozen=True)
 class FieldRule:
@@ -42,10 +43,79 @@ class TemplateEngine:
 
         return out
 
+    def compile(self, template: Template) -> "CompiledTemplate":
+        return CompiledTemplate(template)
+
+
+class CompiledTemplate:
+    """
+    A Template prepared once for repeated rendering:
+    - builders are captured once (no FieldRule/lambda allocation per render)
+    - dependencies are checked once per context shape (its key set), not per field per render
+    - `render(ctx)` is a specialized callable producing the same dict as TemplateEngine.render
+    """
+
+    def __init__(self, template: Template) -> None:
+        self.template = template
+        self.name = template.name
+        self.version = template.version
+        self._checked: Set[Tuple[str, ...]] = set()
+        self.render: Callable[[Dict[str, Any]], Dict[str, Any]] = self._build()
+
+    def _check(self, ctx: Dict[str, Any]) -> None:
+        for rule in self.template.fields:
+            for dep in rule.depends_on:
+                if dep not in ctx:
+                    raise KeyError(f"Template missing dependency '{dep}' for field '{rule.name}'")
+
+    def _build(self) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        name, version = self.name, self.version
+        rules = tuple((rule.name, rule.builder) for rule in self.template.fields)
+        checked = self._checked
+        check = self._check
+
+        def render(ctx: Dict[str, Any]) -> Dict[str, Any]:
+            shape = tuple(ctx)
+            if shape not in checked:
+                check(ctx)
+                checked.add(shape)
+            out: Dict[str, Any] = {"template": {"name": name, "version": version}}
+            for field_name, builder in rules:
+                out[field_name] = builder(ctx)
+            return out
+
+        return render
+
+
+class TemplateRegistry:
+    """Builds every registered Template once and hands out its compiled form by name."""
+
+    def __init__(self, factories: Iterable[Callable[[], Template]] = ()) -> None:
+        self._compiled: Dict[str, CompiledTemplate] = {}
+        for factory in factories:
+            self.register(factory)
+
+    def register(self, factory: Callable[[], Template]) -> CompiledTemplate:
+        compiled = TemplateEngine().compile(factory())
+        self._compiled[compiled.name] = compiled
+        return compiled
+
+    def get(self, name: str) -> CompiledTemplate:
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            raise KeyError(f"Unknown template: {name}")
+        return compiled
+
 # -------------------
 # Templates required by assignment
+#
+# Blocks derived from a product model are Refs (src/shared.py): a page points at the
+# shared model and the block is built when the page is serialized, not stored per page.
 # -------------------
 
+def _pair_analysis(pair: Tuple[Dict[str, Any], Dict[str, Any]]) -> Dict[str, Any]:
+    return comparison_analysis(*pair)
+
 def faq_page_template() -> Template:
     return Template(
         name="FAQPage",
@@ -86,16 +156,16 @@ def product_page_template() -> Template:
             FieldRule(
                 name="summary",
                 depends_on=["product_model"],
-                builder=lambda ctx: summary_block(ctx["product_model"]),
+                builder=lambda ctx: Ref(ctx["product_model"], summary_block),
             ),
             FieldRule(
                 name="sections",
                 depends_on=["product_model"],
                 builder=lambda ctx: {
-                    "ingredients": ingredients_block(ctx["product_model"]),
-                    "benefits": benefits_block(ctx["product_model"]),
-                    "usage": usage_block(ctx["product_model"]),
-                    "safety": safety_block(ctx["product_model"]),
+                    "ingredients": Ref(ctx["product_model"], ingredients_block),
+                    "benefits": Ref(ctx["product_model"], benefits_block),
+                    "usage": Ref(ctx["product_model"], usage_block),
+                    "safety": Ref(ctx["product_model"], safety_block),
                 },
             ),
         ],
@@ -122,7 +192,7 @@ def comparison_page_template() -> Template:
             FieldRule(
                 name="analysis",
                 depends_on=["product_model", "product_b_model"],
-                builder=lambda ctx: comparison_analysis(ctx["product_model"], ctx["product_b_model"]),
+                builder=lambda ctx: Ref((ctx["product_model"], ctx["product_b_model"]), _pair_analysis),
             ),
             FieldRule(
                 name="conclusion",
@@ -131,3 +201,52 @@ def comparison_page_template() -> Template:
             ),
         ],
     )
+
+def competitor_comparison_page_template() -> Template:
+    return Template(
+        name="CompetitorComparisonPage",
+        version="1.0",
+        fields=[
+            FieldRule(
+                name="title",
+                depends_on=["product_model", "competitors"],
+                builder=lambda ctx: f"{ctx['product_model']['product_name']} vs top {len(ctx['competitors'])} competitors",
+            ),
+            FieldRule(
+                name="product",
+                depends_on=["product_model"],
+                builder=lambda ctx: ctx["product_model"],
+            ),
+            FieldRule(
+                name="competitors",
+                depends_on=["product_model", "competitors"],
+                builder=lambda ctx: [
+                    {
+                        "product_id": c["product_id"],
+                        "product": c["product"],
+                        "similarity": {
+                            "score": c["similarity"],
+                            "shared_ingredients": c["shared_ingredients"],
+                            "shared_benefits": c["shared_benefits"],
+                        },
+                        "analysis": Ref((ctx["product_model"], c["product"]), _pair_analysis),
+                    }
+                    for c in ctx["competitors"]
+                ],
+            ),
+            FieldRule(
+                name="conclusion",
+                depends_on=["product_model", "competitors"],
+                builder=lambda ctx: "Competitors are the catalog products with the most similar ingredients and benefits, then the closest price.",
+            ),
+        ],
+    )
+
+
+# Compiled once at import; PagesAgent renders through this registry.
+TEMPLATES = TemplateRegistry([
+    faq_page_template,
+    product_page_template,
+    comparison_page_template,
+    competitor_comparison_page_template,
+])
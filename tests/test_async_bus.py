@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+from src.agents.base import BaseAgent
+from src.async_bus import AsyncMessageBus
+from src.bus import MessageBus
+from src.messages import Task
+from src.store import ArtifactStore
+
+SLEEP = 0.05
+
+
+class SleepAgent(BaseAgent):
+    """Waits on a slow backend (asyncio.sleep) and records how many Tasks overlap."""
+    name = "sleep_agent"
+    handles = ("Sleep",)
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.peak = 0
+        self.done = 0
+
+    def handle(self, msg, store, bus):
+        time.sleep(SLEEP)
+        self.done += 1
+        return []
+
+    async def handle_async(self, msg, store, bus):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(SLEEP)
+        self.in_flight -= 1
+        self.done += 1
+        return []
+
+
+def run_sleeps(bus: MessageBus, tasks: int) -> SleepAgent:
+    agent = SleepAgent()
+    bus.register(agent)
+    for i in range(tasks):
+        bus.publish(Task(name="Sleep", payload={"i": i}))
+    bus.run()
+    return agent
+
+
+def test_async_bus_overlaps_up_to_concurrency_tasks():
+    started = time.perf_counter()
+    agent = run_sleeps(AsyncMessageBus(ArtifactStore(), concurrency=4), tasks=8)
+    elapsed = time.perf_counter() - started
+
+    assert agent.done == 8
+    assert agent.peak == 4
+    # two waves of four overlapping sleeps, not eight sequential ones
+    assert elapsed < 6 * SLEEP
+
+
+def test_async_bus_concurrency_one_runs_tasks_one_at_a_time():
+    agent = run_sleeps(AsyncMessageBus(ArtifactStore(), concurrency=1), tasks=4)
+
+    assert agent.done == 4
+    assert agent.peak == 1
+
+
+def test_sequential_bus_uses_the_synchronous_handle():
+    agent = run_sleeps(MessageBus(ArtifactStore()), tasks=2)
+
+    assert agent.done == 2
+    assert agent.peak == 0
@@ -0,0 +1,18 @@
+from src.bench import compare, run_case, synthetic_catalog
+
+
+def test_run_case_is_repeatable_for_a_seed():
+    products = synthetic_catalog(100, seed=3)
+    first = run_case(products, {}, seed=3)
+    second = run_case(products, {}, seed=3)
+
+    for metric in ("messages", "dispatches", "need_artifact", "requeued"):
+        assert first[metric] == second[metric]
+
+
+def test_compare_finds_no_message_regression_between_identical_runs():
+    products = synthetic_catalog(20, seed=0)
+    old = {"results": [dict(run_case(products, {}), size=20)]}
+    new = {"results": [dict(run_case(products, {}), size=20)]}
+
+    assert not [line for line in compare(old, new, threshold=0.0) if "messages" in line]
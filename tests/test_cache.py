@@ -0,0 +1,59 @@
+import random
+
+from src.agents.questions import QuestionAgent
+from src.bench import synthetic_catalog
+from src.pipeline import run_catalog
+from src.templates import TEMPLATES
+
+CACHED_AGENTS = ("parser_agent", "question_agent", "faq_agent", "pages_agent")
+
+
+def cached_run(tmp_path, products, name):
+    random.seed(0)
+    bus = run_catalog(
+        products, out_dir=str(tmp_path / name), cache_dir=str(tmp_path / "cache"), writer_options={"fsync": False},
+    )
+    bus.store.close()
+    stats = bus.agent_stats()
+    return {agent: (stats[agent]["cache_hits"], stats[agent]["cache_misses"]) for agent in CACHED_AGENTS}
+
+
+def test_second_run_is_served_from_the_cache(tmp_path):
+    products = synthetic_catalog(10, seed=0)
+    first = cached_run(tmp_path, products, "first")
+    second = cached_run(tmp_path, products, "second")
+
+    assert first == {"parser_agent": (0, 10), "question_agent": (0, 10), "faq_agent": (0, 10), "pages_agent": (0, 30)}
+    assert second == {"parser_agent": (10, 0), "question_agent": (10, 0), "faq_agent": (10, 0), "pages_agent": (30, 0)}
+    first_page = (tmp_path / "first" / "bench000003" / "product_page.json").read_bytes()
+    assert (tmp_path / "second" / "bench000003" / "product_page.json").read_bytes() == first_page
+
+
+def test_changed_input_misses_for_its_product_only(tmp_path):
+    products = synthetic_catalog(10, seed=0)
+    cached_run(tmp_path, products, "first")
+    product_id, raw = products[3]
+    products[3] = (product_id, dict(raw, price_inr=raw["price_inr"] + 1))
+    second = cached_run(tmp_path, products, "second")
+
+    # every Task of that product depends on its product model
+    assert second == {"parser_agent": (9, 1), "question_agent": (9, 1), "faq_agent": (9, 1), "pages_agent": (27, 3)}
+
+
+def test_agent_version_bump_invalidates_its_entries(tmp_path, monkeypatch):
+    products = synthetic_catalog(10, seed=0)
+    cached_run(tmp_path, products, "first")
+    monkeypatch.setattr(QuestionAgent, "version", "2")
+    second = cached_run(tmp_path, products, "second")
+
+    # the regenerated question banks are the same, so ComposeFAQ still hits
+    assert second == {"parser_agent": (10, 0), "question_agent": (0, 10), "faq_agent": (10, 0), "pages_agent": (30, 0)}
+
+
+def test_template_version_bump_invalidates_its_pages(tmp_path, monkeypatch):
+    products = synthetic_catalog(10, seed=0)
+    cached_run(tmp_path, products, "first")
+    monkeypatch.setattr(TEMPLATES.get("ProductPage"), "version", "1.1")
+    second = cached_run(tmp_path, products, "second")
+
+    assert second == {"parser_agent": (10, 0), "question_agent": (10, 0), "faq_agent": (10, 0), "pages_agent": (20, 10)}
@@ -0,0 +1,113 @@
+import json
+import random
+
+import pytest
+
+from src import pipeline
+from src.bench import synthetic_product
+from src.bus import BusHook
+from src.catalog import CatalogStream, load_catalog, validate_row
+from src.main import main
+
+
+def product(i=0):
+    return synthetic_product(i, random.Random(i))
+
+
+def write_jsonl(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write((row if isinstance(row, str) else json.dumps(row)) + "\n")
+    return str(path)
+
+
+@pytest.mark.parametrize("product_id", ["", ".", "..", "a/b", "../x", "x\0y"])
+def test_path_like_product_ids_are_rejected(tmp_path, product_id):
+    path = write_jsonl(tmp_path / "catalog.jsonl", [dict(product(), product_id=product_id)])
+
+    with pytest.raises(ValueError, match="invalid product_id"):
+        load_catalog(path)
+    with pytest.raises(ValueError, match="invalid product_id"):
+        validate_row(product(), product_id)
+
+    stream = CatalogStream(path)
+    assert [entry for batch in stream.batches() for entry in batch] == []
+    assert [e.error for e in stream.errors] == [f"invalid product_id {product_id!r}"]
+
+
+def test_plain_product_ids_are_kept(tmp_path):
+    path = write_jsonl(tmp_path / "catalog.jsonl", [dict(product(1), product_id="sku-1.v2"), product(2)])
+
+    assert [pid for pid, _ in load_catalog(path)] == ["sku-1.v2", "2"]
+
+
+def test_stream_collects_invalid_rows_and_keeps_the_valid_ones(tmp_path):
+    path = write_jsonl(tmp_path / "catalog.jsonl", [
+        dict(product(1), product_id="ok-1"),
+        "{not json",
+        dict(product(2), product_id="extra", color="red"),
+        "",
+        {k: v for k, v in dict(product(3), product_id="short").items() if k != "benefits"},
+        dict(product(4), product_id="listy", skin_type="Oily"),
+        [1, 2],
+        dict(product(5), product_id="ok-1"),
+        dict(product(6), product_id="ok-2"),
+    ])
+    stream = CatalogStream(path, batch_size=2)
+
+    assert [pid for batch in stream.batches() for pid, _ in batch] == ["ok-1", "ok-2"]
+    assert stream.rows == 8  # the blank line is skipped
+    assert [(e.line, e.product_id) for e in stream.errors] == [
+        (2, None), (3, "extra"), (5, "short"), (6, "listy"), (7, None), (8, "ok-1"),
+    ]
+    errors = [e.error for e in stream.errors]
+    assert errors[0].startswith("invalid JSON")
+    assert errors[1:] == [
+        "Found disallowed fields: ['color']",
+        "Missing fields: ['benefits']",
+        "skin_type must be a list of strings",
+        "expected a JSON object",
+        "duplicate product_id 'ok-1'",
+    ]
+
+
+def test_cli_reports_rejected_rows(tmp_path, capsys):
+    path = write_jsonl(tmp_path / "catalog.jsonl", [product(1), "{not json", dict(product(2), color="red")])
+    main(["--catalog", path, "--stream-input", "--out", str(tmp_path / "out")])
+
+    out = capsys.readouterr().out
+    assert "Rows: 3, products: 1, rejected: 2" in out
+    assert "line 2 (None): invalid JSON" in out
+    assert "line 3 (3): Found disallowed fields: ['color']" in out
+
+
+class SeededProducts(BusHook):
+    """Products seeded into the store each time the streamed run starts a wave."""
+
+    def __init__(self):
+        self.waves = []
+
+    def on_publish(self, bus, msg):
+        if msg.type == "Start":
+            self.waves.append(bus.store.count("raw_product_input"))
+
+
+def test_stream_holds_at_most_max_in_flight_products(tmp_path, monkeypatch):
+    hook = SeededProducts()
+    build_bus = pipeline.build_bus
+
+    def hooked_bus(*args, **kwargs):
+        bus = build_bus(*args, **kwargs)
+        bus.add_hook(hook)
+        return bus
+
+    monkeypatch.setattr(pipeline, "build_bus", hooked_bus)
+    path = write_jsonl(tmp_path / "catalog.jsonl", [product(i) for i in range(23)])
+    bus = pipeline.run_catalog_stream(
+        CatalogStream(path, batch_size=3), out_dir=str(tmp_path / "out"), max_in_flight=5,
+        writer_options={"fsync": False},
+    )
+    bus.store.close()
+
+    assert hook.waves == [5, 5, 5, 5, 3]
+    assert bus.store.require("written_files").value["products"] == 23
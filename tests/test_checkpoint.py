@@ -0,0 +1,80 @@
+import os
+import random
+import statistics
+
+import pytest
+
+from src.agents.pages import PagesAgent
+from src.bench import synthetic_catalog
+from src.checkpoint import Checkpoint
+from src.evict import ArtifactEvictor
+from src.messages import Start
+from src.pipeline import build_agents, build_bus, build_store, close_agents, resume_catalog, run_catalog, seed_catalog, wire
+
+
+def checkpointed_run(tmp_path, n):
+    random.seed(0)
+    bus = build_bus(build_store())
+    wire(bus, build_agents(str(tmp_path / f"out{n}"), writer_options={"fsync": False}))
+    bus.add_hook(ArtifactEvictor())
+    ckpt = Checkpoint(str(tmp_path / f"run{n}.ckpt"), every=200, fresh=True)
+    ckpt.attach(bus)
+    seed_catalog(bus.store, synthetic_catalog(n, seed=0), source="test")
+    bus.publish(Start(goal="build_catalog"))
+    bus.run(max_steps=100 * n)
+    close_agents(bus)
+    ckpt.close()
+    return ckpt
+
+
+def test_save_cost_follows_the_interval_not_the_run_size(tmp_path):
+    small = checkpointed_run(tmp_path, 200)
+    large = checkpointed_run(tmp_path, 1600)
+
+    def median_bytes(ckpt):
+        return statistics.median(size for _, size in ckpt.history)
+
+    assert large.saves > 5 * small.saves
+    # a full snapshot of queue and waiting sets grows about 8x between these sizes
+    assert median_bytes(large) < 2 * median_bytes(small)
+
+
+def read_outputs(out_dir):
+    files = {}
+    for root, _, names in os.walk(out_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, out_dir)] = f.read()
+    return files
+
+
+@pytest.mark.parametrize("queue", [{}, {"queue": "priority", "queue_size": 20}])
+def test_resume_after_a_crash_writes_the_same_pages(tmp_path, monkeypatch, queue):
+    products = synthetic_catalog(150, seed=4)
+    random.seed(4)
+    run_catalog(products, out_dir=str(tmp_path / "clean"), writer_options={"fsync": False}, evict=True)
+
+    handle = PagesAgent.handle
+    calls = []
+
+    def crash(self, msg, store, bus):
+        calls.append(msg)
+        if len(calls) == 200:
+            raise KeyboardInterrupt
+        return handle(self, msg, store, bus)
+
+    monkeypatch.setattr(PagesAgent, "handle", crash)
+    ckpt = str(tmp_path / "run.ckpt")
+    random.seed(4)
+    with pytest.raises(KeyboardInterrupt):
+        run_catalog(
+            products, out_dir=str(tmp_path / "resumed"), writer_options={"fsync": False},
+            checkpoint=ckpt, checkpoint_every=100, evict=True, **queue,
+        )
+    monkeypatch.setattr(PagesAgent, "handle", handle)
+
+    bus = resume_catalog(ckpt)
+    bus.store.close()
+    assert bus.steps > 0
+    assert read_outputs(tmp_path / "resumed") == read_outputs(tmp_path / "clean")
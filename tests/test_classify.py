@@ -0,0 +1,58 @@
+import pytest
+
+from src.agents.questions import QuestionAgent
+from src.bus import MessageBus
+from src.classify import CLASSIFIER
+from src.data import PRODUCT_INPUT
+from src.logic import normalize_product
+from src.messages import Task
+from src.store import Artifact, ArtifactStore
+
+PRODUCT = normalize_product(PRODUCT_INPUT)
+
+
+def baseline_answer(q, p):
+    """The if/elif chain FAQAgent answered with before the rules were compiled."""
+    if "price" in q.lower():
+        return f"The price is ₹{p['price_inr']}."
+    if "side effect" in q.lower() or "tingling" in q.lower():
+        return f"Possible side effect: {p['side_effects']}."
+    if "when" in q.lower() or "apply" in q.lower() or "drops" in q.lower():
+        return p["how_to_use"]
+    if "skin" in q.lower():
+        return f"Suitable for: {', '.join(p['skin_type'])} skin types."
+    return f"{p['product_name']} is a Vitamin C serum ({p['concentration']}) with key ingredients {', '.join(p['key_ingredients'])}."
+
+
+def question_bank():
+    store = ArtifactStore()
+    store.put(Artifact(key="product_model", value=PRODUCT, meta={}))
+    task = Task("GenerateQuestions", requires=("product_model",), produces=("question_bank",))
+    QuestionAgent().handle(task, store, MessageBus(store))
+    return [q for qs in store.require("question_bank").value["categories"].values() for q in qs]
+
+
+OVERLAPS = [
+    ("Are there side effects at this price?", "price"),           # price beats side effects
+    ("Is tingling normal when I apply it?", "side_effects"),      # side effects beat usage
+    ("When does the PRICE drop?", "price"),                       # later, higher-priority keyword
+    ("Which skin should I apply it to?", "usage"),                # usage beats skin type
+    ("Does it sting sensitive SKIN?", "skin_type"),
+    ("Is it vegan?", "informational"),
+]
+
+QUESTIONS = question_bank() + [q for q, _ in OVERLAPS]
+
+
+@pytest.mark.parametrize("question", QUESTIONS)
+def test_classifier_answers_like_the_if_elif_chain(question):
+    assert CLASSIFIER.classify(question).builder(PRODUCT) == baseline_answer(question, PRODUCT)
+
+
+@pytest.mark.parametrize("question, rule", OVERLAPS)
+def test_first_listed_rule_wins_on_overlapping_keywords(question, rule):
+    assert CLASSIFIER.classify(question).name == rule
+
+
+def test_bank_scan_matches_question_by_question():
+    assert CLASSIFIER.classify_all(QUESTIONS) == [CLASSIFIER.classify(q) for q in QUESTIONS]
@@ -0,0 +1,45 @@
+import pytest
+
+from src.bench import synthetic_catalog
+from src import compare
+from src.compare import ComparisonMatrix, top_k_competitors
+
+
+def product(ingredients, benefits, price):
+    return {"key_ingredients": ingredients, "benefits": benefits, "price_inr": price}
+
+
+# Products 1-4 tie on similarity with product 0; 1 and 3 also tie on price delta.
+TIES = [
+    product(["A", "B"], ["x"], 500),
+    product(["A", "B"], ["x"], 600),
+    product(["A", "B"], ["x"], 300),
+    product(["A", "B"], ["x"], 400),
+    product(["A", "B"], ["x"], 500),
+    product(["C"], ["y"], 500),
+]
+
+
+def ranking(results):
+    return [[(c.index, c.similarity, c.shared_ingredients, c.shared_benefits, c.price_delta) for c in row] for row in results]
+
+
+def test_bitset_breaks_ties_by_price_delta_then_catalog_order():
+    top = top_k_competitors(TIES, 5, engine="bitset")
+
+    assert [c.index for c in top[0]] == [4, 1, 3, 2, 5]
+    assert [c.similarity for c in top[0]] == [2.0, 2.0, 2.0, 2.0, 0.0]
+    assert all(i not in [c.index for c in row] for i, row in enumerate(top))
+
+
+def test_numpy_and_bitset_engines_rank_the_same():
+    pytest.importorskip("numpy")
+    catalog = [p for _, p in synthetic_catalog(300, seed=5)] + TIES
+    for k in (1, 3, 10):
+        assert ranking(top_k_competitors(catalog, k, "numpy")) == ranking(top_k_competitors(catalog, k, "bitset"))
+
+
+def test_bitset_engine_refuses_catalogs_too_large_for_it(monkeypatch):
+    monkeypatch.setattr(compare, "BITSET_MAX_PRODUCTS", 3)
+    with pytest.raises(ValueError, match="numpy"):
+        ComparisonMatrix(TIES, engine="bitset")
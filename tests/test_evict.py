@@ -0,0 +1,67 @@
+import random
+
+from src.bench import synthetic_catalog
+from src.bus import MessageBus
+from src.evict import FINAL_ARTIFACTS, ArtifactEvictor
+from src.messages import NeedArtifact, Task
+from src.pipeline import run_catalog
+from src.store import Artifact, ArtifactStore
+
+
+def evicting_bus(keys, pins=FINAL_ARTIFACTS):
+    bus = MessageBus(ArtifactStore())
+    for key in keys:
+        bus.store.put(Artifact(key=key, value=key, meta={}))
+    evictor = ArtifactEvictor(pins)
+    bus.add_hook(evictor)
+    return bus, evictor
+
+
+def ran(bus, evictor, task, result=()):
+    evictor.after_dispatch(bus, task, agent=None, result=list(result), seconds=0.0)
+
+
+def test_key_is_deleted_after_its_last_consumer_runs():
+    bus, evictor = evicting_bus(["p1/model"])
+    first = Task("A", requires=("p1/model",), produces=("p1/a",))
+    second = Task("B", requires=("p1/model",), produces=("p1/b",))
+    bus.publish(first)
+    bus.publish(second)
+
+    ran(bus, evictor, second, [NeedArtifact("B", "p1/other", second)])  # blocked: still a consumer
+    ran(bus, evictor, first)
+    assert bus.store.has("p1/model")
+    ran(bus, evictor, second)
+    assert not bus.store.has("p1/model")
+    assert evictor.refs == {} and evictor.planned == set()
+
+
+def test_pins_by_name_and_by_full_key_keep_artifacts():
+    keys = ["p1/model", "p2/model", "p1/bank", "p2/bank"]
+    bus, evictor = evicting_bus(keys, pins=("model", "p2/bank"))
+    tasks = [Task("Use", requires=(key,), payload={"key": key}) for key in keys]
+    for t in tasks:
+        bus.publish(t)
+    for t in tasks:
+        ran(bus, evictor, t)
+
+    assert [key for key in keys if bus.store.has(key)] == ["p1/model", "p2/model", "p2/bank"]
+
+
+def test_catalog_run_keeps_written_files_and_pins_only(tmp_path):
+    products = synthetic_catalog(30, seed=1)
+    product_ids = [pid for pid, _ in products]
+    random.seed(1)
+    bus = run_catalog(
+        products, out_dir=str(tmp_path), writer_options={"fsync": False}, evict=True, pins=["product_model"],
+    )
+    store = bus.store
+    missing_written = list(store.missing("written_files", product_ids))
+    names = sorted(store.artifact_names())
+    pinned = store.count("product_model")
+    store.close()
+
+    # every product's written_files, the merged one, the pinned models and the seeded index
+    assert missing_written == []
+    assert names == ["catalog_index", "product_model", "written_files"]
+    assert pinned == len(products)
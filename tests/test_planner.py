@@ -0,0 +1,39 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.agents.planner import PlannerAgent
+from src.pipeline import WORKER_AGENTS
+
+
+@pytest.mark.parametrize("competitors, targets", [
+    (2, ["product_b_model"]),        # catalog competitors replace Product B
+    (0, ["written_files"]),          # written for targeted pages only
+    (0, ["product_page", "faq_page_json"]),
+])
+def test_targets_the_plan_cannot_produce_are_rejected_up_front(competitors, targets):
+    with pytest.raises(ValueError):
+        PlannerAgent(competitors=competitors, targets=targets)
+
+
+def test_product_page_target_plans_and_imports_only_its_workers(tmp_path):
+    planner = PlannerAgent(targets=["product_page_json"])
+    assert [t.name for t in planner.product_tasks("p1")] == ["ParseProduct", "RenderProductPage", "WriteOutputs"]
+
+    # a fresh interpreter: this one may have imported every worker module already
+    script = (
+        "import json, sys\n"
+        "from src.pipeline import build_agents\n"
+        f"agents = build_agents({str(tmp_path)!r}, targets=['product_page_json'])\n"
+        "print(json.dumps({'tasks': agents[0].task_names(), 'modules': sorted(sys.modules)}))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True, cwd=root)
+    result = json.loads(out.stdout)
+
+    assert result["tasks"] == ["ParseProduct", "RenderProductPage", "WriteOutputs"]
+    workers = {module for _, module, _ in WORKER_AGENTS}
+    assert workers.intersection(result["modules"]) == {"src.agents.parser", "src.agents.pages"}
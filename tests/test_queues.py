@@ -0,0 +1,204 @@
+import os
+import random
+
+import pytest
+
+from src.agents.planner import TASK_SPECS
+from src.agents.writer import PAGE_NAMES
+from src.bench import run_case, synthetic_catalog
+from src.bus import BusHook
+from src.messages import ArtifactCreated, Done, NeedArtifact, Start, Task
+from src.metrics import PageLatency
+from src.pipeline import build_agents, build_bus, build_store, close_agents, run_catalog, seed_catalog, wire
+from src.queues import PriorityQueue, QueueFull
+from src.store import split_key
+
+
+def task(name, product_id, requires=()):
+    return Task(name=name, requires=requires, payload={"product_id": product_id})
+
+
+def drain(q):
+    out = []
+    while q:
+        out.append(q.popleft())
+    return out
+
+
+def test_control_messages_run_before_tasks():
+    q = PriorityQueue()
+    t = task("ParseProduct", "p1")
+    q.append(t)
+    q.append(ArtifactCreated("p1/product_model"))
+    q.append(Done())
+
+    assert [m.type for m in drain(q)] == ["Done", "ArtifactCreated", "Task"]
+
+
+def test_tasks_run_product_by_product_in_first_queued_order():
+    q = PriorityQueue()
+    for t in [task("A", "p2"), task("A", "p1"), task("B", "p2"), task("B", "p1")]:
+        q.append(t)
+
+    assert [(m.payload["product_id"], m.name) for m in drain(q)] == [("p2", "A"), ("p2", "B"), ("p1", "A"), ("p1", "B")]
+
+
+def test_ready_tasks_run_before_tasks_that_would_block():
+    store = {"p1/raw"}
+    q = PriorityQueue(has=store.__contains__)
+    render = task("Render", "p1", requires=("p1/model",))
+    parse = task("Parse", "p1", requires=("p1/raw",))
+    q.append(render)
+    q.append(parse)
+
+    assert drain(q) == [parse, render]
+
+
+def test_readiness_is_checked_at_dispatch():
+    store = {"p1/raw"}
+    q = PriorityQueue(has=store.__contains__)
+    parse = task("Parse", "p1", requires=("p1/raw",))
+    write = task("Write", "p1", requires=("p1/page",))
+    render = task("Render", "p1", requires=("p1/model",))
+    for t in (parse, write, render):
+        q.append(t)
+
+    assert q.popleft() is parse
+    store.add("p1/model")
+    assert q[0] is render
+    assert q.popleft() is render
+    store.add("p1/page")
+    assert q.popleft() is write
+
+
+def test_requeued_task_of_an_earlier_product_runs_first():
+    store = set()
+    q = PriorityQueue(has=store.__contains__)
+    render = task("Render", "p1", requires=("p1/model",))
+    q.append(render)
+    q.append(task("Parse", "p2"))
+    assert q.popleft() is render  # blocks: the coordinator requeues it once its input exists
+
+    store.add("p1/model")
+    q.append(render)
+    assert q.popleft() is render
+
+
+def test_groups_run_before_later_groups_of_every_product():
+    q = PriorityQueue(groups={"Render": 0})
+    for t in [task("Parse", "p1"), task("Render", "p2"), task("Render", "p1"), task("Parse", "p2")]:
+        q.append(t)
+
+    assert [(m.payload["product_id"], m.name) for m in drain(q)] == [
+        ("p1", "Render"), ("p2", "Render"), ("p1", "Parse"), ("p2", "Parse"),
+    ]
+
+
+def test_bounded_queue_refuses_tasks_but_admits_coordination():
+    q = PriorityQueue(maxsize=1)
+    q.append(task("A", "p1"))
+    with pytest.raises(QueueFull):
+        q.append(task("B", "p1"))
+    q.append(NeedArtifact("A", "p1/x", task("A", "p1")))
+
+    assert len(q) == 2
+    assert q.room() == 0
+
+
+def test_coordination_messages_take_no_room():
+    q = PriorityQueue(maxsize=1)
+    for i in range(3):
+        q.append(ArtifactCreated(f"p{i}/competitors"))
+    q.append(task("A", "p1"))
+
+    assert len(q) == 4
+    assert q.room() == 0
+
+
+def read_outputs(out_dir):
+    files = {}
+    for root, _, names in os.walk(out_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, out_dir)] = f.read()
+    return files
+
+
+@pytest.mark.parametrize("scheduler", ["retry", "dag"])
+@pytest.mark.parametrize("competitors", [0, 3])
+def test_planner_releases_a_fan_out_larger_than_the_queue_as_tasks_finish(tmp_path, scheduler, competitors):
+    products = synthetic_catalog(40, seed=2)
+    options = {"scheduler": scheduler, "competitors": competitors, "writer_options": {"fsync": False}}
+    random.seed(2)
+    run_catalog(products, out_dir=str(tmp_path / "fifo"), **options).store.close()
+    random.seed(2)
+    bus = run_catalog(products, out_dir=str(tmp_path / "bounded"), queue="priority", queue_size=8, **options)
+    bus.store.close()
+
+    # 7 Tasks per product against room for 8 messages: no QueueFull, same pages
+    assert read_outputs(tmp_path / "bounded") == read_outputs(tmp_path / "fifo")
+    planner = next(a for a in bus.agents if a.name == "planner_agent")
+    assert planner.backlog == {} and planner.left == {}
+
+
+def test_priority_queue_blocks_less_than_fifo_in_retry_mode():
+    products = synthetic_catalog(500, seed=0)
+    fifo = run_case(products, {"queue": "fifo"}, seed=0)
+    priority = run_case(products, {"queue": "priority"}, seed=0)
+
+    assert fifo["need_artifact"] > 0
+    assert priority["need_artifact"] == 0
+    assert priority["messages"] < fifo["messages"]
+
+
+class FirstPage(BusHook):
+    """Task dispatches started before the first page artifact was created."""
+
+    def __init__(self):
+        self.tasks = 0
+        self.first = None
+
+    def before_dispatch(self, bus, msg, agent):
+        if msg.type == "Task":
+            self.tasks += 1
+
+    def on_put_artifact(self, bus, key):
+        if self.first is None and split_key(key)[1] in PAGE_NAMES:
+            self.first = self.tasks
+
+
+def tasks_before_first_page(tmp_path, products, queue):
+    random.seed(0)
+    store = build_store()
+    bus = build_bus(store, queue=queue)
+    wire(bus, build_agents(str(tmp_path / queue), writer_options={"fsync": False}))
+    hook = FirstPage()
+    bus.add_hook(hook)
+    seed_catalog(store, products, source="test")
+    bus.publish(Start(goal="build_catalog"))
+    bus.run(max_steps=100 * len(products))
+    close_agents(bus)
+    return hook.first
+
+
+def test_critical_path_first_page_follows_one_product_chain(tmp_path):
+    # counted in dispatches, not seconds: the first page follows the planner's fan-out
+    # and one product's chain, not every ParseProduct
+    products = synthetic_catalog(300, seed=0)
+    fifo = tasks_before_first_page(tmp_path, products, "fifo")
+    critical = tasks_before_first_page(tmp_path, products, "critical-path")
+
+    assert critical <= len(TASK_SPECS)
+    assert critical < fifo
+
+
+def test_critical_path_runs_report_page_latency_without_metrics(tmp_path):
+    products = synthetic_catalog(20, seed=0)
+    bus = run_catalog(products, out_dir=str(tmp_path / "out"), queue="critical-path", writer_options={"fsync": False})
+    bus.store.close()
+
+    [hook] = [h for h in bus.hooks if isinstance(h, PageLatency)]
+    pages = hook.page_latency()
+    assert pages["created"] == 3 * len(products)
+    assert 0 < pages["first_seconds"] <= pages["last_seconds"]
@@ -0,0 +1,70 @@
+import os
+import random
+
+import pytest
+
+from src.agents.scheduler import DagSchedulerAgent
+from src.bench import synthetic_catalog
+from src.graph import validate_plan
+from src.messages import Plan, Task
+from src.metrics import MetricsCollector
+from src.pipeline import run_catalog
+from src.store import ArtifactStore
+
+
+def task(name, requires=(), produces=()):
+    return Task(name=name, requires=requires, produces=produces)
+
+
+def test_cyclic_plan_is_rejected():
+    tasks = [
+        task("A", requires=("c",), produces=("a",)),
+        task("B", requires=("a",), produces=("b",)),
+        task("C", requires=("b",), produces=("c",)),
+        task("D", requires=("raw",), produces=("d",)),
+    ]
+    with pytest.raises(ValueError, match=r"cycle between tasks: \['A', 'B', 'C'\]"):
+        validate_plan(tasks, available=lambda key: key == "raw")
+
+
+def test_required_artifact_without_producer_is_rejected():
+    tasks = [task("A", requires=("raw",), produces=("a",)), task("B", requires=("a", "missing"), produces=("b",))]
+    with pytest.raises(ValueError, match="'B' requires 'missing' but no task produces it"):
+        validate_plan(tasks, available=lambda key: key == "raw")
+
+
+def test_scheduler_rejects_an_invalid_plan_before_releasing_anything():
+    scheduler = DagSchedulerAgent()
+    plan = Plan([task("A", requires=("raw",), produces=("a",)), task("B", requires=("b",), produces=("b",))])
+    with pytest.raises(ValueError):
+        scheduler.handle(plan, ArtifactStore(), bus=None)
+    assert scheduler.stats["released"] == 0
+
+
+def read_outputs(out_dir):
+    files = {}
+    for root, _, names in os.walk(out_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, out_dir)] = f.read()
+    return files
+
+
+def test_dag_mode_writes_the_retry_pages_without_need_artifact(tmp_path):
+    products = synthetic_catalog(100, seed=5)
+    need_artifact = {}
+    for scheduler in ("retry", "dag"):
+        random.seed(5)
+        bus = run_catalog(
+            products, out_dir=str(tmp_path / scheduler), scheduler=scheduler,
+            writer_options={"fsync": False}, metrics=str(tmp_path / f"{scheduler}.json"),
+        )
+        bus.store.close()
+        [metrics] = [h for h in bus.hooks if isinstance(h, MetricsCollector)]
+        need_artifact[scheduler] = metrics.messages.get("NeedArtifact", 0)
+
+    assert read_outputs(tmp_path / "dag") == read_outputs(tmp_path / "retry")
+    assert need_artifact["retry"] > 0
+    assert need_artifact["dag"] == 0
+    assert bus.agent_stats()["dag_scheduler_agent"]["released"] == 7 * len(products)
@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from src.bench import synthetic_catalog
+from src.pipeline import run_catalog
+from src.serialize import MODES, Serializer
+from src.shared import expand_ref
+
+EDGE_CASES = [
+    {},
+    [],
+    {"empty": {}, "list": [], "nested": [{"a": [1, 2, {}]}]},
+    {"text": "Crème — 10% niacinamide ✓", "quote": "\"\\/\n\t", "control": "\x01"},
+    {"floats": [0.1, 1.5, -2.25, 1e16, 1e-5, 123456789.125, 0.0]},
+    {"ints": [0, -1, 2 ** 63 - 1, 2 ** 70, -(2 ** 70)]},
+    {1: "int key", "b": None, "c": True},
+    "10e5 in a string",
+]
+
+
+def catalog_pages(out_dir):
+    random.seed(0)
+    bus = run_catalog(synthetic_catalog(5, seed=0), out_dir=str(out_dir), writer_options={"fsync": False})
+    pages = [bus.store.require(key).value for key in bus.store.iter_keys() if key.endswith("_page_json")]
+    bus.store.close()
+    return pages
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_orjson_and_stdlib_write_the_same_bytes(tmp_path, mode):
+    pytest.importorskip("orjson")
+    fast = Serializer(mode, encoder="orjson", default=expand_ref)
+    stdlib = Serializer(mode, encoder="json", default=expand_ref)
+
+    values = EDGE_CASES + catalog_pages(tmp_path)
+    assert len(values) > len(EDGE_CASES)
+    for value in values:
+        assert fast.dumps(value) == stdlib.dumps(value), value
@@ -0,0 +1,112 @@
+import random
+
+import pytest
+
+from src.bench import synthetic_catalog
+from src.pipeline import run_catalog
+from src.store import Artifact, ArtifactStore, SqliteBackend, split_key
+
+
+def catalog_store(tmp_path, **options):
+    random.seed(0)
+    products = synthetic_catalog(60, seed=0)
+    return run_catalog(products, out_dir=str(tmp_path / "out"), writer_options={"fsync": False}, **options).store
+
+
+def totals(report):
+    return {field: sum(r[field] for r in report.values()) for field in ("artifacts", "bytes", "spilled", "spilled_bytes")}
+
+
+def test_footprint_total_is_the_same_on_memory_and_sqlite(tmp_path):
+    memory = catalog_store(tmp_path)
+    sqlite = catalog_store(tmp_path, store_backend="sqlite", hot_size=100_000)
+
+    assert totals(sqlite.footprint()) == totals(memory.footprint())
+    memory.close()
+    sqlite.close()
+
+
+def test_footprint_reports_spilled_artifacts_without_loading_them(tmp_path):
+    store = catalog_store(tmp_path, store_backend="sqlite", hot_size=10)
+    before = store.stats()
+    report = totals(store.footprint())
+
+    assert store.stats() == before
+    assert report["artifacts"] == 10
+    assert report["artifacts"] + report["spilled"] == len(list(store.keys()))
+    assert report["spilled_bytes"] > report["bytes"] > 0
+    store.close()
+
+
+def test_sqlite_stats_count_a_reloaded_artifact_as_resident_only():
+    store = ArtifactStore(SqliteBackend(hot_size=2))
+    for key in ("a", "b", "c"):
+        store.put(Artifact(key=key, value=[key] * 10, meta={}))
+    assert store.stats()["spilled"] == 1  # "a"
+
+    store.get("a")  # reloads "a" and spills "b"
+    stats = store.stats()
+
+    assert (stats["resident"], stats["spilled"]) == (2, 1)
+    assert stats["resident"] + stats["spilled"] == len(store.backend)
+    store.close()
+
+
+def index_store(backend):
+    store = ArtifactStore(SqliteBackend(hot_size=2) if backend == "sqlite" else None)
+    for key in ("p1/product_model", "p1/faq_page_json", "p2/product_model", "p10/product_model", "catalog_index"):
+        store.put(Artifact(key=key, value={"key": key}, meta={}))
+    return store
+
+
+def assert_indexes_match_keys(store):
+    """The namespace and name indexes describe exactly the keys the backend holds."""
+    by_namespace = {}
+    for key in store.backend.keys():
+        product_id, name = split_key(key)
+        by_namespace.setdefault(product_id, set()).add(name)
+    assert {pid: set(store.names(pid)) for pid in store.namespaces()} == by_namespace
+    names = {name for held in by_namespace.values() for name in held}
+    assert {name: store.count(name) for name in store.artifact_names()} == {
+        name: sum(name in held for held in by_namespace.values()) for name in names
+    }
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_name_indexes_answer_per_product_queries(backend):
+    store = index_store(backend)
+
+    assert sorted(store.names("p1")) == ["faq_page_json", "product_model"]
+    assert sorted(store.namespaces()) == ["", "p1", "p10", "p2"]
+    assert sorted(store.artifact_names()) == ["catalog_index", "faq_page_json", "product_model"]
+    assert store.count("product_model") == 3
+    assert store.count("comparison_page_json") == 0
+    assert sorted(store.missing("faq_page_json")) == ["p10", "p2"]
+    assert list(store.missing("faq_page_json", ["p1", "p3"])) == ["p3"]
+    assert sorted(store.iter_keys("p1/")) == ["p1/faq_page_json", "p1/product_model"]
+    assert sorted(store.iter_keys("p1")) == ["p1/faq_page_json", "p1/product_model", "p10/product_model"]
+    assert len(list(store.iter_keys())) == 5
+    assert_indexes_match_keys(store)
+    store.close()
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_name_indexes_stay_consistent_after_delete(backend):
+    store = index_store(backend)
+    store.delete("p1/faq_page_json")
+    store.delete("p2/product_model")
+    store.delete("p2/product_model")  # deleting twice is a no-op
+
+    assert list(store.names("p2")) == []
+    assert sorted(store.namespaces()) == ["", "p1", "p10"]
+    assert sorted(store.artifact_names()) == ["catalog_index", "product_model"]
+    assert store.count("product_model") == 2
+    assert sorted(store.missing("faq_page_json")) == ["p1", "p10"]
+    assert list(store.iter_keys("p2/")) == []
+    assert_indexes_match_keys(store)
+
+    store.put(Artifact(key="p2/faq_page_json", value={}, meta={}))
+    assert list(store.names("p2")) == ["faq_page_json"]
+    assert sorted(store.missing("product_model")) == ["p2"]
+    assert_indexes_match_keys(store)
+    store.close()
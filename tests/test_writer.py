@@ -0,0 +1,90 @@
+import json
+import random
+import time
+
+from src import sinks
+from src.agents import writer
+from src.bench import synthetic_catalog
+from src.pipeline import run_catalog
+from src.sinks import write_batch
+
+
+def ndjson_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_streaming_writer_writes_each_page_once(tmp_path):
+    # ArtifactCreated of a page can be dispatched after the product's WriteOutputs
+    random.seed(1)
+    products = synthetic_catalog(300, seed=1)
+    ndjson = str(tmp_path / "pages.ndjson")
+    bus = run_catalog(
+        products, out_dir=str(tmp_path / "out"),
+        writer_options={"streaming": True, "ndjson": ndjson, "page_files": False, "fsync": False},
+    )
+    bus.store.close()
+
+    records = ndjson_records(ndjson)
+    pages = [(r["product_id"], r["page"]) for r in records]
+    assert len(pages) == 3 * len(products)
+    assert len(set(pages)) == len(pages)
+
+
+def test_streaming_writer_with_io_pool_writes_each_page_once(tmp_path):
+    random.seed(2)
+    products = synthetic_catalog(300, seed=2)
+    ndjson = str(tmp_path / "pages.ndjson")
+    bus = run_catalog(
+        products, out_dir=str(tmp_path / "out"),
+        writer_options={"streaming": True, "ndjson": ndjson, "fsync": False, "io_workers": 4},
+    )
+    bus.store.close()
+
+    pages = [(r["product_id"], r["page"]) for r in ndjson_records(ndjson)]
+    assert len(pages) == 3 * len(products)
+    assert len(set(pages)) == len(pages)
+
+
+def test_io_pool_on_the_async_bus_awaits_instead_of_blocking(tmp_path, monkeypatch):
+    def slow_batch(files, fsync=True):
+        time.sleep(0.002)
+        write_batch(files, fsync)
+
+    def no_blocking_wait(*args, **kwargs):
+        raise AssertionError("blocking wait on the event loop")
+
+    monkeypatch.setattr(sinks, "write_batch", slow_batch)
+    monkeypatch.setattr(writer, "wait", no_blocking_wait)
+    random.seed(3)
+    products = synthetic_catalog(60, seed=3)
+    ndjson = str(tmp_path / "pages.ndjson")
+    bus = run_catalog(
+        products, out_dir=str(tmp_path / "out"), concurrency=4,
+        writer_options={"streaming": True, "ndjson": ndjson, "fsync": False, "io_workers": 2, "batch_size": 4},
+    )
+    bus.store.close()
+
+    stats = bus.agent_stats()["writer_agent"]
+    assert stats["io_jobs"] > 0
+    assert stats["io_waits"] == 0  # room for every submission was awaited
+    pages = [(r["product_id"], r["page"]) for r in ndjson_records(ndjson)]
+    assert sorted(pages) == sorted(set(pages)) and len(pages) == 3 * len(products)
+    assert len(list((tmp_path / "out").glob("*/*.json"))) == 3 * len(products)
+
+
+def test_io_pool_writes_pages_in_batches(tmp_path, monkeypatch):
+    batches = []
+
+    def record(files, fsync=True):
+        batches.append(len(files))
+        write_batch(files, fsync)
+
+    monkeypatch.setattr(sinks, "write_batch", record)
+    random.seed(4)
+    products = synthetic_catalog(40, seed=4)
+    bus = run_catalog(products, out_dir=str(tmp_path / "out"), writer_options={"fsync": False, "io_workers": 2})
+    bus.store.close()
+
+    # one batch per WriteOutputs (its three pages), not one job per page
+    assert batches == [3] * len(products)